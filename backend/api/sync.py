@@ -0,0 +1,115 @@
+"""
+Synchronisation incrémentale (« changements depuis ») pour les tablettes.
+
+Pour chaque modèle synchronisé, le client envoie le jeton reçu lors de la
+synchronisation précédente et ne reçoit que les lignes dont le couple
+``(updated_at, id)`` est postérieur à la marque de ce modèle, dans l'ordre de
+ce couple (index ``*_sync_idx``). Les lignes supprimées logiquement
+(``is_active=False``, ``deleted_at`` renseigné) sont renvoyées comme pierres
+tombales ; la première synchronisation n'envoie que les lignes actives.
+
+Le jeton est opaque pour le client (JSON encodé en base64) et contient la
+marque de chaque modèle. Les lignes modifiées depuis moins de
+``SYNC_SAFETY_LAG`` ne sont pas encore envoyées : une transaction en cours
+peut valider une ligne dont ``updated_at`` précède une marque déjà transmise.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from inventory.models import Product
+from inventory.serializers import ProductListSerializer
+from members.models import Member
+from members.serializers import MemberListSerializer
+from sales.models import Customer
+from sales.serializers import CustomerSerializer
+
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 2000
+SYNC_SAFETY_LAG = timedelta(seconds=5)
+
+# Nom exposé -> (queryset complet, actifs et supprimés, serializer)
+SYNC_MODELS = {
+    'products': (Product.objects.select_related('category', 'unit'), ProductListSerializer),
+    'customers': (Customer.objects.all(), CustomerSerializer),
+    'members': (Member.objects.select_related('user', 'membership_type'), MemberListSerializer),
+}
+
+
+class SyncTokenError(ValueError):
+    pass
+
+
+def encode_token(marks):
+    payload = json.dumps({
+        name: [updated_at.isoformat(), pk] for name, (updated_at, pk) in marks.items()
+    }).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_token(token):
+    """Marques ``{modèle: (updated_at, id)}`` contenues dans le jeton."""
+    if not token:
+        return {}
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(raw, dict):
+            raise SyncTokenError
+        marks = {}
+        for name, (updated_at, pk) in raw.items():
+            if name not in SYNC_MODELS or not isinstance(pk, int):
+                raise SyncTokenError
+            marks[name] = (datetime.fromisoformat(updated_at), pk)
+        return marks
+    except (ValueError, TypeError, binascii.Error):
+        raise SyncTokenError('Jeton de synchronisation invalide')
+
+
+def _model_changes(name, mark, limit, until):
+    queryset, serializer_class = SYNC_MODELS[name]
+    queryset = queryset.filter(updated_at__lte=until)
+    if mark is None:
+        queryset = queryset.filter(is_active=True)
+    else:
+        updated_at, pk = mark
+        queryset = queryset.filter(updated_at__gte=updated_at).filter(
+            Q(updated_at__gt=updated_at) | Q(pk__gt=pk)
+        )
+    rows = list(queryset.order_by('updated_at', 'pk')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changes = {
+        'updated': serializer_class([row for row in rows if row.is_active], many=True).data,
+        'deleted': [
+            {'id': row.pk, 'deleted_at': row.deleted_at}
+            for row in rows if not row.is_active
+        ],
+    }
+    new_mark = (rows[-1].updated_at, rows[-1].pk) if rows else mark
+    return changes, new_mark, has_more
+
+
+def changes_since(token=None, models=None, limit=SYNC_PAGE_SIZE):
+    """
+    Changements de chaque modèle demandé depuis le jeton.
+
+    Retourne ``{'token', 'has_more', 'changes'}`` ; tant que ``has_more``
+    est vrai, le client rappelle immédiatement avec le nouveau jeton.
+    """
+    marks = decode_token(token)
+    until = timezone.now() - SYNC_SAFETY_LAG
+    result = {'changes': {}, 'has_more': False}
+    for name in models or SYNC_MODELS:
+        changes, mark, has_more = _model_changes(name, marks.get(name), limit, until)
+        result['changes'][name] = changes
+        result['has_more'] = result['has_more'] or has_more
+        if mark is not None:
+            marks[name] = mark
+    result['token'] = encode_token(marks)
+    return result
@@ -1,3 +1,178 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from importlib import import_module
+from unittest import mock
+from urllib.parse import urlencode
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.testing import FAKE_REDIS_CACHES, seed_dataset
+from reports.models import Report
+from reports.tasks import generate_report
+from sales.models import Customer
+
+# Applications dont le routeur DRF est monté sous /api/v1/<app>/
+ROUTED_APPS = ('core', 'members', 'inventory', 'sales', 'finance', 'reports')
+
+# Plafond absolu de requêtes par appel, quelle que soit la taille des données
+MAX_QUERIES = 20
+
+# Lignes créées par vague de données (reste sous la taille de page)
+SEED_SIZE = 4
+
+# Paramètres obligatoires de certaines routes, tirés de la première instance
+ROUTE_QUERY_PARAMS = {
+    'inventory:product-lookup': lambda product: {'code': product.sku},
+}
+
+
+def routed_get_endpoints():
+    """(nom, url) de chaque route GET : listes, fiches et actions ``@action``."""
+    for app in ROUTED_APPS:
+        router = import_module(f'{app}.urls').router
+        for prefix, viewset, basename in router.registry:
+            queryset = viewset.queryset
+            instance = queryset.order_by('pk').first() if queryset is not None else None
+            
+            yield f'{app}:{basename}-list', reverse(f'{app}:{basename}-list')
+            if instance is not None:
+                yield f'{app}:{basename}-detail', reverse(f'{app}:{basename}-detail', args=[instance.pk])
+            
+            for extra in viewset.get_extra_actions():
+                if 'get' not in extra.mapping:
+                    continue
+                name = f'{app}:{basename}-{extra.url_name}'
+                if extra.detail:
+                    if instance is None:
+                        continue
+                    url = reverse(name, args=[instance.pk])
+                else:
+                    url = reverse(name)
+                if name in ROUTE_QUERY_PARAMS:
+                    url = f'{url}?{urlencode(ROUTE_QUERY_PARAMS[name](instance))}'
+                yield name, url
+
+
+@override_settings(CACHES=FAKE_REDIS_CACHES)
+class EndpointQueryBudgetTests(TestCase):
+    """
+    Le nombre de requêtes d'un endpoint ne doit pas dépendre du volume de données.
+    
+    Chaque route GET est appelée après une première vague de données puis
+    après une seconde qui double listes et relations : toute différence trahit
+    une requête par ligne (N+1). Le cache partagé est vidé avant chaque
+    mesure : on compte les requêtes du calcul, pas celles d'une lecture en cache.
+    """
+    
+    def setUp(self):
+        self.client = APIClient(raise_request_exception=False)
+        self.client.force_authenticate(User.objects.create_superuser('budget', 'budget@example.com', 'x'))
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+    
+    def seed(self):
+        seed_dataset(SEED_SIZE)
+        # Fichiers des rapports pour la route ``download``
+        for report in Report.objects.filter(file_path=''):
+            generate_report(report.pk)
+    
+    def measure(self):
+        cache.clear()
+        counts = {}
+        for name, url in routed_get_endpoints():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            counts[name] = (url, response.status_code, len(queries))
+        return counts
+    
+    def test_query_counts_do_not_grow_with_data(self):
+        self.seed()
+        # Premier passage : construit l'instantané KPI et les caches de processus
+        self.measure()
+        before = self.measure()
+        self.seed()
+        after = self.measure()
+        
+        self.assertTrue(before)
+        for name, (url, status_code, count) in after.items():
+            with self.subTest(endpoint=name, url=url):
+                # Comparer des réponses réussies, pas des erreurs précoces
+                self.assertEqual(status_code, 200)
+                self.assertEqual(before[name][1], 200)
+                self.assertLessEqual(count, MAX_QUERIES)
+                self.assertEqual(count, before[name][2], 'Requêtes en plus avec davantage de données')
+
+
+@mock.patch('api.sync.SYNC_SAFETY_LAG', timedelta(0))
+class SyncChangesTests(TestCase):
+    """Synchronisation incrémentale des tablettes (``/api/v1/sync/changes/``)."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('agent'))
+        self.url = reverse('api:sync_changes')
+        self.customers = [
+            Customer.objects.create(name=f'Client {index}', customer_type='non_member', phone=f'070000000{index}')
+            for index in range(3)
+        ]
+    
+    def sync(self, since=None, **params):
+        if since:
+            params['since'] = since
+        response = self.client.get(self.url, {'models': 'customers', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+    
+    def test_only_changes_since_token_are_sent(self):
+        first = self.sync()
+        self.assertEqual(len(first['changes']['customers']['updated']), 3)
+        self.assertFalse(first['has_more'])
+        
+        self.assertEqual(self.sync(first['token'])['changes']['customers'], {'updated': [], 'deleted': []})
+        
+        changed, removed = self.customers[0], self.customers[1]
+        changed.name = 'Client renommé'
+        changed.save()
+        removed.soft_delete()
+        
+        second = self.sync(first['token'])
+        customers = second['changes']['customers']
+        self.assertEqual([row['name'] for row in customers['updated']], ['Client renommé'])
+        self.assertEqual([row['id'] for row in customers['deleted']], [removed.pk])
+        self.assertIsNotNone(customers['deleted'][0]['deleted_at'])
+    
+    def test_api_delete_is_sent_as_tombstone(self):
+        token = self.sync()['token']
+        removed = self.customers[2]
+        
+        response = self.client.delete(reverse('sales:customer-detail', args=[removed.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get(reverse('sales:customer-detail', args=[removed.pk])).status_code, 404)
+        
+        customers = self.sync(token)['changes']['customers']
+        self.assertEqual(customers['updated'], [])
+        self.assertEqual([row['id'] for row in customers['deleted']], [removed.pk])
+    
+    def test_large_changes_are_paged(self):
+        first = self.sync(limit=2)
+        self.assertTrue(first['has_more'])
+        second = self.sync(first['token'], limit=2)
+        self.assertFalse(second['has_more'])
+        
+        ids = [row['id'] for page in (first, second) for row in page['changes']['customers']['updated']]
+        self.assertEqual(sorted(ids), sorted(customer.pk for customer in self.customers))
+    
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'pas-un-jeton'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'models': 'ventes'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'limit': 0}).status_code, 400)
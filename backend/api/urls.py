@@ -40,4 +40,5 @@ urlpatterns = [
     path('auth/register/', views.register_view, name='register'),
     path('auth/logout/', views.logout_view, name='logout'),
     path('auth/refresh/', views.refresh_token_view, name='refresh_token'),
+    path('sync/changes/', views.sync_changes_view, name='sync_changes'),
 ]
\ No newline at end of file
@@ -8,6 +8,8 @@ from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password
 from rest_framework import serializers
 
+from .sync import SYNC_MAX_PAGE_SIZE, SYNC_MODELS, SYNC_PAGE_SIZE, SyncTokenError, changes_since
+
 class LoginSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField(write_only=True)
@@ -147,3 +149,38 @@ def refresh_token_view(request):
             {'error': 'Token de rafraîchissement invalide'}, 
             status=status.HTTP_401_UNAUTHORIZED
         )
+
+@api_view(['GET'])
+def sync_changes_view(request):
+    """
+    Synchronisation incrémentale : lignes modifiées ou supprimées depuis ``since``
+
+    Paramètres : ``since`` (jeton de la synchronisation précédente, absent la
+    première fois), ``models`` (liste séparée par des virgules, tous par
+    défaut) et ``limit`` (lignes maximum par modèle).
+    """
+    models = [name for name in request.query_params.get('models', '').split(',') if name]
+    unknown = [name for name in models if name not in SYNC_MODELS]
+    if unknown:
+        return Response(
+            {'error': f"Modèles inconnus : {', '.join(unknown)}. Modèles disponibles : {', '.join(SYNC_MODELS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        limit = int(request.query_params.get('limit', SYNC_PAGE_SIZE))
+    except ValueError:
+        limit = 0
+    if not 0 < limit <= SYNC_MAX_PAGE_SIZE:
+        return Response(
+            {'error': f'limit doit être compris entre 1 et {SYNC_MAX_PAGE_SIZE}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        return Response(changes_since(request.query_params.get('since'), models, limit))
+    except SyncTokenError:
+        return Response(
+            {'error': 'Jeton de synchronisation invalide'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
@@ -13,6 +13,14 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
+# Periodic tasks (celery beat)
+app.conf.beat_schedule = {
+    'rebuild-dashboard-kpis': {
+        'task': 'reports.tasks.rebuild_dashboard_kpis',
+        'schedule': 15 * 60,
+    },
+}
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
\ No newline at end of file
@@ -226,20 +226,60 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 
-# Celery Configuration - Désactivé temporairement pour le développement
-# CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
-# CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
-# CELERY_TIMEZONE = TIME_ZONE
-# CELERY_TASK_TRACK_STARTED = True
-# CELERY_TASK_TIME_LIMIT = 30 * 60
-
-# Cache Configuration - Utilisation du cache en mémoire pour le développement
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# Celery Configuration
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_TRACK_STARTED = True
+CELERY_TASK_TIME_LIMIT = config('CELERY_TASK_TIME_LIMIT', default=30 * 60, cast=int)
+CELERY_TASK_SOFT_TIME_LIMIT = config('CELERY_TASK_SOFT_TIME_LIMIT', default=25 * 60, cast=int)
+# Exécution synchrone des tâches (tests, développement sans broker)
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = CELERY_TASK_ALWAYS_EAGER
+
+# Rapports générés (chemins relatifs à MEDIA_ROOT)
+REPORTS_OUTPUT_DIR = 'reports'
+
+# Cache Configuration - Redis partagé par tous les processus (voir core.cache)
+# CACHE_BACKEND : redis (défaut si REDIS_URL ou REDIS_CACHE_URL est défini),
+# fakeredis (Redis simulé en mémoire, tests ; requirements-dev.txt) ou locmem
+# (défaut sans Redis configuré : cache local au processus, poste de
+# développement). En production multi-processus, définir REDIS_URL.
+REDIS_URL = config('REDIS_URL', default='')
+REDIS_CACHE_URL = config('REDIS_CACHE_URL', default=REDIS_URL)
+CACHE_BACKEND = config('CACHE_BACKEND', default='redis' if REDIS_CACHE_URL else 'locmem')
+REDIS_CACHE_URL = REDIS_CACHE_URL or 'redis://localhost:6379/1'
+CACHE_DEFAULT_TIMEOUT = config('CACHE_DEFAULT_TIMEOUT', default=300, cast=int)
+
+if CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+            'TIMEOUT': CACHE_DEFAULT_TIMEOUT,
+        }
     }
-}
+else:
+    _redis_cache_options = {
+        'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+        # Redis indisponible : échec de cache, les vues recalculent
+        'IGNORE_EXCEPTIONS': True,
+        'SOCKET_CONNECT_TIMEOUT': 1,
+        'SOCKET_TIMEOUT': 1,
+    }
+    if CACHE_BACKEND == 'fakeredis':
+        from fakeredis import FakeConnection
+        _redis_cache_options['CONNECTION_POOL_KWARGS'] = {'connection_class': FakeConnection}
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+            'KEY_PREFIX': 'cooperative',
+            'TIMEOUT': CACHE_DEFAULT_TIMEOUT,
+            'OPTIONS': _redis_cache_options,
+        }
+    }
+DJANGO_REDIS_LOG_IGNORED_EXCEPTIONS = True
 
 # Session Configuration - Utilisation de la base de données pour les sessions
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
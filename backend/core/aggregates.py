@@ -0,0 +1,33 @@
+"""
+Agrégations conditionnelles : plusieurs indicateurs en une seule requête.
+
+Au lieu d'un ``count()`` ou d'un ``aggregate()`` par indicateur, chaque
+indicateur devient un agrégat filtré (``COUNT(*) FILTER (WHERE ...)`` sur
+PostgreSQL, ``CASE WHEN`` ailleurs) et ``aggregate_metrics`` les calcule
+tous dans le même ``SELECT`` ::
+
+    aggregate_metrics(
+        Product.objects.all(),
+        total=count_if(),
+        low_stock=count_if(Q(current_stock__lte=F('minimum_stock'))),
+        stock_value=sum_if(F('current_stock') * F('cost_price')),
+    )
+"""
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+
+
+def count_if(condition=None):
+    """Nombre de lignes vérifiant ``condition`` (toutes sans condition)."""
+    return Count('pk', filter=condition)
+
+
+def sum_if(expression, condition=None, default=Decimal('0')):
+    """Somme de ``expression`` sur les lignes vérifiant ``condition``, ``default`` si aucune."""
+    return Sum(expression, filter=condition, default=default)
+
+
+def aggregate_metrics(queryset, **metrics):
+    """Calculer tous les indicateurs nommés en un seul ``aggregate()``."""
+    return queryset.order_by().aggregate(**metrics)
@@ -0,0 +1,185 @@
+"""
+Cache partagé entre les processus et invalidation par étiquettes.
+
+Le cache ``default`` est Redis (``settings.CACHE_BACKEND``) : tous les
+workers lisent et invalident les mêmes entrées. Une entrée est rangée sous
+une clé qui inclut la version courante de chacune de ses étiquettes
+(``inventory.product``, ``sales.sale``...). Invalider une étiquette revient
+à lui attribuer une nouvelle version : les anciennes entrées ne sont plus
+jamais lues et expirent d'elles-mêmes, sans parcourir les clés.
+
+Les modèles suivis (``track_models``) invalident l'étiquette de leur
+modèle à chaque sauvegarde ou suppression. Redis indisponible, chaque lecture
+est un échec de cache (``IGNORE_EXCEPTIONS``) et la valeur est recalculée.
+
+``cached_action`` applique ce mécanisme aux actions DRF en lecture.
+"""
+import functools
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.http import urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+TAG_VERSION_PREFIX = 'tag-version'
+
+# Étiquettes des modèles enregistrés par ``track_models``
+_tracked_tags = set()
+
+# Filet de sécurité des actions en cache : données modifiées sans signal
+# (mises à jour en masse, autre application sur la même base)
+ACTION_CACHE_TTL = 60  # secondes
+
+
+def model_tag(model):
+    """Étiquette d'un modèle : ``app_label.model_name``."""
+    return model._meta.label_lower
+
+
+def _version_key(tag):
+    return f'{TAG_VERSION_PREFIX}:{tag}'
+
+
+def _new_version():
+    # Aléatoire plutôt qu'un compteur : une version perdue (éviction) puis
+    # recréée ne peut pas réactiver d'anciennes entrées
+    return uuid.uuid4().hex[:12]
+
+
+def tag_versions(tags):
+    """Versions courantes des étiquettes, créées au besoin."""
+    keys = {tag: _version_key(tag) for tag in tags}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for tag, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            version = _new_version()
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+        versions[tag] = version
+    return versions
+
+
+def tagged_key(key, tags):
+    """Clé de cache liée aux versions courantes des étiquettes."""
+    if not tags:
+        return key
+    versions = tag_versions(sorted(set(tags)))
+    return f'{key}@' + ','.join(str(versions[tag]) for tag in sorted(versions))
+
+
+def get_or_set_tagged(key, tags, compute, timeout=None):
+    """
+    Valeur en cache pour ``key``, sinon ``compute()`` mise en cache.
+
+    ``None`` n'est pas mis en cache : utiliser une valeur sentinelle pour
+    mémoriser une absence.
+    """
+    versioned = tagged_key(key, tags)
+    value = cache.get(versioned)
+    if value is None:
+        value = compute()
+        if value is not None:
+            cache.set(versioned, value, timeout=timeout)
+    return value
+
+
+def _bump(tags):
+    cache.set_many({_version_key(tag): _new_version() for tag in tags}, timeout=None)
+
+
+def invalidate_tags(*tags):
+    """
+    Invalider toutes les entrées portant l'une de ces étiquettes.
+
+    La version est renouvelée tout de suite puis de nouveau au commit : une
+    valeur recalculée pendant la transaction (données encore invisibles)
+    est ainsi écartée elle aussi.
+    """
+    _bump(tags)
+    transaction.on_commit(lambda: _bump(tags))
+
+
+def invalidate_model_cache(sender, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_tags(model_tag(sender))
+
+
+def track_models(*models):
+    """Invalider l'étiquette de chaque modèle à la sauvegarde et à la suppression."""
+    for model in models:
+        _tracked_tags.add(model_tag(model))
+        uid = f'core_cache_{model._meta.label_lower}'
+        post_save.connect(invalidate_model_cache, sender=model, dispatch_uid=f'{uid}_post_save')
+        post_delete.connect(invalidate_model_cache, sender=model, dispatch_uid=f'{uid}_post_delete')
+
+
+def _tag(dependency):
+    if isinstance(dependency, str):
+        return dependency
+    tag = model_tag(dependency)
+    if tag not in _tracked_tags:
+        # Sans signal, l'entrée ne serait jamais invalidée avant son expiration
+        raise ImproperlyConfigured(
+            f'{dependency.__name__} doit être enregistré avec track_models() '
+            f'avant de servir de dépendance à cached_action'
+        )
+    return tag
+
+
+def _action_key(view, request, kwargs, per_user):
+    query = urlencode(sorted(
+        (name, value) for name, values in request.query_params.lists() for value in values
+    ))
+    params = hashlib.md5(
+        f'{sorted(kwargs.items())}?{query}'.encode(), usedforsecurity=False
+    ).hexdigest()
+    if per_user:
+        scope = f'user-{request.user.pk}'
+    else:
+        scope = 'staff' if request.user.is_staff else 'user'
+    return f'action:{view.basename}:{view.action}:{scope}:{params}'
+
+
+def cached_action(depends_on, timeout=ACTION_CACHE_TTL, per_user=False):
+    """
+    Mettre en cache la réponse d'une action DRF en lecture.
+
+    La clé combine l'endpoint, ses paramètres (URL et chaîne de requête) et
+    la portée de l'utilisateur : ``staff`` ou non, ou l'utilisateur lui-même
+    avec ``per_user=True`` quand la réponse dépend de ses droits. Une
+    sauvegarde d'un modèle de ``depends_on`` (modèles suivis par
+    ``track_models`` ou étiquettes) invalide l'entrée ; ``timeout`` borne sa
+    durée de vie dans tous les cas. Seules les réponses 200 sont gardées.
+    Un modèle non suivi lève ``ImproperlyConfigured`` dès la décoration.
+
+    À placer sous ``@action`` ::
+
+        @action(detail=False, methods=['get'])
+        @cached_action(depends_on=[Loan])
+        def loan_statistics(self, request):
+            ...
+    """
+    tags = [_tag(dependency) for dependency in depends_on]
+    
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            key = tagged_key(_action_key(self, request, kwargs, per_user), tags)
+            data = cache.get(key)
+            if data is not None:
+                return Response(data)
+            
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK and response.data is not None:
+                cache.set(key, response.data, timeout=timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+from core.search import install_search_extensions
+
+
+def install_extensions(apps, schema_editor):
+    install_search_extensions(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_extensions, migrations.RunPython.noop),
+    ]
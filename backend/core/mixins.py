@@ -0,0 +1,134 @@
+"""
+Mixins partagés par les ViewSets.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    GET conditionnel (``ETag`` / ``Last-Modified``) sur ``list`` et ``retrieve``.
+    
+    Les validateurs viennent d'une seule requête sur le queryset filtré :
+    ``Max('updated_at')`` et le nombre de lignes (une suppression ou un
+    filtre qui retire des lignes change le total). Si le client présente
+    les mêmes (``If-None-Match`` / ``If-Modified-Since``), la réponse est un
+    ``304 Not Modified`` sans pagination ni sérialisation.
+    
+    ``conditional_fields`` liste les dates de modification prises en compte,
+    y compris celles des relations affichées par le serializer
+    (``'category__updated_at'``) : renommer une catégorie invalide alors la
+    liste des produits. ``detail_conditional_fields`` s'y ajoute pour
+    ``retrieve`` quand la fiche imbrique davantage de relations. Le nombre
+    d'objets liés de chaque relation entre aussi dans l'``ETag`` : supprimer
+    une ligne imbriquée change la représentation. Les écritures en masse
+    doivent mettre à jour ``updated_at`` pour être vues.
+    
+    ``Last-Modified`` ne voit pas les suppressions : il n'est envoyé que sur
+    ``retrieve`` sans relation multiple, où la seule suppression possible
+    (celle de l'objet) donne un 404. Les pages par clé (``?cursor=``) sont
+    servies sans validateurs : les calculer parcourrait toute la table
+    filtrée, ce que la pagination par clé sert justement à éviter.
+    """
+    conditional_fields = ('updated_at',)
+    detail_conditional_fields = ()
+    
+    def get_conditional_fields(self):
+        if self.action == 'retrieve':
+            return (*self.conditional_fields, *self.detail_conditional_fields)
+        return tuple(self.conditional_fields)
+    
+    def _relations(self, fields):
+        """Chemins des relations traversées par les champs (``lines__product``, ``lines``...)."""
+        relations = []
+        for field in fields:
+            parts = field.split('__')[:-1]
+            for depth in range(1, len(parts) + 1):
+                path = '__'.join(parts[:depth])
+                if path not in relations:
+                    relations.append(path)
+        return relations
+    
+    def _is_multi_valued(self, relation):
+        model = self.get_queryset().model
+        for name in relation.split('__'):
+            field = model._meta.get_field(name)
+            if field.one_to_many or field.many_to_many:
+                return True
+            model = field.related_model
+        return False
+    
+    def _validators(self, request, queryset):
+        fields = self.get_conditional_fields()
+        relations = self._relations(fields)
+        metrics = {f'last_{index}': Max(field) for index, field in enumerate(fields)}
+        counts = {
+            f'count_{index}': Count(relation, distinct=True) for index, relation in enumerate(relations)
+        }
+        # Les relations multiples dupliquent les lignes : compter les objets distincts
+        state = queryset.order_by().aggregate(
+            count=Count('pk', distinct=bool(relations)), **metrics, **counts
+        )
+        
+        fingerprint = '|'.join([
+            request.get_full_path(),
+            str(state['count']),
+            *(str(state[name]) for name in counts),
+            *(state[name].isoformat() if state[name] else '-' for name in metrics),
+        ])
+        etag = 'W/' + quote_etag(hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest())
+        
+        last_modified = None
+        if self.action == 'retrieve' and not any(map(self._is_multi_valued, relations)):
+            dates = [state[name] for name in metrics if state[name] is not None]
+            last_modified = max(dates) if dates else None
+        return etag, last_modified
+    
+    def _conditional(self, request, queryset, render):
+        etag, last_modified = self._validators(request, queryset)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = render()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+    
+    def _keyset_page(self, request):
+        cursor_param = getattr(self.paginator, 'cursor_query_param', None)
+        return cursor_param is not None and cursor_param in request.query_params
+    
+    def list(self, request, *args, **kwargs):
+        if self._keyset_page(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return self._conditional(
+            request, queryset, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+    
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        queryset = self.get_queryset().filter(pk=instance.pk)
+        return self._conditional(
+            request, queryset, lambda: Response(self.get_serializer(instance).data)
+        )
+
+
+class SoftDeleteMixin:
+    """
+    ``DELETE`` en suppression logique (``SoftDeleteModel.soft_delete``).
+    
+    La ligne reste en base avec ``is_active=False`` et ``deleted_at`` : la
+    synchronisation des tablettes (``api.sync``) la renvoie comme pierre
+    tombale. Le queryset de la vue doit exclure les lignes inactives.
+    """
+    
+    def perform_destroy(self, instance):
+        instance.soft_delete()
@@ -1,5 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 
 class TimestampedModel(models.Model):
@@ -30,6 +33,85 @@ class SoftDeleteModel(TimestampedModel):
         self.deleted_at = None
         self.save()
 
+class TreePathModel(models.Model):
+    """
+    Modèle abstrait hiérarchique (champ ``parent``) avec chemin matérialisé.
+    
+    ``path`` contient les identifiants des ancêtres puis du nœud, terminés par
+    « / » (ex. ``3/12/45/``) : tous les descendants d'un nœud se trouvent par
+    un seul ``path__startswith`` indexé.
+    """
+    PATH_SEPARATOR = '/'
+    
+    path = models.CharField(max_length=255, blank=True, editable=False, verbose_name="Chemin")
+    
+    class Meta:
+        abstract = True
+        indexes = [
+            models.Index(fields=['path'], name='%(app_label)s_%(class)s_path_idx',
+                         opclasses=['varchar_pattern_ops']),
+        ]
+    
+    CYCLE_ERROR = "Un élément ne peut pas être rattaché à l'un de ses descendants."
+    
+    def is_ancestor_of(self, node):
+        """``node`` est-il ce nœud ou l'un de ses descendants (d'après les chemins chargés) ?"""
+        return bool(self.path) and node.path.startswith(self.path)
+    
+    def clean(self):
+        super().clean()
+        if self.pk and self.parent_id and self.is_ancestor_of(self.parent):
+            raise ValidationError({'parent': self.CYCLE_ERROR})
+    
+    def save(self, *args, **kwargs):
+        # Ligne et chemins des descendants changent ensemble ou pas du tout
+        with transaction.atomic():
+            parent_path = self._checked_parent_path()
+            super().save(*args, **kwargs)
+            self._update_path(parent_path)
+    
+    def _checked_parent_path(self):
+        """
+        Chemin en base du parent, après avoir vérifié qu'il n'est pas un descendant.
+        
+        Les chemins sont relus en base : les serializers n'appellent pas
+        ``clean()`` et les instances en mémoire peuvent être périmées.
+        """
+        if not self.parent_id:
+            return ''
+        paths = dict(
+            type(self)._default_manager
+            .filter(pk__in=[pk for pk in (self.pk, self.parent_id) if pk is not None])
+            .values_list('pk', 'path')
+        )
+        parent_path = paths.get(self.parent_id, '')
+        own_path = paths.get(self.pk)
+        if own_path and parent_path.startswith(own_path):
+            raise ValidationError({'parent': self.CYCLE_ERROR})
+        return parent_path
+    
+    def _update_path(self, parent_path):
+        """Recalculer le chemin du nœud et, s'il a changé, celui de ses descendants."""
+        new_path = f"{parent_path}{self.pk}{self.PATH_SEPARATOR}"
+        old_path = self.path
+        if new_path == old_path:
+            return
+        
+        manager = type(self)._default_manager
+        manager.filter(pk=self.pk).update(path=new_path)
+        if old_path:
+            manager.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(new_path), Substr('path', len(old_path) + 1))
+            )
+        self.path = new_path
+    
+    def get_descendants(self, include_self=True):
+        """Descendants du nœud (une seule requête sur ``path``)."""
+        queryset = type(self)._default_manager.filter(path__startswith=self.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+
 class Address(TimestampedModel):
     """Modèle pour les adresses"""
     street = models.CharField(max_length=255, verbose_name="Rue")
@@ -72,6 +154,9 @@ class ActivityLog(TimestampedModel):
         verbose_name = "Journal d'activité"
         verbose_name_plural = "Journaux d'activité"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='core_activitylog_keyset_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user} - {self.action} - {self.model_name}"
@@ -0,0 +1,222 @@
+"""
+Classes de pagination partagées par les API.
+"""
+import base64
+import binascii
+import json
+import math
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# En dessous de ce nombre de lignes, le COUNT(*) exact reste peu coûteux
+COUNT_ESTIMATE_THRESHOLD = 10000
+
+
+def _model_field(model, name):
+    return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Pagination par numéro de page, ou par clé sur demande (``?cursor=``).
+    
+    Sans paramètre ``cursor`` la réponse reste celle de ``PageNumberPagination``
+    (``count``, ``next``, ``previous``, ``results``). Avec ``?cursor=`` (vide
+    pour la première page), les lignes sont triées sur ``keyset_fields`` de la
+    vue (par défaut ``-created_at, -id``) et chaque page reprend après la
+    dernière clé vue : ni ``OFFSET`` ni ``COUNT(*)``, un coût constant par page
+    grâce à l'index composite correspondant.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    keyset_fields = ('-created_at', '-id')
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_mode = self.cursor_query_param in request.query_params
+        if not self.keyset_mode:
+            return super().paginate_queryset(queryset, request, view)
+        
+        self.request = request
+        self.fields = tuple(getattr(view, 'keyset_fields', self.keyset_fields))
+        page_size = self.get_page_size(request)
+        
+        queryset = queryset.order_by(*self.fields)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after(self._decode(queryset.model, cursor)))
+        
+        rows = list(queryset[:page_size + 1])
+        self.next_key = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_key = [getattr(rows[-1], field.lstrip('-')) for field in self.fields]
+        return rows
+    
+    def get_paginated_response(self, data):
+        if not self.keyset_mode:
+            return super().get_paginated_response(data)
+        
+        next_cursor = self._encode(self.next_key) if self.next_key is not None else None
+        next_link = None
+        if next_cursor is not None:
+            next_link = replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, next_cursor
+            )
+        return Response({
+            'next': next_link,
+            'next_cursor': next_cursor,
+            'results': data
+        })
+    
+    def _after(self, key):
+        """Condition « après la clé » : (a, b) > (ka, kb) développé en OR/AND."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.fields, key):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        # Borne sur la première colonne : parcours d'index par intervalle
+        first = self.fields[0]
+        bound = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': key[0]}) & condition
+    
+    def _encode(self, key):
+        payload = json.dumps([str(value) for value in key]).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+    
+    def _decode(self, model, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(raw, list) or len(raw) != len(self.fields):
+                raise ValueError
+            return [
+                _model_field(model, field.lstrip('-')).to_python(value)
+                for field, value in zip(self.fields, raw)
+            ]
+        except (ValueError, TypeError, binascii.Error, ValidationError):
+            raise NotFound('Curseur invalide')
+
+
+
+class EstimatedPage(Page):
+    """Page dont la suite est connue par la lecture d'une ligne de plus."""
+    
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+    
+    def has_next(self):
+        return self.has_more
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    ``Paginator`` dont le total est estimé sur les grosses tables PostgreSQL.
+    
+    Sans filtre, le total vient de ``pg_class.reltuples`` ; avec filtres, de
+    l'estimation du planificateur (``EXPLAIN``). Le ``COUNT(*)`` exact reste
+    utilisé hors PostgreSQL, sur les tables jamais analysées et dès que
+    l'estimation passe sous ``COUNT_ESTIMATE_THRESHOLD``.
+    
+    Une estimation ne sert qu'au total affiché : toute page ≥ 1 est acceptée,
+    la page suivante existe si une ligne de plus a pu être lue, et une page
+    vide au-delà de la fin réelle devient la dernière page (seul cas où le
+    total exact est calculé).
+    """
+    count_is_estimate = False
+    
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            estimate = self._estimate(connection, queryset)
+            if estimate is not None and estimate >= COUNT_ESTIMATE_THRESHOLD:
+                self.count_is_estimate = True
+                return estimate
+        return queryset.count()
+    
+    def validate_number(self, number):
+        # Le calcul du total renseigne count_is_estimate
+        if not (self.count and self.count_is_estimate):
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+    
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_estimate:
+            return super().page(number)
+        
+        rows = self._rows(number)
+        if not rows and number > 1:
+            # Au-delà de la fin réelle : dernière page d'après le total exact
+            number = max(math.ceil(self.object_list.count() / self.per_page), 1)
+            rows = self._rows(number)
+        return EstimatedPage(rows[:self.per_page], number, self, has_more=len(rows) > self.per_page)
+    
+    def _rows(self, number):
+        bottom = (number - 1) * self.per_page
+        return list(self.object_list[bottom:bottom + self.per_page + 1])
+    
+    def _estimate(self, connection, queryset):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                [connection.ops.quote_name(queryset.model._meta.db_table)]
+            )
+            row = cursor.fetchone()
+            table_rows = row[0] if row else -1
+            if table_rows < COUNT_ESTIMATE_THRESHOLD:
+                return None
+            if not queryset.query.where:
+                return table_rows
+            
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPagination(KeysetPagination):
+    """
+    ``KeysetPagination`` dont le ``count`` peut être une estimation.
+    
+    La réponse porte ``count_is_estimate`` pour que le client affiche un
+    total approximatif (« environ 1,2 million »).
+    """
+    django_paginator_class = EstimatedCountPaginator
+    
+    def get_paginated_response(self, data):
+        if self.keyset_mode:
+            return super().get_paginated_response(data)
+        
+        return Response({
+            'count': self.page.paginator.count,
+            'count_is_estimate': self.page.paginator.count_is_estimate,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
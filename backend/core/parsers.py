@@ -0,0 +1,38 @@
+"""
+Parseurs de requêtes partagés par les API.
+"""
+import gzip
+import io
+import zlib
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+# Taille maximale d'un corps JSON une fois décompressé
+MAX_DECOMPRESSED_SIZE = 10 * 1024 * 1024
+
+
+class GzipJSONParser(JSONParser):
+    """
+    JSON éventuellement compressé (``Content-Encoding: gzip``).
+    
+    Utilisé par les envois en lot des terminaux mobiles sur réseau lent ; un
+    corps non compressé est lu comme par ``JSONParser``.
+    """
+    
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context.get('request')
+        encoding = request.META.get('HTTP_CONTENT_ENCODING', '') if request is not None else ''
+        
+        if encoding.strip().lower() == 'gzip':
+            try:
+                with gzip.GzipFile(fileobj=stream) as gzip_file:
+                    body = gzip_file.read(MAX_DECOMPRESSED_SIZE + 1)
+            except (OSError, EOFError, zlib.error) as exc:
+                raise ParseError(f'Corps gzip invalide - {exc}')
+            if len(body) > MAX_DECOMPRESSED_SIZE:
+                raise ParseError('Corps décompressé trop volumineux')
+            stream = io.BytesIO(body)
+        
+        return super().parse(stream, media_type, parser_context)
@@ -0,0 +1,148 @@
+"""
+Recherche textuelle indexée (PostgreSQL ``pg_trgm`` + ``unaccent``).
+
+``TrigramSearchFilter`` remplace ``SearchFilter`` : sur PostgreSQL, quand les
+extensions et la fonction ``core_unaccent`` sont installées (migration
+``core.0002_search_extensions``), chaque champ est comparé sans accents ni
+casse (``core_unaccent(lower(champ)) LIKE '%terme%'``), ce que les index GIN
+trigrammes créés par les migrations des applications peuvent servir. Sans
+ordre explicite (``?ordering=``), les résultats sont classés par similarité.
+
+Ailleurs (SQLite, extensions absentes), le filtre se comporte exactement
+comme ``SearchFilter``.
+"""
+import logging
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import CharField, F, FloatField, Func, Q, Value
+from django.db.models.functions import Greatest, Lower
+from django.db.models.lookups import Contains
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+UNACCENT_FUNCTION = 'core_unaccent'
+REQUIRED_EXTENSIONS = ('pg_trgm', 'unaccent')
+
+_availability = {}
+
+
+class Unaccent(Func):
+    """Minuscules sans accents, via la fonction immuable ``core_unaccent``."""
+    function = UNACCENT_FUNCTION
+    output_field = CharField()
+    
+    def __init__(self, expression, **extra):
+        super().__init__(Lower(expression), **extra)
+
+
+class WordSimilarity(Func):
+    function = 'word_similarity'
+    output_field = FloatField()
+
+
+def search_available(using=DEFAULT_DB_ALIAS):
+    """Les extensions et ``core_unaccent`` sont-elles utilisables sur cette base ?"""
+    if using not in _availability:
+        connection = connections[using]
+        available = False
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT (SELECT count(*) FROM pg_extension WHERE extname = ANY(%s)), "
+                    "EXISTS (SELECT 1 FROM pg_proc WHERE proname = %s)",
+                    [list(REQUIRED_EXTENSIONS), UNACCENT_FUNCTION]
+                )
+                extension_count, has_function = cursor.fetchone()
+            available = extension_count == len(REQUIRED_EXTENSIONS) and has_function
+        _availability[using] = available
+    return _availability[using]
+
+
+def install_search_extensions(schema_editor):
+    """
+    Installer ``pg_trgm``, ``unaccent`` et ``core_unaccent`` si possible.
+    
+    Retourne ``False`` (sans interrompre la migration) quand la base n'est pas
+    PostgreSQL ou que les extensions ne peuvent pas être créées.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return False
+    try:
+        with transaction.atomic(using=connection.alias):
+            for extension in REQUIRED_EXTENSIONS:
+                schema_editor.execute(f'CREATE EXTENSION IF NOT EXISTS {extension}')
+            # unaccent() n'est que STABLE : l'enveloppe IMMUTABLE permet de l'indexer
+            schema_editor.execute(
+                f"CREATE OR REPLACE FUNCTION {UNACCENT_FUNCTION}(text) RETURNS text "
+                f"AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$ "
+                f"LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT"
+            )
+    except Exception as exc:
+        logger.warning("Recherche trigramme indisponible (%s) : SearchFilter standard utilisé", exc)
+        return False
+    _availability.pop(connection.alias, None)
+    return True
+
+
+def _index_name(table, column):
+    return f'{table}_{column}_trgm'[:63]
+
+
+def create_trigram_indexes(schema_editor, table, columns):
+    """Créer les index GIN trigrammes sur ``core_unaccent(lower(colonne))``."""
+    connection = schema_editor.connection
+    if not search_available(connection.alias):
+        return
+    for column in columns:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {_index_name(table, column)} ON {table} '
+            f'USING gin ({UNACCENT_FUNCTION}(lower({column})) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(schema_editor, table, columns):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in columns:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {_index_name(table, column)}')
+
+
+class TrigramSearchFilter(filters.SearchFilter):
+    """
+    ``SearchFilter`` insensible aux accents, indexé et classé par pertinence.
+    
+    À placer après ``OrderingFilter`` pour que le classement par similarité
+    s'applique lorsque le client ne demande pas d'ordre explicite.
+    """
+    ordering_param = api_settings.ORDERING_PARAM
+    
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+        
+        if (
+            not search_available(queryset.db)
+            or any(field[0] in self.lookup_prefixes for field in search_fields)
+            or self.must_call_distinct(queryset, search_fields)
+        ):
+            return super().filter_queryset(request, queryset, view)
+        
+        for term in search_terms:
+            normalized = Unaccent(Value(term))
+            condition = Q()
+            for field in search_fields:
+                condition |= Q(Contains(Unaccent(F(field)), normalized))
+            queryset = queryset.filter(condition)
+        
+        if request.query_params.get(self.ordering_param):
+            return queryset
+        
+        full_query = Unaccent(Value(' '.join(search_terms)))
+        similarities = [WordSimilarity(full_query, Unaccent(F(field))) for field in search_fields]
+        rank = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+        return queryset.annotate(search_rank=rank).order_by('-search_rank', *queryset.query.order_by)
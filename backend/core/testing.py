@@ -0,0 +1,181 @@
+"""
+Outils partagés par les tests des applications.
+"""
+import itertools
+import json
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+from fakeredis import FakeConnection
+
+requires_postgresql = unittest.skipUnless(
+    connection.vendor == 'postgresql', "Plans d'exécution propres à PostgreSQL"
+)
+
+# Redis simulé en mémoire, à appliquer avec ``override_settings(CACHES=...)``
+FAKE_REDIS_CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://fakeredis:6379/0',
+        'KEY_PREFIX': 'test',
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'CONNECTION_POOL_KWARGS': {'connection_class': FakeConnection},
+        },
+    }
+}
+
+
+def _index_names(plan):
+    if 'Index Name' in plan:
+        yield plan['Index Name']
+    for child in plan.get('Plans', []):
+        yield from _index_names(child)
+
+
+class QueryPlanAssertionsMixin:
+    """Vérifier sur le plan PostgreSQL qu'une requête passe par un index donné."""
+    
+    def assertUsesIndex(self, queryset, index_name):
+        # Sur une base de test quasi vide, le parcours séquentiel serait toujours
+        # préféré : on l'écarte pour la transaction du test uniquement.
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+        used = set(_index_names(plan))
+        self.assertIn(
+            index_name, used,
+            f"{index_name} non utilisé (index du plan : {sorted(used) or 'aucun'})\n{queryset.query}"
+        )
+
+
+_sequence = itertools.count(1)
+
+
+def seed_dataset(size):
+    """
+    Créer ``size`` lignes de chaque entité principale, reliées entre elles.
+    
+    Chaque appel ajoute aussi une ligne enfant à *chaque* parent déjà présent
+    (cotisations, lignes de vente, mouvements…) : après deux appels, les listes
+    comme les fiches détaillées portent deux fois plus de données.
+    """
+    from core.models import ActivityLog, Address, Contact
+    from finance.models import (
+        Account, Budget, BudgetLine, FinancialTransaction, Loan, LoanPayment,
+        MemberSavings, SavingsTransaction
+    )
+    from inventory.models import (
+        Category, Inventory, InventoryLine, Product, StockMovement, Unit
+    )
+    from members.models import FamilyMember, Member, MembershipFee, MembershipType
+    from reports.models import Dashboard, Report, ReportTemplate
+    from sales.models import Customer, Payment, Promotion, Sale, SaleItem
+    
+    now = timezone.now()
+    today = timezone.localdate()
+    membership_type, _ = MembershipType.objects.get_or_create(
+        name='Standard', defaults={'description': 'Adhésion standard', 'monthly_fee': Decimal('1000')}
+    )
+    unit, _ = Unit.objects.get_or_create(name='Kilogramme', defaults={'abbreviation': 'kg', 'unit_type': 'weight'})
+    cash, _ = Account.objects.get_or_create(code='571', defaults={'name': 'Caisse', 'account_type': 'asset'})
+    
+    for _ in range(size):
+        n = next(_sequence)
+        user = User.objects.create(username=f'seed{n}', first_name=f'Prénom{n}', last_name=f'Nom{n}')
+        Member.objects.create(
+            user=user, membership_number=f'M{n:06d}', membership_type=membership_type,
+            birth_date=date(1980, 1, 1), gender='F', id_number=f'CNI{n}', profession='Agricultrice',
+            address=Address.objects.create(street=f'{n} rue du Marché', city='Bouaké', region='Gbêkê'),
+            contact=Contact.objects.create(phone_primary=f'0700{n:06d}'),
+            emergency_contact_name='Contact', emergency_contact_phone='0100000000',
+            emergency_contact_relation='Frère', join_date=today
+        )
+        parent = Category.objects.create(name=f'Catégorie {n}', code=f'C{n}')
+        Product.objects.create(
+            name=f'Produit {n}', category=Category.objects.create(name=f'Sous-catégorie {n}', code=f'SC{n}', parent=parent),
+            sku=f'SKU{n}', barcode=f'BAR{n}', unit=unit, cost_price=Decimal('100'),
+            selling_price_member=Decimal('120'), selling_price_non_member=Decimal('150'),
+            current_stock=Decimal('1000'), minimum_stock=Decimal('10')
+        )
+        Customer.objects.create(name=f'Client {n}', customer_type='non_member', phone=f'0500{n:06d}')
+        Account.objects.create(code=f'6{n}', name=f'Charges {n}', account_type='expense', parent=None)
+        Promotion.objects.create(
+            name=f'Promotion {n}', description='Remise', promotion_type='percentage',
+            discount_percentage=Decimal('5'), start_date=now, end_date=now + timedelta(days=30)
+        )
+        Budget.objects.create(name=f'Budget {n}', start_date=today, end_date=today + timedelta(days=365))
+        Inventory.objects.create(name=f'Inventaire {n}', date_start=now, created_by=user)
+        Report.objects.create(
+            name=f'Rapport {n}', report_type='sales_report', period_start=today, period_end=today,
+            file_format='csv', generated_by=user, generation_time=now, status='completed'
+        )
+        ReportTemplate.objects.create(
+            name=f'Modèle {n}', description='Modèle', report_type='sales_report', created_by=user
+        )
+        Dashboard.objects.create(name=f'Tableau {n}', created_by=user, is_public=True)
+        ActivityLog.objects.create(user=user, action='create', model_name='Member', object_id=n)
+    
+    # Une ligne enfant de plus pour chaque parent existant
+    for member in Member.objects.all():
+        n = next(_sequence)
+        MembershipFee.objects.create(
+            member=member, amount=Decimal('1000'), period_month=n % 12 + 1, period_year=2000 + n,
+            payment_date=today, payment_method='cash', receipt_number=f'R{n}'
+        )
+        FamilyMember.objects.create(member=member, name=f'Enfant {n}', relationship='child')
+        savings = MemberSavings.objects.create(member=member, account_number=f'EP{n}', opening_date=today)
+        SavingsTransaction.objects.create(
+            savings_account=savings, transaction_type='deposit', amount=Decimal('500'),
+            balance_after=Decimal('500'), description='Dépôt'
+        )
+        loan = Loan.objects.create(
+            member=member, loan_number=f'L{n}', principal_amount=Decimal('100000'),
+            interest_rate=Decimal('5'), total_amount=Decimal('105000'), application_date=today,
+            due_date=today + timedelta(days=365), status='disbursed', monthly_payment=Decimal('8750'),
+            balance_remaining=Decimal('105000'), purpose='Semences'
+        )
+        LoanPayment.objects.create(
+            loan=loan, amount=Decimal('8750'), payment_date=today, principal_amount=Decimal('8000'),
+            interest_amount=Decimal('750'), balance_after=Decimal('96250'), receipt_number=f'LP{n}'
+        )
+    
+    products = list(Product.objects.all())
+    for product in products:
+        StockMovement.objects.create(
+            product=product, movement_type='in', quantity=Decimal('10'), reference_type='purchase',
+            stock_after=product.current_stock
+        )
+    for inventory in Inventory.objects.all():
+        for product in products:
+            InventoryLine.objects.get_or_create(
+                inventory=inventory, product=product, defaults={'theoretical_quantity': product.current_stock}
+            )
+    
+    for customer in Customer.objects.all():
+        n = next(_sequence)
+        sale = Sale.objects.create(
+            sale_number=f'V{n}', customer=customer, sale_date=now, status='confirmed',
+            total_amount=Decimal('150')
+        )
+        for product in products[:2]:
+            SaleItem.objects.create(sale=sale, product=product, quantity=Decimal('1'), unit_price=Decimal('150'))
+        Payment.objects.create(
+            sale=sale, payment_number=f'P{n}', amount=Decimal('150'), payment_date=now, payment_method='cash'
+        )
+    
+    for account in Account.objects.exclude(pk=cash.pk):
+        n = next(_sequence)
+        FinancialTransaction.objects.create(
+            transaction_number=f'T{n}', date=today, description='Achat', transaction_type='expense',
+            amount=Decimal('100'), debit_account=account, credit_account=cash
+        )
+    for budget in Budget.objects.all():
+        for account in Account.objects.exclude(pk=cash.pk):
+            BudgetLine.objects.get_or_create(
+                budget=budget, account=account, defaults={'budgeted_amount': Decimal('1000')}
+            )
@@ -1,3 +1,198 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from inventory.lookup import lookup_product
+from inventory.models import Category, Product, Unit
+from inventory.services import record_movement
+from members.models import MembershipType
+from sales.models import Customer
+
+from .cache import cached_action, get_or_set_tagged, invalidate_tags, model_tag
+from .models import ActivityLog
+from .pagination import EstimatedCountPaginator
+from .search import search_available
+from .testing import FAKE_REDIS_CACHES, requires_postgresql
+
+
+def create_product(sku='MAIS-1', barcode='123'):
+    unit, _ = Unit.objects.get_or_create(name='Kilogramme', abbreviation='kg', unit_type='weight')
+    category, _ = Category.objects.get_or_create(name='Céréales')
+    return Product.objects.create(
+        name='Maïs', sku=sku, barcode=barcode, category=category, unit=unit, cost_price=50,
+        selling_price_member=110, selling_price_non_member=120
+    )
+
+
+@override_settings(CACHES=FAKE_REDIS_CACHES)
+class TaggedCacheTests(TestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+    
+    def compute(self):
+        self.calls += 1
+        return {'value': self.calls}
+    
+    def test_value_is_cached_until_tag_is_invalidated(self):
+        first = get_or_set_tagged('stats', ['sales.sale'], self.compute)
+        self.assertEqual(get_or_set_tagged('stats', ['sales.sale'], self.compute), first)
+        self.assertEqual(self.calls, 1)
+        
+        invalidate_tags('inventory.product')
+        self.assertEqual(get_or_set_tagged('stats', ['sales.sale'], self.compute), first)
+        
+        invalidate_tags('sales.sale')
+        self.assertEqual(get_or_set_tagged('stats', ['sales.sale'], self.compute), {'value': 2})
+    
+    def test_model_save_invalidates_lookup(self):
+        product = create_product()
+        self.assertEqual(lookup_product('123')['selling_price_member'], 110)
+        
+        tag_key = f'tag-version:{model_tag(Product)}'
+        version = cache.get(tag_key)
+        product.selling_price_member = 115
+        product.save()
+        self.assertNotEqual(cache.get(tag_key), version)
+        self.assertEqual(lookup_product('123')['selling_price_member'], 115)
+        self.assertIsNone(lookup_product('inconnu'))
+
+
+@override_settings(CACHES=FAKE_REDIS_CACHES)
+class CachedActionTests(TestCase):
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('gestionnaire'))
+        self.url = reverse('inventory:product-statistics')
+        self.product = create_product()
+    
+    def get(self, url=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url or self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+    
+    def test_statistics_are_served_from_cache_until_data_changes(self):
+        first, queries = self.get()
+        self.assertGreater(queries, 0)
+        self.assertEqual(self.get(), (first, 0))
+        
+        # Paramètres différents : entrée distincte
+        self.assertGreater(self.get(f'{self.url}?category={self.product.category_id}')[1], 0)
+        
+        # Mouvement de stock sans Product.save() : invalidé par stock_changed
+        record_movement(self.product, 'in', 5, 'purchase')
+        data, queries = self.get()
+        self.assertGreater(queries, 0)
+        self.assertNotEqual(data['total_stock_value'], first['total_stock_value'])
+        
+        create_product(sku='MIL-1', barcode='456')
+        self.assertEqual(self.get()[0]['total_products'], 2)
+    
+    def test_membership_type_change_invalidates_member_statistics(self):
+        membership_type = MembershipType.objects.create(name='Standard', description='', monthly_fee=1000)
+        url = reverse('members:member-statistics')
+        self.get(url)
+        self.assertEqual(self.get(url)[1], 0)
+        
+        membership_type.name = 'Ordinaire'
+        membership_type.save()
+        self.assertGreater(self.get(url)[1], 0)
+    
+    def test_untracked_dependency_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            cached_action(depends_on=[User])
+
+
+class EstimatedCountPaginationTests(TestCase):
+    
+    def setUp(self):
+        self.client = APIClient()
+        user = User.objects.create_user('auditeur')
+        self.client.force_authenticate(user)
+        ActivityLog.objects.bulk_create([
+            ActivityLog(user=user, action='update' if index % 2 else 'create', model_name='Sale', object_id=index)
+            for index in range(30)
+        ])
+        self.url = reverse('core:activitylog-list')
+    
+    def test_small_tables_get_an_exact_count(self):
+        response = self.client.get(self.url, {'action': 'create'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 15)
+        self.assertFalse(response.data['count_is_estimate'])
+    
+    @mock.patch.object(EstimatedCountPaginator, 'count_is_estimate', True)
+    @mock.patch.object(EstimatedCountPaginator, 'count', 10)
+    def test_stale_estimate_does_not_hide_tail_pages(self):
+        def page(number):
+            response = self.client.get(self.url, {'page': number, 'page_size': 5})
+            self.assertEqual(response.status_code, 200)
+            return response.data
+        
+        # Estimation à 10 lignes (2 pages) pour 30 lignes réelles
+        self.assertEqual(page(1)['count'], 10)
+        self.assertIsNotNone(page(4)['next'])
+        last = page(6)
+        self.assertIsNone(last['next'])
+        self.assertEqual(len(last['results']), 5)
+        self.assertEqual(page(9)['results'], last['results'])
+        self.assertEqual(self.client.get(self.url, {'page': 0}).status_code, 404)
+    
+    @requires_postgresql
+    def test_large_tables_get_the_planner_estimate(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {ActivityLog._meta.db_table}')
+        
+        with mock.patch('core.pagination.COUNT_ESTIMATE_THRESHOLD', 10):
+            response = self.client.get(self.url)
+            self.assertTrue(response.data['count_is_estimate'])
+            self.assertEqual(response.data['count'], 30)
+            
+            filtered = self.client.get(self.url, {'action': 'create'})
+            self.assertTrue(filtered.data['count_is_estimate'])
+            self.assertGreater(filtered.data['count'], 0)
+
+
+class TrigramSearchTests(TestCase):
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('caissier'))
+        for name in ('Café Touba', 'Boutique cafetière', 'Boulangerie Ndiaye'):
+            Customer.objects.create(name=name, customer_type='non_member', phone='0700000000')
+        self.url = reverse('sales:customer-list')
+    
+    def names(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [customer['name'] for customer in response.data['results']]
+    
+    @requires_postgresql
+    def test_accent_insensitive_match_ranked_by_similarity(self):
+        if not search_available():
+            self.skipTest('Extensions pg_trgm/unaccent absentes')
+        
+        # Sans classement par pertinence, la plus récente viendrait en tête
+        self.assertEqual(self.names(search='cafe'), ['Café Touba', 'Boutique cafetière'])
+        self.assertEqual(self.names(search='CAFÉ TOUBA'), ['Café Touba'])
+        self.assertEqual(
+            self.names(search='cafe', ordering='-created_at'), ['Boutique cafetière', 'Café Touba']
+        )
+    
+    def test_falls_back_to_search_filter_without_extensions(self):
+        with mock.patch('core.search.search_available', return_value=False):
+            self.assertEqual(self.names(search='caf'), ['Boutique cafetière', 'Café Touba'])
+            self.assertEqual(self.names(search='boulangerie ndiaye'), ['Boulangerie Ndiaye'])
+            # SearchFilter standard : sensible aux accents
+            self.assertEqual(self.names(search='cafe'), ['Boutique cafetière'])
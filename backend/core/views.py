@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Address, Contact, ActivityLog
+from .pagination import EstimatedCountPagination
 from .serializers import AddressSerializer, ContactSerializer, ActivityLogSerializer
 
 
@@ -27,7 +28,7 @@ class ContactViewSet(viewsets.ModelViewSet):
 
 class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
     """Journal d'activité en lecture seule"""
-    queryset = ActivityLog.objects.all()
+    queryset = ActivityLog.objects.select_related('user')
     serializer_class = ActivityLogSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -35,6 +36,7 @@ class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ['user__username', 'action', 'model_name']
     ordering_fields = ['created_at']
     ordering = ['-created_at']
+    pagination_class = EstimatedCountPagination
     
     @action(detail=False, methods=['get'])
     def recent_activities(self, request):
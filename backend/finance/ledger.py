@@ -0,0 +1,326 @@
+"""
+Moteur de report des écritures sur les soldes des comptes.
+
+Chaque ``FinancialTransaction`` débite ``debit_account`` et crédite
+``credit_account`` du même montant. Le solde d'un compte est tenu dans son
+sens normal : débit - crédit pour les comptes d'actif et de charges,
+crédit - débit pour les comptes de passif, de capitaux propres et de produits.
+
+Les signaux de ``finance.signals`` reportent chaque création, modification ou
+suppression d'écriture sous forme de deltas ``F('balance') + delta`` sur des
+comptes verrouillés (``select_for_update``). Le même report tient à jour les
+soldes mensuels (``AccountPeriodBalance``) : un solde à une date donnée ne
+demande plus que les écritures brutes d'un seul mois. La commande
+``verify_ledger`` recalcule tous les soldes à partir des écritures pour
+détecter les dérives.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+
+from .models import Account, AccountPeriodBalance, FinancialTransaction
+
+# Types de comptes dont le solde augmente au débit
+DEBIT_NORMAL_TYPES = ('asset', 'expense')
+
+ZERO = Decimal('0')
+
+
+def signed_balance(account_type, debit, credit):
+    """Variation du solde d'un compte pour un débit et un crédit donnés."""
+    if account_type in DEBIT_NORMAL_TYPES:
+        return debit - credit
+    return credit - debit
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def transaction_state(txn):
+    """Comptes, date et montant d'une écriture en mémoire."""
+    return {
+        'debit_account_id': txn.debit_account_id,
+        'credit_account_id': txn.credit_account_id,
+        'date': txn.date,
+        'amount': Decimal(str(txn.amount or 0)),
+    }
+
+
+def stored_transaction_state(pk):
+    """Comptes, date et montant d'une écriture tels qu'enregistrés en base."""
+    return FinancialTransaction.objects.filter(pk=pk).values(
+        'debit_account_id', 'credit_account_id', 'date', 'amount'
+    ).first()
+
+
+def _movements(state, sign):
+    """Mouvements (compte, période, débit, crédit) d'une écriture, signés."""
+    amount = state['amount'] * sign
+    period = month_start(state['date'])
+    return [
+        (state['debit_account_id'], period, amount, ZERO),
+        (state['credit_account_id'], period, ZERO, amount),
+    ]
+
+
+def apply_movements(movements):
+    """
+    Appliquer des mouvements (compte, période, débit, crédit) aux soldes.
+
+    Les comptes concernés sont verrouillés dans l'ordre des clés primaires
+    (pas d'interblocage entre deux reports concurrents), puis chaque solde est
+    mis à jour par une expression ``F()``, ainsi que les soldes mensuels.
+    """
+    totals = defaultdict(lambda: defaultdict(lambda: [ZERO, ZERO]))
+    for account_id, period, debit, credit in movements:
+        totals[account_id][period][0] += debit
+        totals[account_id][period][1] += credit
+    
+    with transaction.atomic():
+        accounts = Account.objects.select_for_update().filter(
+            pk__in=totals
+        ).order_by('pk').values_list('pk', 'account_type')
+        for account_id, account_type in accounts:
+            balance_delta = ZERO
+            for period, (debit, credit) in sorted(totals[account_id].items()):
+                if debit or credit:
+                    _post_to_period(account_id, account_type, period, debit, credit)
+                balance_delta += signed_balance(account_type, debit, credit)
+            if balance_delta:
+                Account.objects.filter(pk=account_id).update(balance=F('balance') + balance_delta)
+
+
+def _post_to_period(account_id, account_type, period, debit, credit):
+    """Reporter un mouvement sur le mois concerné et décaler les mois suivants."""
+    delta = signed_balance(account_type, debit, credit)
+    periods = AccountPeriodBalance.objects.filter(account_id=account_id)
+    
+    # Le compte est verrouillé : aucune création concurrente du même mois
+    if not periods.filter(period=period).exists():
+        previous = periods.filter(period__lt=period).order_by('-period').first()
+        opening = previous.closing_balance if previous else ZERO
+        AccountPeriodBalance.objects.create(
+            account_id=account_id,
+            period=period,
+            opening_balance=opening,
+            closing_balance=opening
+        )
+    
+    periods.filter(period=period).update(
+        debits=F('debits') + debit,
+        credits=F('credits') + credit,
+        closing_balance=F('closing_balance') + delta
+    )
+    if delta:
+        periods.filter(period__gt=period).update(
+            opening_balance=F('opening_balance') + delta,
+            closing_balance=F('closing_balance') + delta
+        )
+
+
+def post_transaction_change(previous, current):
+    """Annuler l'ancien état d'une écriture et reporter le nouveau."""
+    if previous == current:
+        return
+    movements = []
+    if previous is not None:
+        movements += _movements(previous, -1)
+    if current is not None:
+        movements += _movements(current, 1)
+    apply_movements(movements)
+
+
+def balance_at(account, day):
+    """
+    Solde d'un compte à la fin de la journée ``day`` : solde d'ouverture du
+    mois (ou clôture du dernier mois mouvementé) plus les écritures du mois.
+    """
+    period = month_start(day)
+    last = AccountPeriodBalance.objects.filter(
+        account=account, period__lte=period
+    ).order_by('-period').first()
+    if last is None:
+        return ZERO
+    if last.period < period:
+        # Aucun mouvement depuis la clôture de ce mois
+        return last.closing_balance
+    
+    month = FinancialTransaction.objects.filter(
+        Q(debit_account=account) | Q(credit_account=account),
+        date__gte=period,
+        date__lte=day
+    ).aggregate(
+        debit=Sum('amount', filter=Q(debit_account=account)),
+        credit=Sum('amount', filter=Q(credit_account=account))
+    )
+    return last.opening_balance + signed_balance(
+        account.account_type, month['debit'] or ZERO, month['credit'] or ZERO
+    )
+
+
+def rebuild_period_balances():
+    """Recalculer tous les soldes mensuels à partir des écritures."""
+    movements = defaultdict(lambda: [ZERO, ZERO])
+    for index, account_field in enumerate(('debit_account', 'credit_account')):
+        rows = FinancialTransaction.objects.annotate(
+            period=TruncMonth('date')
+        ).order_by().values(account_field, 'period').annotate(total=Sum('amount'))
+        for row in rows.iterator():
+            movements[(row[account_field], row['period'])][index] += row['total']
+    
+    account_types = dict(Account.objects.values_list('pk', 'account_type'))
+    balances = []
+    running = defaultdict(lambda: ZERO)
+    for (account_id, period), (debit, credit) in sorted(movements.items()):
+        opening = running[account_id]
+        closing = opening + signed_balance(account_types[account_id], debit, credit)
+        running[account_id] = closing
+        balances.append(AccountPeriodBalance(
+            account_id=account_id,
+            period=period,
+            opening_balance=opening,
+            debits=debit,
+            credits=credit,
+            closing_balance=closing
+        ))
+    
+    with transaction.atomic():
+        AccountPeriodBalance.objects.all().delete()
+        AccountPeriodBalance.objects.bulk_create(balances, batch_size=1000)
+    return len(balances)
+
+
+def _total_subquery(account_field, transactions):
+    totals = transactions.filter(**{account_field: OuterRef('pk')}).order_by().values(
+        account_field
+    ).annotate(total=Sum('amount')).values('total')
+    return Coalesce(
+        Subquery(totals, output_field=DecimalField(max_digits=15, decimal_places=2)),
+        Value(ZERO),
+        output_field=DecimalField(max_digits=15, decimal_places=2)
+    )
+
+
+def account_totals(date_from=None, date_to=None, accounts=None):
+    """
+    Comptes annotés de ``total_debit`` et ``total_credit`` sur la période, en
+    une seule requête (sous-requêtes agrégées par compte).
+    """
+    transactions = FinancialTransaction.objects.all()
+    if date_from:
+        transactions = transactions.filter(date__gte=date_from)
+    if date_to:
+        transactions = transactions.filter(date__lte=date_to)
+    
+    accounts = Account.objects.all() if accounts is None else accounts
+    return accounts.annotate(
+        total_debit=_total_subquery('debit_account', transactions),
+        total_credit=_total_subquery('credit_account', transactions)
+    )
+
+
+def ledger_drift(lock=False):
+    """
+    Lister les comptes dont le solde enregistré diffère des écritures.
+    ``lock`` verrouille les comptes (à utiliser avant de corriger les soldes).
+    """
+    accounts = Account.objects.select_for_update() if lock else None
+    drift = []
+    for account in account_totals(accounts=accounts).order_by('code'):
+        expected = signed_balance(account.account_type, account.total_debit, account.total_credit)
+        if expected != account.balance:
+            drift.append((account, expected))
+    return drift
+
+
+# Regroupements des états financiers par type de compte
+BALANCE_SHEET_GROUPS = (('assets', 'asset'), ('liabilities', 'liability'), ('equity', 'equity'))
+INCOME_STATEMENT_GROUPS = (('revenue', 'revenue'), ('expenses', 'expense'))
+
+
+def _rolled_up_rows(date_from=None, date_to=None):
+    """
+    Totaux débit/crédit de tous les comptes sur la période (une requête),
+    cumulés en mémoire sur l'arborescence ``Account.parent`` : chaque compte
+    porte aussi le total de ses sous-comptes.
+    """
+    rows = {}
+    children = defaultdict(list)
+    for account in account_totals(date_from, date_to).order_by('code'):
+        rows[account.pk] = {
+            'id': account.pk,
+            'code': account.code,
+            'name': account.name,
+            'account_type': account.account_type,
+            'parent': account.parent_id,
+            'debit': account.total_debit,
+            'credit': account.total_credit,
+            'balance': signed_balance(account.account_type, account.total_debit, account.total_credit),
+        }
+        children[account.parent_id].append(account.pk)
+    
+    def roll_up(account_id):
+        row = rows[account_id]
+        debit, credit = row['debit'], row['credit']
+        for child_id in children[account_id]:
+            child_debit, child_credit = roll_up(child_id)
+            debit += child_debit
+            credit += child_credit
+        row['total_debit'] = debit
+        row['total_credit'] = credit
+        row['total_balance'] = signed_balance(row['account_type'], debit, credit)
+        return debit, credit
+    
+    roots = list(children[None])
+    # Comptes dont le parent est hors de la liste : traités comme racines
+    roots += [pk for pk, row in rows.items() if row['parent'] is not None and row['parent'] not in rows]
+    for root_id in roots:
+        roll_up(root_id)
+    return rows
+
+
+def _group(rows, account_type):
+    accounts = [row for row in rows.values() if row['account_type'] == account_type]
+    return {
+        'total': sum((row['balance'] for row in accounts), ZERO),
+        'accounts': [
+            {key: row[key] for key in ('id', 'code', 'name', 'total_balance')}
+            for row in accounts
+            if rows.get(row['parent'], {}).get('account_type') != account_type
+        ]
+    }
+
+
+def trial_balance(date_from=None, date_to=None):
+    """
+    Balance générale, bilan et compte de résultat.
+
+    La balance et le compte de résultat portent sur la période ; le bilan est
+    une situation à ``date_to`` : ses soldes sont cumulés depuis l'origine et
+    ``date_from`` est ignoré.
+    """
+    rows = _rolled_up_rows(date_from, date_to)
+    position_rows = _rolled_up_rows(date_to=date_to) if date_from else rows
+    
+    balance_sheet = {name: _group(position_rows, account_type) for name, account_type in BALANCE_SHEET_GROUPS}
+    income_statement = {name: _group(rows, account_type) for name, account_type in INCOME_STATEMENT_GROUPS}
+    net_income = income_statement['revenue']['total'] - income_statement['expenses']['total']
+    income_statement['net_income'] = net_income
+    
+    total_debit = sum((row['debit'] for row in rows.values()), ZERO)
+    total_credit = sum((row['credit'] for row in rows.values()), ZERO)
+    return {
+        'period': {'date_from': date_from, 'date_to': date_to},
+        'accounts': list(rows.values()),
+        'totals': {
+            'debit': total_debit,
+            'credit': total_credit,
+            'is_balanced': total_debit == total_credit,
+        },
+        'balance_sheet': balance_sheet,
+        'income_statement': income_statement,
+    }
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from finance.ledger import ledger_drift, rebuild_period_balances
+from finance.models import Account
+
+
+class Command(BaseCommand):
+    help = "Recalculer les soldes des comptes à partir des écritures et signaler les écarts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help="Corriger les soldes en écart et recalculer les soldes mensuels")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = ledger_drift(lock=options['fix'])
+            for account, expected in drift:
+                self.stdout.write(
+                    f"{account.code} - {account.name}: solde {account.balance}, "
+                    f"attendu {expected} (écart {account.balance - expected})"
+                )
+                if options['fix']:
+                    Account.objects.filter(pk=account.pk).update(balance=expected)
+            if options['fix']:
+                rebuild_period_balances()
+        
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Aucun écart : les soldes sont cohérents"))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"{len(drift)} solde(s) corrigé(s)"))
+        else:
+            raise CommandError(f"{len(drift)} compte(s) en écart (relancer avec --fix pour corriger)")
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:54
+
+import django.db.models.deletion
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_period_balances(apps, schema_editor):
+    Account = apps.get_model('finance', 'Account')
+    AccountPeriodBalance = apps.get_model('finance', 'AccountPeriodBalance')
+    FinancialTransaction = apps.get_model('finance', 'FinancialTransaction')
+
+    movements = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+    for index, account_field in enumerate(('debit_account', 'credit_account')):
+        rows = FinancialTransaction.objects.annotate(
+            period=TruncMonth('date')
+        ).order_by().values(account_field, 'period').annotate(total=Sum('amount'))
+        for row in rows:
+            movements[(row[account_field], row['period'])][index] += row['total']
+
+    account_types = dict(Account.objects.values_list('pk', 'account_type'))
+    running = defaultdict(lambda: Decimal('0'))
+    balances = []
+    for (account_id, period), (debit, credit) in sorted(movements.items()):
+        if account_types[account_id] in ('asset', 'expense'):
+            delta = debit - credit
+        else:
+            delta = credit - debit
+        opening = running[account_id]
+        running[account_id] = opening + delta
+        balances.append(AccountPeriodBalance(
+            account_id=account_id, period=period, opening_balance=opening,
+            debits=debit, credits=credit, closing_balance=opening + delta,
+        ))
+    AccountPeriodBalance.objects.bulk_create(balances, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountPeriodBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+                ('period', models.DateField(verbose_name='Période (premier jour du mois)')),
+                ('opening_balance', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name="Solde d'ouverture")),
+                ('debits', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Total débits')),
+                ('credits', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Total crédits')),
+                ('closing_balance', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Solde de clôture')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_balances', to='finance.account', verbose_name='Compte')),
+            ],
+            options={
+                'verbose_name': 'Solde mensuel de compte',
+                'verbose_name_plural': 'Soldes mensuels de comptes',
+                'ordering': ['account', '-period'],
+                'unique_together': {('account', 'period')},
+            },
+        ),
+        migrations.RunPython(backfill_period_balances, migrations.RunPython.noop),
+    ]
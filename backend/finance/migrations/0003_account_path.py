@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:55
+
+from django.db import migrations, models
+
+
+def populate_account_paths(apps, schema_editor):
+    """Calculer le chemin matérialisé des comptes existants."""
+    Model = apps.get_model('finance', 'Account')
+    parents = dict(Model.objects.values_list('pk', 'parent_id'))
+    paths = {}
+    
+    def build(pk):
+        if pk not in paths:
+            parent_id = parents[pk]
+            paths[pk] = (build(parent_id) if parent_id else '') + f'{pk}/'
+        return paths[pk]
+    
+    nodes = list(Model.objects.only('pk', 'path'))
+    for node in nodes:
+        node.path = build(node.pk)
+    Model.objects.bulk_update(nodes, ['path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_accountperiodbalance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Chemin'),
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(fields=['path'], name='finance_account_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(populate_account_paths, migrations.RunPython.noop),
+    ]
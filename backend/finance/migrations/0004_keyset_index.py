@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_account_path'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='financialtransaction',
+            index=models.Index(fields=['created_at', 'id'], name='finance_transaction_keyset_idx'),
+        ),
+    ]
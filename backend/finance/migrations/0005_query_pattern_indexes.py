@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_keyset_index'),
+        ('members', '0003_query_pattern_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='financialtransaction',
+            index=models.Index(fields=['date', 'created_at'], name='finance_transaction_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['status', 'application_date'], name='finance_loan_status_idx'),
+        ),
+    ]
@@ -1,10 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
 from decimal import Decimal
-from core.models import TimestampedModel, SoftDeleteModel
+from core.models import TimestampedModel, SoftDeleteModel, TreePathModel
 from members.models import Member
 
-class Account(SoftDeleteModel):
+class Account(SoftDeleteModel, TreePathModel):
     """Comptes comptables"""
     code = models.CharField(max_length=20, unique=True, verbose_name="Code comptable")
     name = models.CharField(max_length=200, verbose_name="Nom du compte")
@@ -23,7 +23,7 @@ class Account(SoftDeleteModel):
     balance = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Solde")
     is_reconcilable = models.BooleanField(default=False, verbose_name="Rapprochable")
     
-    class Meta:
+    class Meta(TreePathModel.Meta):
         verbose_name = "Compte"
         verbose_name_plural = "Comptes"
         ordering = ['code']
@@ -81,10 +81,32 @@ class FinancialTransaction(TimestampedModel):
         verbose_name = "Transaction financière"
         verbose_name_plural = "Transactions financières"
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='finance_transaction_keyset_idx'),
+            models.Index(fields=['date', 'created_at'], name='finance_transaction_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.transaction_number} - {self.description}"
 
+class AccountPeriodBalance(TimestampedModel):
+    """Soldes mensuels d'un compte (ouverture, mouvements, clôture)"""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='period_balances', verbose_name="Compte")
+    period = models.DateField(verbose_name="Période (premier jour du mois)")
+    opening_balance = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Solde d'ouverture")
+    debits = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Total débits")
+    credits = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Total crédits")
+    closing_balance = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Solde de clôture")
+    
+    class Meta:
+        verbose_name = "Solde mensuel de compte"
+        verbose_name_plural = "Soldes mensuels de comptes"
+        unique_together = ['account', 'period']
+        ordering = ['account', '-period']
+    
+    def __str__(self):
+        return f"{self.account.code} - {self.period:%Y-%m}"
+
 class MemberSavings(TimestampedModel):
     """Épargne des membres"""
     member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='savings', verbose_name="Membre")
@@ -190,6 +212,9 @@ class Loan(TimestampedModel):
         verbose_name = "Prêt"
         verbose_name_plural = "Prêts"
         ordering = ['-application_date']
+        indexes = [
+            models.Index(fields=['status', 'application_date'], name='finance_loan_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.loan_number} - {self.member}"
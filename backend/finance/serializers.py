@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import (
-    Account, FinancialTransaction, MemberSavings, Loan,
+    Account, AccountPeriodBalance, FinancialTransaction, MemberSavings, Loan,
     LoanPayment, Budget, BudgetLine
 )
 
@@ -12,10 +12,26 @@ class AccountSerializer(serializers.ModelSerializer):
     class Meta:
         model = Account
         fields = [
-            'id', 'code', 'name', 'account_type', 
-            'balance', 'description', 'is_active', 'created_at', 'updated_at'
+            'id', 'code', 'name', 'account_type', 'parent', 'path',
+            'balance', 'is_reconcilable', 'is_active', 'created_at', 'updated_at'
         ]
-        read_only_fields = ('id', 'balance', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'path', 'balance', 'created_at', 'updated_at')
+    
+    def validate_parent(self, parent):
+        if parent is not None and self.instance is not None and self.instance.is_ancestor_of(parent):
+            raise serializers.ValidationError(self.instance.CYCLE_ERROR)
+        return parent
+
+
+class AccountPeriodBalanceSerializer(serializers.ModelSerializer):
+    """Serializer pour les soldes mensuels des comptes."""
+    
+    class Meta:
+        model = AccountPeriodBalance
+        fields = [
+            'period', 'opening_balance', 'debits', 'credits', 'closing_balance'
+        ]
+        read_only_fields = fields
 
 
 class FinancialTransactionSerializer(serializers.ModelSerializer):
@@ -26,7 +42,7 @@ class FinancialTransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = FinancialTransaction
         fields = [
-            'id', 'reference', 'date', 'debit_account', 'debit_account_name',
+            'id', 'transaction_number', 'date', 'debit_account', 'debit_account_name',
             'credit_account', 'credit_account_name', 'amount', 'description',
             'transaction_type', 'created_by', 'created_at'
         ]
@@ -51,8 +67,9 @@ class MemberSavingsSerializer(serializers.ModelSerializer):
     class Meta:
         model = MemberSavings
         fields = [
-            'id', 'member', 'member_name', 'savings_type', 'balance',
-            'interest_rate', 'minimum_balance', 'created_at', 'updated_at'
+            'id', 'member', 'member_name', 'account_number', 'balance',
+            'interest_rate', 'status', 'opening_date', 'closing_date',
+            'created_at', 'updated_at'
         ]
         read_only_fields = ('id', 'created_at', 'updated_at')
 
@@ -65,7 +82,8 @@ class LoanPaymentSerializer(serializers.ModelSerializer):
         model = LoanPayment
         fields = [
             'id', 'loan', 'loan_number', 'payment_date', 'amount',
-            'payment_method', 'reference', 'notes', 'created_at'
+            'principal_amount', 'interest_amount', 'penalty_amount',
+            'balance_after', 'receipt_number', 'received_by', 'notes', 'created_at'
         ]
         read_only_fields = ('id', 'created_at')
 
@@ -78,19 +96,20 @@ class LoanSerializer(serializers.ModelSerializer):
     class Meta:
         model = Loan
         fields = [
-            'id', 'loan_number', 'member', 'member_name', 'amount',
-            'interest_rate', 'duration_months', 'monthly_payment',
-            'loan_date', 'due_date', 'status', 'purpose',
-            'approved_by', 'approved_date', 'disbursement_date',
-            'outstanding_balance', 'payments', 'created_at', 'updated_at'
+            'id', 'loan_number', 'member', 'member_name', 'principal_amount',
+            'interest_rate', 'total_amount', 'monthly_payment',
+            'application_date', 'due_date', 'status', 'purpose',
+            'approved_by', 'approval_date', 'disbursement_date',
+            'balance_remaining', 'guarantor1', 'guarantor2', 'collateral_description',
+            'notes', 'payments', 'created_at', 'updated_at'
         ]
         read_only_fields = (
-            'id', 'loan_number', 'monthly_payment', 'due_date', 
-            'outstanding_balance', 'created_at', 'updated_at'
+            'id', 'approved_by', 'approval_date', 'disbursement_date',
+            'created_at', 'updated_at'
         )
     
     def validate(self, attrs):
-        amount = attrs.get('amount')
+        amount = attrs.get('principal_amount')
         
         if amount and amount <= 0:
             raise serializers.ValidationError(
@@ -0,0 +1,27 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from core.cache import track_models
+
+from .ledger import post_transaction_change, stored_transaction_state, transaction_state
+from .models import Account, FinancialTransaction, Loan, LoanPayment, MemberSavings
+
+track_models(Account, FinancialTransaction, MemberSavings, Loan, LoanPayment)
+
+
+@receiver(pre_save, sender=FinancialTransaction, dispatch_uid='finance_ledger_pre_save')
+def remember_posted_state(sender, instance, **kwargs):
+    instance._ledger_previous_state = stored_transaction_state(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=FinancialTransaction, dispatch_uid='finance_ledger_post_save')
+def post_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_ledger_previous_state', None)
+    post_transaction_change(previous, transaction_state(instance))
+
+
+@receiver(post_delete, sender=FinancialTransaction, dispatch_uid='finance_ledger_post_delete')
+def post_on_delete(sender, instance, **kwargs):
+    post_transaction_change(transaction_state(instance), None)
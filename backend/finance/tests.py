@@ -1,3 +1,127 @@
+import itertools
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
 
-# Create your tests here.
+from core.testing import QueryPlanAssertionsMixin, requires_postgresql
+from .ledger import ZERO, balance_at, trial_balance
+from .models import Account, AccountPeriodBalance, FinancialTransaction, Loan
+
+
+@requires_postgresql
+class FinanceIndexTests(QueryPlanAssertionsMixin, TestCase):
+    def test_transactions_by_period(self):
+        self.assertUsesIndex(
+            FinancialTransaction.objects.filter(
+                date__gte=date(2024, 1, 1), date__lte=date(2024, 12, 31)
+            ).order_by('-date', '-created_at'),
+            'finance_transaction_date_idx'
+        )
+    
+    def test_loans_by_status(self):
+        self.assertUsesIndex(
+            Loan.objects.filter(status='disbursed'),
+            'finance_loan_status_idx'
+        )
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.assets = Account.objects.create(code='5', name='Trésorerie', account_type='asset')
+        self.cash = Account.objects.create(code='57', name='Caisse', account_type='asset', parent=self.assets)
+        self.bank = Account.objects.create(code='52', name='Banque', account_type='asset', parent=self.assets)
+        self.sales = Account.objects.create(code='70', name='Ventes', account_type='revenue')
+        self.numbers = itertools.count(1)
+    
+    def post(self, amount, day, debit=None, credit=None):
+        return FinancialTransaction.objects.create(
+            transaction_number=f'TR-{next(self.numbers)}', date=day, description='Écriture',
+            transaction_type='income', amount=Decimal(amount),
+            debit_account=debit or self.cash, credit_account=credit or self.sales
+        )
+    
+    def balances(self):
+        return {
+            account.code: account.balance
+            for account in Account.objects.filter(pk__in=[self.cash.pk, self.bank.pk, self.sales.pk])
+        }
+    
+    def test_balances_follow_create_update_and_delete(self):
+        txn = self.post('100', date(2026, 1, 10))
+        self.assertEqual(self.balances(), {'57': Decimal('100'), '52': ZERO, '70': Decimal('100')})
+        
+        txn.amount = Decimal('80')
+        txn.debit_account = self.bank
+        txn.save()
+        self.assertEqual(self.balances(), {'57': ZERO, '52': Decimal('80'), '70': Decimal('80')})
+        
+        txn.delete()
+        self.assertEqual(self.balances(), {'57': ZERO, '52': ZERO, '70': ZERO})
+    
+    def test_balance_at_cutoff_date(self):
+        self.post('100', date(2026, 1, 10))
+        self.post('50', date(2026, 1, 25))
+        self.post('30', date(2026, 3, 5))
+        # Écriture antidatée : décale les soldes des mois suivants
+        self.post('20', date(2025, 12, 31))
+        
+        self.assertEqual(balance_at(self.cash, date(2025, 11, 30)), ZERO)
+        self.assertEqual(balance_at(self.cash, date(2026, 1, 15)), Decimal('120'))
+        self.assertEqual(balance_at(self.cash, date(2026, 2, 28)), Decimal('170'))
+        self.assertEqual(balance_at(self.cash, date(2026, 3, 31)), Decimal('200'))
+        
+        march = AccountPeriodBalance.objects.get(account=self.cash, period=date(2026, 3, 1))
+        self.assertEqual((march.opening_balance, march.closing_balance), (Decimal('170'), Decimal('200')))
+    
+    def test_trial_balance_rolls_up_parent_accounts(self):
+        self.post('100', date(2026, 1, 10))
+        self.post('40', date(2026, 1, 12), debit=self.bank)
+        self.post('999', date(2026, 2, 1))
+        
+        result = trial_balance(date_to=date(2026, 1, 31))
+        rows = {row['code']: row for row in result['accounts']}
+        self.assertEqual(rows['5']['balance'], ZERO)
+        self.assertEqual(rows['5']['total_balance'], Decimal('140'))
+        self.assertEqual(rows['57']['total_balance'], Decimal('100'))
+        self.assertTrue(result['totals']['is_balanced'])
+        self.assertEqual(result['balance_sheet']['assets']['total'], Decimal('140'))
+        self.assertEqual(
+            [row['code'] for row in result['balance_sheet']['assets']['accounts']], ['5']
+        )
+        self.assertEqual(result['income_statement']['net_income'], Decimal('140'))
+    
+    def test_balance_sheet_is_cumulative_to_date_to(self):
+        self.post('100', date(2025, 12, 20))
+        self.post('40', date(2026, 1, 12), debit=self.bank)
+        self.post('999', date(2026, 2, 1))
+        
+        result = trial_balance(date_from=date(2026, 1, 1), date_to=date(2026, 1, 31))
+        # Balance et résultat : la période seule
+        rows = {row['code']: row for row in result['accounts']}
+        self.assertEqual(rows['5']['total_balance'], Decimal('40'))
+        self.assertEqual(result['income_statement']['net_income'], Decimal('40'))
+        # Bilan : situation au 31 janvier, écritures antérieures comprises
+        assets = result['balance_sheet']['assets']
+        self.assertEqual(assets['total'], Decimal('140'))
+        self.assertEqual(assets['accounts'][0]['total_balance'], Decimal('140'))
+    
+    def test_verify_ledger_detects_and_repairs_drift(self):
+        self.post('100', date(2026, 1, 10))
+        call_command('verify_ledger', stdout=StringIO())
+        
+        Account.objects.filter(pk=self.cash.pk).update(balance=Decimal('75'))
+        AccountPeriodBalance.objects.filter(account=self.cash).delete()
+        with self.assertRaises(CommandError):
+            call_command('verify_ledger', stdout=StringIO())
+        
+        output = StringIO()
+        call_command('verify_ledger', fix=True, stdout=output)
+        self.assertIn('57 - Caisse', output.getvalue())
+        self.cash.refresh_from_db()
+        self.assertEqual(self.cash.balance, Decimal('100'))
+        self.assertEqual(balance_at(self.cash, date(2026, 1, 31)), Decimal('100'))
+        call_command('verify_ledger', stdout=StringIO())
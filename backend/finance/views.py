@@ -5,16 +5,22 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Sum, Count, Q, F, Avg
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 
+from core.aggregates import aggregate_metrics, count_if, sum_if
+from core.cache import cached_action
+from core.pagination import KeysetPagination
+
 from .models import (
     Account, FinancialTransaction, MemberSavings, Loan,
     LoanPayment, Budget, BudgetLine
 )
+from .ledger import balance_at, trial_balance
 from .serializers import (
-    AccountSerializer, FinancialTransactionSerializer, MemberSavingsSerializer,
-    LoanSerializer, LoanPaymentSerializer, BudgetSerializer, BudgetLineSerializer
+    AccountSerializer, AccountPeriodBalanceSerializer, FinancialTransactionSerializer,
+    MemberSavingsSerializer, LoanSerializer, LoanPaymentSerializer, BudgetSerializer,
+    BudgetLineSerializer
 )
 
 
@@ -25,26 +31,85 @@ class AccountViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['account_type', 'is_active']
-    search_fields = ['name', 'code', 'description']
+    search_fields = ['name', 'code']
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
     
     @action(detail=True, methods=['get'])
     def balance_history(self, request, pk=None):
-        """Historique du solde du compte."""
+        """Historique du solde du compte (soldes mensuels et écritures récentes)."""
         account = self.get_object()
         
-        # Transactions récentes
-        debit_transactions = FinancialTransaction.objects.filter(debit_account=account).order_by('-date')[:20]
-        credit_transactions = FinancialTransaction.objects.filter(credit_account=account).order_by('-date')[:20]
+        response = {'current_balance': account.balance}
+        
+        # Solde à une date donnée : au plus un mois d'écritures brutes
+        day = request.query_params.get('date')
+        if day:
+            try:
+                response['balance_at'] = {
+                    'date': day,
+                    'balance': balance_at(account, date.fromisoformat(day))
+                }
+            except ValueError:
+                return Response(
+                    {'error': 'Date invalide (format attendu AAAA-MM-JJ)'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        periods = account.period_balances.order_by('-period')[:12]
+        
+        # Écritures récentes (débit et crédit) en une seule requête
+        recent = list(
+            FinancialTransaction.objects.filter(
+                Q(debit_account=account) | Q(credit_account=account)
+            ).select_related('debit_account', 'credit_account').order_by('-date', '-id')[:20]
+        )
         
+        response.update({
+            'periods': AccountPeriodBalanceSerializer(periods, many=True).data,
+            'recent_debits': FinancialTransactionSerializer(
+                [txn for txn in recent if txn.debit_account_id == account.pk], many=True
+            ).data,
+            'recent_credits': FinancialTransactionSerializer(
+                [txn for txn in recent if txn.credit_account_id == account.pk], many=True
+            ).data
+        })
+        return Response(response)
+    
+    @action(detail=True, methods=['get'])
+    def group_balance(self, request, pk=None):
+        """Solde cumulé du compte et de tous ses sous-comptes."""
+        account = self.get_object()
+        totals = account.get_descendants().filter(is_active=True).aggregate(
+            account_count=Count('id'),
+            balance=Sum('balance')
+        )
         return Response({
-            'current_balance': account.balance,
-            'recent_debits': FinancialTransactionSerializer(debit_transactions, many=True).data,
-            'recent_credits': FinancialTransactionSerializer(credit_transactions, many=True).data
+            'account': account.id,
+            'code': account.code,
+            'path': account.path,
+            'account_count': totals['account_count'],
+            'balance': totals['balance'] or Decimal('0.00')
         })
     
     @action(detail=False, methods=['get'])
+    def trial_balance(self, request):
+        """Balance générale et compte de résultat sur la période, bilan à ``date_to``."""
+        try:
+            date_from, date_to = [
+                date.fromisoformat(request.query_params[name]) if request.query_params.get(name) else None
+                for name in ('date_from', 'date_to')
+            ]
+        except ValueError:
+            return Response(
+                {'error': 'Date invalide (format attendu AAAA-MM-JJ)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(trial_balance(date_from, date_to))
+    
+    @action(detail=False, methods=['get'])
+    @cached_action(depends_on=[Account, FinancialTransaction])
     def balance_summary(self, request):
         """Résumé des soldes par type de compte."""
         summary = self.queryset.values('account_type').annotate(
@@ -52,7 +117,7 @@ class AccountViewSet(viewsets.ModelViewSet):
             account_count=Count('id')
         ).order_by('account_type')
         
-        return Response(summary)
+        return Response(list(summary))
 
 
 class FinancialTransactionViewSet(viewsets.ModelViewSet):
@@ -62,9 +127,10 @@ class FinancialTransactionViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['debit_account', 'credit_account', 'created_by', 'transaction_type']
-    search_fields = ['reference', 'description']
+    search_fields = ['transaction_number', 'description']
     ordering_fields = ['date', 'amount']
     ordering = ['-date']
+    pagination_class = KeysetPagination
     
     def perform_create(self, serializer):
         """Créer une transaction avec l'utilisateur actuel."""
@@ -86,18 +152,18 @@ class FinancialTransactionViewSet(viewsets.ModelViewSet):
         cash_accounts = Account.objects.filter(account_type='cash')
         
         inflows = queryset.filter(credit_account__in=cash_accounts).aggregate(
-            total=Sum('amount') or Decimal('0')
-        )
+            total=Sum('amount')
+        )['total'] or Decimal('0')
         
         outflows = queryset.filter(debit_account__in=cash_accounts).aggregate(
-            total=Sum('amount') or Decimal('0')
-        )
+            total=Sum('amount')
+        )['total'] or Decimal('0')
         
-        net_flow = inflows['total'] - outflows['total']
+        net_flow = inflows - outflows
         
         return Response({
-            'inflows': inflows['total'],
-            'outflows': outflows['total'],
+            'inflows': inflows,
+            'outflows': outflows,
             'net_flow': net_flow,
             'period': {
                 'start_date': start_date,
@@ -112,17 +178,17 @@ class MemberSavingsViewSet(viewsets.ModelViewSet):
     serializer_class = MemberSavingsSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['member', 'savings_type']
+    filterset_fields = ['member', 'status']
     ordering_fields = ['created_at', 'balance']
     ordering = ['-created_at']
     
     @action(detail=False, methods=['get'])
     def savings_summary(self, request):
         """Résumé des épargnes."""
-        summary = self.queryset.values('savings_type').annotate(
+        summary = self.queryset.values('status').annotate(
             total_balance=Sum('balance'),
             member_count=Count('member', distinct=True)
-        ).order_by('savings_type')
+        ).order_by('status')
         
         return Response(summary)
     
@@ -146,8 +212,8 @@ class LoanViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'member']
     search_fields = ['loan_number', 'member__user__first_name', 'member__user__last_name']
-    ordering_fields = ['loan_date', 'amount']
-    ordering = ['-loan_date']
+    ordering_fields = ['application_date', 'principal_amount']
+    ordering = ['-application_date']
     
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
@@ -162,7 +228,7 @@ class LoanViewSet(viewsets.ModelViewSet):
         
         loan.status = 'approved'
         loan.approved_by = request.user
-        loan.approved_date = timezone.now()
+        loan.approval_date = timezone.localdate()
         loan.save()
         
         return Response({'message': 'Prêt approuvé avec succès'})
@@ -179,24 +245,23 @@ class LoanViewSet(viewsets.ModelViewSet):
             )
         
         loan.status = 'disbursed'
-        loan.disbursement_date = timezone.now()
+        loan.disbursement_date = timezone.localdate()
         loan.save()
         
         return Response({'message': 'Prêt débloqué avec succès'})
     
     @action(detail=False, methods=['get'])
+    @cached_action(depends_on=[Loan])
     def loan_statistics(self, request):
         """Statistiques des prêts."""
-        stats = {
-            'total_loans': self.queryset.count(),
-            'active_loans': self.queryset.filter(status='disbursed').count(),
-            'total_disbursed': self.queryset.filter(status__in=['disbursed', 'completed']).aggregate(
-                total=Sum('amount')
-            )['total'] or Decimal('0'),
-            'total_outstanding': self.queryset.filter(status='disbursed').aggregate(
-                total=Sum('outstanding_balance')
-            )['total'] or Decimal('0')
-        }
+        disbursed = Q(status='disbursed')
+        stats = aggregate_metrics(
+            self.queryset,
+            total_loans=count_if(),
+            active_loans=count_if(disbursed),
+            total_disbursed=sum_if('principal_amount', Q(status__in=['disbursed', 'completed'])),
+            total_outstanding=sum_if('balance_remaining', disbursed)
+        )
         
         return Response(stats)
 
@@ -207,7 +272,7 @@ class LoanPaymentViewSet(viewsets.ModelViewSet):
     serializer_class = LoanPaymentSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['loan', 'payment_method']
+    filterset_fields = ['loan']
     ordering_fields = ['payment_date', 'amount']
     ordering = ['-payment_date']
 
@@ -0,0 +1,43 @@
+"""
+Recherche d'un produit par SKU ou code-barres pour les caisses.
+
+Les fiches produit déjà scannées sont gardées dans le cache partagé, sous
+l'étiquette du modèle ``Product`` : toute sauvegarde d'un produit, quel que
+soit le processus, invalide les fiches de tous les workers. Le stock n'est
+jamais mis en cache.
+"""
+from django.db.models import F, Q
+
+from core.cache import get_or_set_tagged, model_tag
+
+from .models import Product
+
+LOOKUP_CACHE_TTL = 300  # secondes
+
+LOOKUP_FIELDS = (
+    'id', 'sku', 'barcode', 'name', 'status',
+    'selling_price_member', 'selling_price_non_member',
+)
+
+# Code inconnu mis en cache (``None`` signifie « absent du cache »)
+_NOT_FOUND = False
+
+
+def _fetch(code):
+    rows = list(
+        Product.objects.filter(is_active=True)
+        .filter(Q(sku=code) | Q(barcode=code))
+        .values(*LOOKUP_FIELDS, unit_abbreviation=F('unit__abbreviation'))[:2]
+    )
+    # Le SKU est unique : il l'emporte sur un code-barres identique
+    rows.sort(key=lambda row: row['sku'] != code)
+    return rows[0] if rows else _NOT_FOUND
+
+
+def lookup_product(code):
+    """Fiche produit (prix, unité) correspondant au code, ``None`` si inconnu."""
+    product = get_or_set_tagged(
+        f'inventory:lookup:{code}', [model_tag(Product)],
+        lambda: _fetch(code), timeout=LOOKUP_CACHE_TTL
+    )
+    return product or None
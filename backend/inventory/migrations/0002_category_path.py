@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:55
+
+from django.db import migrations, models
+
+
+def populate_category_paths(apps, schema_editor):
+    """Calculer le chemin matérialisé des catégories existantes."""
+    Model = apps.get_model('inventory', 'Category')
+    parents = dict(Model.objects.values_list('pk', 'parent_id'))
+    paths = {}
+    
+    def build(pk):
+        if pk not in paths:
+            parent_id = parents[pk]
+            paths[pk] = (build(parent_id) if parent_id else '') + f'{pk}/'
+        return paths[pk]
+    
+    nodes = list(Model.objects.only('pk', 'path'))
+    for node in nodes:
+        node.path = build(node.pk)
+    Model.objects.bulk_update(nodes, ['path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Chemin'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='inventory_category_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(populate_category_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_category_path'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='barcode',
+            field=models.CharField(blank=True, db_index=True, max_length=50, verbose_name='Code-barres'),
+        ),
+    ]
@@ -1,16 +1,16 @@
 from django.db import models
 from django.contrib.auth.models import User
 from decimal import Decimal
-from core.models import TimestampedModel, SoftDeleteModel
+from core.models import TimestampedModel, SoftDeleteModel, TreePathModel
 
-class Category(SoftDeleteModel):
+class Category(SoftDeleteModel, TreePathModel):
     """Catégories de produits"""
     name = models.CharField(max_length=100, unique=True, verbose_name="Nom")
     description = models.TextField(blank=True, verbose_name="Description")
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, verbose_name="Catégorie parent")
     code = models.CharField(max_length=20, unique=True, verbose_name="Code")
     
-    class Meta:
+    class Meta(TreePathModel.Meta):
         verbose_name = "Catégorie"
         verbose_name_plural = "Catégories"
     
@@ -48,7 +48,7 @@ class Product(SoftDeleteModel):
     
     # Codes et identification
     sku = models.CharField(max_length=50, unique=True, verbose_name="Code produit (SKU)")
-    barcode = models.CharField(max_length=50, blank=True, verbose_name="Code-barres")
+    barcode = models.CharField(max_length=50, blank=True, db_index=True, verbose_name="Code-barres")
     
     # Unités
     unit = models.ForeignKey(Unit, on_delete=models.PROTECT, verbose_name="Unité de base")
@@ -85,6 +85,10 @@ class Product(SoftDeleteModel):
         verbose_name = "Produit"
         verbose_name_plural = "Produits"
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name'], condition=models.Q(is_active=True), name='inventory_product_active_idx'),
+            models.Index(fields=['updated_at', 'id'], name='inventory_product_sync_idx'),
+        ]
     
     def __str__(self):
         return f"{self.sku} - {self.name}"
@@ -140,6 +144,10 @@ class StockMovement(TimestampedModel):
         verbose_name = "Mouvement de stock"
         verbose_name_plural = "Mouvements de stock"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='inventory_movement_keyset_idx'),
+            models.Index(fields=['product', 'created_at'], name='inventory_movement_product_idx'),
+        ]
     
     def __str__(self):
         return f"{self.product.name} - {self.get_movement_type_display()} - {self.quantity}"
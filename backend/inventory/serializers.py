@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 from .models import Category, Unit, Product, StockMovement, Inventory, InventoryLine
 
@@ -14,9 +16,14 @@ class CategorySerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Category
-        fields = ['id', 'name', 'description', 'parent', 'parent_name', 'code', 
+        fields = ['id', 'name', 'description', 'parent', 'parent_name', 'code', 'path',
                  'is_active', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'path', 'created_at', 'updated_at']
+    
+    def validate_parent(self, parent):
+        if parent is not None and self.instance is not None and self.instance.is_ancestor_of(parent):
+            raise serializers.ValidationError(self.instance.CYCLE_ERROR)
+        return parent
 
 
 class ProductListSerializer(serializers.ModelSerializer):
@@ -78,6 +85,60 @@ class StockMovementSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'user', 'stock_after', 'created_at']
 
 
+class StockAdjustmentLineSerializer(serializers.Serializer):
+    """Ligne d'un ajustement de stock en masse"""
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.DecimalField(max_digits=15, decimal_places=3, min_value=Decimal('0.001'))
+    movement_type = serializers.ChoiceField(
+        choices=StockMovement._meta.get_field('movement_type').choices, default='in'
+    )
+    unit_cost = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0, required=False)
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class BulkStockAdjustmentSerializer(serializers.Serializer):
+    reference_type = serializers.ChoiceField(
+        choices=StockMovement._meta.get_field('reference_type').choices, default='purchase'
+    )
+    reference_number = serializers.CharField(max_length=50, required=False, allow_blank=True, default='')
+    lines = StockAdjustmentLineSerializer(many=True, allow_empty=False, max_length=5000)
+
+
+class InventoryCountBatchSerializer(serializers.Serializer):
+    """
+    Comptages d'un inventaire envoyés en lot.
+    
+    ``counts`` accepte des paires ``[code, quantité]`` ou des objets
+    ``{"code": ..., "physical_quantity": ...}`` ; le code est un SKU ou un
+    code-barres. Pour un même code, le dernier comptage l'emporte.
+    """
+    inventory = serializers.PrimaryKeyRelatedField(queryset=Inventory.objects.all())
+    counts = serializers.ListField(allow_empty=False, max_length=10000)
+    
+    def validate_inventory(self, inventory):
+        if inventory.status != 'in_progress':
+            raise serializers.ValidationError('Inventaire non en cours')
+        return inventory
+    
+    def validate_counts(self, counts):
+        quantity_field = serializers.DecimalField(max_digits=15, decimal_places=3, min_value=0)
+        normalized = {}
+        for index, entry in enumerate(counts):
+            if isinstance(entry, dict):
+                code, quantity = entry.get('code'), entry.get('physical_quantity')
+            elif isinstance(entry, (list, tuple)) and len(entry) == 2:
+                code, quantity = entry
+            else:
+                raise serializers.ValidationError(f'Ligne {index} : format attendu [code, quantité]')
+            if not isinstance(code, (str, int)) or not str(code).strip():
+                raise serializers.ValidationError(f'Ligne {index} : code manquant')
+            try:
+                normalized[str(code).strip()] = quantity_field.run_validation(quantity)
+            except serializers.ValidationError as exc:
+                raise serializers.ValidationError(f'Ligne {index} : {exc.detail[0]}')
+        return normalized
+
+
 class InventoryLineSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_sku = serializers.CharField(source='product.sku', read_only=True)
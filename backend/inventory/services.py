@@ -0,0 +1,314 @@
+"""
+Opérations sur les stocks.
+
+Les variations unitaires passent par ``change_stock`` : un seul ``UPDATE``
+conditionnel (``current_stock = current_stock + delta`` tant que le stock ne
+devient pas négatif), sans lecture préalable ni verrou global. Les mises à
+jour en masse passent par ``bulk_update`` et ``bulk_create``.
+
+Aucune de ces écritures ne déclenche les signaux ``post_save`` de
+``Product``, d'où l'envoi de ``inventory.signals.stock_changed`` pour les
+indicateurs dérivés.
+"""
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import ExpressionWrapper, F, Q, Value
+from django.utils import timezone
+
+from .models import Inventory, InventoryLine, Product, StockMovement
+from .signals import stock_changed
+
+# Types de mouvement qui augmentent le stock (les autres le diminuent)
+STOCK_INCREASE_TYPES = ('in', 'adjustment')
+
+# Nombre de lignes d'inventaire écrites par requête
+INVENTORY_BATCH_SIZE = 1000
+
+
+class StockError(Exception):
+    """Opération de stock impossible."""
+
+
+class InsufficientStock(StockError):
+    def __init__(self, product, requested):
+        self.product = product
+        self.requested = requested
+        super().__init__(f"Stock insuffisant pour {product.name} (demandé : {requested})")
+
+
+def signed_quantity(movement_type, quantity):
+    """Quantité signée d'un mouvement selon son type."""
+    quantity = abs(quantity)
+    return quantity if movement_type in STOCK_INCREASE_TYPES else -quantity
+
+
+def change_stock(product, delta):
+    """
+    Faire varier atomiquement le stock d'un produit et retourner le nouveau stock.
+    
+    Une seule requête ``UPDATE ... WHERE current_stock + delta >= 0 RETURNING``
+    : deux caisses concurrentes ne peuvent ni perdre une mise à jour ni faire
+    passer le stock sous zéro. Lève ``InsufficientStock`` sinon.
+    """
+    table = connection.ops.quote_name(Product._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET current_stock = current_stock + %s, updated_at = %s "
+            f"WHERE id = %s AND current_stock + %s >= 0 "
+            f"RETURNING current_stock, minimum_stock",
+            [delta, timezone.now(), product.pk, delta]
+        )
+        row = cursor.fetchone()
+    if row is None:
+        raise InsufficientStock(product, abs(delta))
+    
+    current_stock, minimum_stock = row
+    product.current_stock = current_stock
+    stock_changed.send(sender=Product, changes=[{
+        'product': product.pk,
+        'minimum_stock': minimum_stock,
+        'previous_stock': current_stock - delta,
+        'current_stock': current_stock,
+    }])
+    return current_stock
+
+
+def record_movement(product, movement_type, quantity, reference_type,
+                    reference_number='', notes='', unit_cost=0, user=None):
+    """Appliquer un mouvement de stock et l'enregistrer dans une même transaction."""
+    delta = signed_quantity(movement_type, quantity)
+    with transaction.atomic():
+        stock_after = change_stock(product, delta)
+        return StockMovement.objects.create(
+            product=product,
+            movement_type=movement_type,
+            quantity=abs(delta),
+            unit_cost=unit_cost,
+            reference_type=reference_type,
+            reference_number=reference_number,
+            notes=notes,
+            user=user,
+            stock_after=stock_after
+        )
+
+
+def bulk_adjust_stock(lines, user=None, reference_type='purchase', reference_number=''):
+    """
+    Appliquer plusieurs ajustements de stock dans une seule transaction.
+    
+    ``lines`` : itérable de dictionnaires ``{'product': pk, 'quantity',
+    'movement_type'}`` (``unit_cost`` et ``notes`` facultatifs). Les produits
+    sont verrouillés en une requête, le stock écrit par un ``bulk_update`` et
+    les mouvements insérés par un ``bulk_create``. Retourne les mouvements créés.
+    """
+    lines = list(lines)
+    product_ids = {line['product'] for line in lines}
+    
+    with transaction.atomic():
+        products = Product.objects.select_for_update().filter(
+            pk__in=product_ids, is_active=True
+        ).order_by('pk').in_bulk()
+        missing = product_ids - set(products)
+        if missing:
+            raise StockError(f"Produits introuvables : {', '.join(map(str, sorted(missing)))}")
+        
+        previous_stock = {pk: product.current_stock for pk, product in products.items()}
+        movements = []
+        for line in lines:
+            product = products[line['product']]
+            delta = signed_quantity(line['movement_type'], line['quantity'])
+            if product.current_stock + delta < 0:
+                raise InsufficientStock(product, abs(delta))
+            product.current_stock += delta
+            movements.append(StockMovement(
+                product=product,
+                movement_type=line['movement_type'],
+                quantity=abs(delta),
+                unit_cost=line.get('unit_cost') or 0,
+                reference_type=reference_type,
+                reference_number=reference_number,
+                notes=line.get('notes', ''),
+                user=user,
+                stock_after=product.current_stock
+            ))
+        
+        # bulk_update ne renseigne pas les champs auto_now
+        now = timezone.now()
+        for product in products.values():
+            product.updated_at = now
+        Product.objects.bulk_update(products.values(), ['current_stock', 'updated_at'])
+        StockMovement.objects.bulk_create(movements)
+        
+        stock_changed.send(sender=Product, changes=[
+            {
+                'product': pk,
+                'minimum_stock': product.minimum_stock,
+                'previous_stock': previous_stock[pk],
+                'current_stock': product.current_stock,
+            }
+            for pk, product in products.items()
+        ])
+    return movements
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def start_inventory(inventory):
+    """
+    Démarrer un inventaire en créant une ligne par produit actif.
+    
+    Le stock théorique est lu par lots (``values_list``) et les lignes
+    insérées par ``bulk_create`` ; ``ignore_conflicts`` s'appuie sur
+    l'unicité (inventaire, produit) pour ne pas dupliquer de ligne existante.
+    Retourne le nombre de produits pris en compte.
+    """
+    with transaction.atomic():
+        inventory = Inventory.objects.select_for_update().get(pk=inventory.pk)
+        if inventory.status != 'planned':
+            raise StockError('Inventaire déjà démarré')
+        
+        products = Product.objects.filter(is_active=True).order_by('pk').values_list('pk', 'current_stock')
+        product_count = 0
+        for batch in _batches(products.iterator(chunk_size=INVENTORY_BATCH_SIZE), INVENTORY_BATCH_SIZE):
+            InventoryLine.objects.bulk_create(
+                [
+                    InventoryLine(inventory=inventory, product_id=product_id, theoretical_quantity=stock)
+                    for product_id, stock in batch
+                ],
+                ignore_conflicts=True
+            )
+            product_count += len(batch)
+        
+        inventory.status = 'in_progress'
+        inventory.save(update_fields=['status', 'updated_at'])
+    return product_count
+
+
+def complete_inventory(inventory, user=None):
+    """
+    Terminer un inventaire et appliquer les écarts comptés au stock.
+    
+    Les écarts non nuls sont lus par lots (pagination par clé sur le produit,
+    mémoire bornée). Pour chaque lot, les produits sont verrouillés, le stock
+    corrigé de l'écart par ``bulk_update`` et les mouvements (``adjustment``
+    pour un surplus, ``out`` pour un manquant, référence ``inventory``)
+    insérés par ``bulk_create``, le tout dans une seule transaction.
+    Retourne le nombre de produits corrigés.
+    """
+    with transaction.atomic():
+        inventory = Inventory.objects.select_for_update().get(pk=inventory.pk)
+        if inventory.status != 'in_progress':
+            raise StockError('Inventaire non en cours')
+        
+        corrections = InventoryLine.objects.filter(
+            inventory=inventory, physical_quantity__isnull=False
+        ).exclude(difference=0).order_by('product_id').values_list('product_id', 'difference')
+        reference_number = f"INV-{inventory.pk}"
+        now = timezone.now()
+        corrected = 0
+        last_product_id = 0
+        
+        while batch := list(corrections.filter(product_id__gt=last_product_id)[:INVENTORY_BATCH_SIZE]):
+            last_product_id = batch[-1][0]
+            products = Product.objects.select_for_update().filter(
+                pk__in=[product_id for product_id, _ in batch]
+            ).order_by('pk').in_bulk()
+            
+            movements = []
+            changes = []
+            for product_id, difference in batch:
+                product = products[product_id]
+                previous_stock = product.current_stock
+                product.current_stock = max(previous_stock + difference, 0)
+                product.updated_at = now
+                delta = product.current_stock - previous_stock
+                if not delta:
+                    continue
+                movements.append(StockMovement(
+                    product=product,
+                    movement_type='adjustment' if delta > 0 else 'out',
+                    quantity=abs(delta),
+                    reference_type='inventory',
+                    reference_number=reference_number,
+                    notes=inventory.name,
+                    user=user,
+                    stock_after=product.current_stock
+                ))
+                changes.append({
+                    'product': product_id,
+                    'minimum_stock': product.minimum_stock,
+                    'previous_stock': previous_stock,
+                    'current_stock': product.current_stock,
+                })
+            
+            Product.objects.bulk_update(
+                [movement.product for movement in movements], ['current_stock', 'updated_at']
+            )
+            StockMovement.objects.bulk_create(movements)
+            stock_changed.send(sender=Product, changes=changes)
+            corrected += len(movements)
+        
+        inventory.status = 'completed'
+        inventory.date_end = now
+        inventory.save(update_fields=['status', 'date_end', 'updated_at'])
+    return corrected
+
+
+def record_counts(inventory, counts, user=None):
+    """
+    Enregistrer en une fois les quantités comptées d'un inventaire.
+    
+    ``counts`` associe un SKU ou un code-barres à la quantité physique. Les
+    codes sont résolus en une requête, les lignes mises à jour par un seul
+    ``bulk_update`` et l'écart calculé en SQL à partir de la quantité
+    théorique. Retourne ``(lignes mises à jour, codes inconnus, codes hors
+    inventaire)``.
+    """
+    codes = list(counts)
+    product_ids = {}
+    for product_id, sku, barcode in Product.objects.filter(
+        Q(sku__in=codes) | Q(barcode__in=codes)
+    ).values_list('pk', 'sku', 'barcode'):
+        product_ids[sku] = product_id
+        if barcode:
+            # Le SKU reste prioritaire si un code-barres lui est identique
+            product_ids.setdefault(barcode, product_id)
+    
+    quantities = {}
+    unknown = []
+    for code, quantity in counts.items():
+        if code in product_ids:
+            quantities[product_ids[code]] = quantity
+        else:
+            unknown.append(code)
+    
+    line_ids = dict(
+        InventoryLine.objects.filter(
+            inventory=inventory, product_id__in=quantities
+        ).values_list('product_id', 'pk')
+    )
+    codes_by_product = {product_ids[code]: code for code in codes if code in product_ids}
+    missing = [codes_by_product[product_id] for product_id in quantities if product_id not in line_ids]
+    
+    now = timezone.now()
+    quantity_field = InventoryLine._meta.get_field('physical_quantity')
+    lines = []
+    for product_id, line_id in line_ids.items():
+        quantity = Value(quantities[product_id], output_field=quantity_field)
+        lines.append(InventoryLine(
+            pk=line_id,
+            physical_quantity=quantities[product_id],
+            difference=ExpressionWrapper(quantity - F('theoretical_quantity'), output_field=quantity_field),
+            counted_by=user,
+            updated_at=now
+        ))
+    InventoryLine.objects.bulk_update(
+        lines, ['physical_quantity', 'difference', 'counted_by', 'updated_at'],
+        batch_size=INVENTORY_BATCH_SIZE
+    )
+    return len(lines), unknown, missing
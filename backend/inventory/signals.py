@@ -0,0 +1,23 @@
+from django.dispatch import Signal
+
+from core.cache import invalidate_tags, track_models
+
+from .models import Category, Inventory, Product, StockMovement
+
+# Envoyé après une mise à jour de stock qui ne passe pas par ``Product.save()``
+# (mises à jour en masse). ``changes`` : liste de dictionnaires
+# ``{'product': pk, 'minimum_stock', 'previous_stock', 'current_stock'}``.
+stock_changed = Signal()
+
+# Étiquette de cache des niveaux de stock, distincte de celle de ``Product``
+# pour que les ventes n'invalident pas les fiches produit (scan en caisse)
+STOCK_TAG = 'inventory.stock'
+
+track_models(Category, Product, StockMovement, Inventory)
+
+
+def invalidate_stock_cache(sender, **kwargs):
+    invalidate_tags(STOCK_TAG)
+
+
+stock_changed.connect(invalidate_stock_cache, dispatch_uid='inventory_cache_stock_changed')
@@ -1,3 +1,304 @@
-from django.test import TestCase
+import gzip
+import json
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.testing import FAKE_REDIS_CACHES, QueryPlanAssertionsMixin, requires_postgresql
+from .models import Category, Inventory, InventoryLine, Product, StockMovement, Unit
+from .services import (
+    InsufficientStock, StockError, change_stock, complete_inventory, record_movement, start_inventory
+)
+
+
+@requires_postgresql
+class InventoryIndexTests(QueryPlanAssertionsMixin, TestCase):
+    def test_active_product_list(self):
+        self.assertUsesIndex(
+            Product.objects.filter(is_active=True).order_by('name')[:20],
+            'inventory_product_active_idx'
+        )
+    
+    def test_product_movement_history(self):
+        self.assertUsesIndex(
+            StockMovement.objects.filter(product_id=1).order_by('-created_at')[:20],
+            'inventory_movement_product_idx'
+        )
+
+
+@override_settings(CACHES=FAKE_REDIS_CACHES)
+class ProductStatisticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('magasinier'))
+        unit = Unit.objects.create(name='Sac', abbreviation='sac', unit_type='unit')
+        category = Category.objects.create(name='Engrais')
+        for sku, stock, minimum, status in [
+            ('NPK', 10, 2, 'active'), ('UREE', 1, 5, 'active'), ('KCL', 0, 1, 'inactive')
+        ]:
+            Product.objects.create(
+                name=sku, sku=sku, category=category, unit=unit, status=status,
+                current_stock=stock, minimum_stock=minimum, cost_price=1000,
+                selling_price_member=1100, selling_price_non_member=1200
+            )
+    
+    def test_statistics_in_one_aggregate(self):
+        # Un agrégat pour les indicateurs, un regroupement par catégorie
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('inventory:product-statistics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_products'], 3)
+        self.assertEqual(response.data['active_products'], 2)
+        self.assertEqual(response.data['low_stock_products'], 2)
+        self.assertEqual(response.data['out_of_stock_products'], 1)
+        self.assertEqual(response.data['total_stock_value'], Decimal('11000'))
+        self.assertEqual(response.data['products_by_category'], [{'category__name': 'Engrais', 'count': 3}])
+
+
+class CategoryTreeTests(TestCase):
+    def setUp(self):
+        self.root = Category.objects.create(name='Intrants', code='INT')
+        self.child = Category.objects.create(name='Engrais', code='ENG', parent=self.root)
+        self.leaf = Category.objects.create(name='Engrais azotés', code='AZO', parent=self.child)
+        self.other = Category.objects.create(name='Semences', code='SEM')
+    
+    def test_moving_a_node_rewrites_descendant_paths(self):
+        self.child.parent = self.other
+        self.child.save()
+        
+        self.leaf.refresh_from_db()
+        self.assertEqual(self.leaf.path, f'{self.other.pk}/{self.child.pk}/{self.leaf.pk}/')
+        self.assertEqual(
+            set(self.other.get_descendants()), {self.other, self.child, self.leaf}
+        )
+    
+    def test_save_rejects_parent_among_descendants(self):
+        # Instance périmée : le contrôle relit les chemins en base
+        root = Category.objects.get(pk=self.root.pk)
+        root.parent_id = self.leaf.pk
+        with self.assertRaises(ValidationError):
+            root.save()
+        
+        root.refresh_from_db()
+        self.assertIsNone(root.parent_id)
+        self.assertEqual(root.path, f'{root.pk}/')
+    
+    def test_api_rejects_parent_among_descendants(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('magasinier'))
+        url = reverse('inventory:category-detail', args=[self.root.pk])
+        
+        for parent in (self.leaf, self.root):
+            response = client.patch(url, {'parent': parent.pk}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('parent', response.data)
+
+
+class StockTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('magasinier')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.unit = Unit.objects.create(name='Sac', abbreviation='sac', unit_type='unit')
+        self.category = Category.objects.create(name='Engrais', code='ENG')
+    
+    def product(self, sku, stock, barcode=''):
+        return Product.objects.create(
+            name=sku, sku=sku, barcode=barcode, category=self.category, unit=self.unit,
+            current_stock=stock, cost_price=1000, selling_price_member=1100, selling_price_non_member=1200
+        )
+    
+    def stock(self, product):
+        product.refresh_from_db()
+        return product.current_stock
+
+
+class BulkStockAdjustmentTests(StockTestCase):
+    def setUp(self):
+        super().setUp()
+        self.npk = self.product('NPK', 10)
+        self.uree = self.product('UREE', 2)
+        self.url = reverse('inventory:product-bulk-adjust')
+    
+    def test_lines_are_applied_in_one_transaction(self):
+        response = self.client.post(self.url, {
+            'reference_number': 'BL-42',
+            'lines': [
+                {'product': self.npk.pk, 'quantity': '5'},
+                {'product': self.uree.pk, 'quantity': '2', 'movement_type': 'out'},
+                {'product': self.npk.pk, 'quantity': '1', 'movement_type': 'out'},
+            ]
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['movements_created'], 3)
+        self.assertEqual((self.stock(self.npk), self.stock(self.uree)), (Decimal('14'), Decimal('0')))
+        self.assertEqual(
+            list(StockMovement.objects.filter(product=self.npk).order_by('pk').values_list('stock_after', flat=True)),
+            [Decimal('15'), Decimal('14')]
+        )
+        self.assertTrue(all(
+            movement.reference_number == 'BL-42' and movement.user == self.user
+            for movement in StockMovement.objects.all()
+        ))
+    
+    def test_any_failing_line_rolls_back_every_line(self):
+        for lines in (
+            [{'product': self.npk.pk, 'quantity': '5'}, {'product': self.uree.pk, 'quantity': '3', 'movement_type': 'out'}],
+            [{'product': self.npk.pk, 'quantity': '5'}, {'product': 999999, 'quantity': '1'}],
+        ):
+            response = self.client.post(self.url, lines, format='json')
+            self.assertEqual(response.status_code, 400)
+        
+        self.assertEqual((self.stock(self.npk), self.stock(self.uree)), (Decimal('10'), Decimal('2')))
+        self.assertFalse(StockMovement.objects.exists())
+
+
+class ChangeStockTests(StockTestCase):
+    def setUp(self):
+        super().setUp()
+        self.npk = self.product('NPK', 3)
+    
+    def test_decrement_never_goes_below_zero(self):
+        self.assertEqual(change_stock(self.npk, Decimal('-3')), Decimal('0'))
+        with self.assertRaises(InsufficientStock):
+            change_stock(self.npk, Decimal('-1'))
+        self.assertEqual(self.stock(self.npk), Decimal('0'))
+    
+    def test_refused_movement_is_not_recorded(self):
+        response = self.client.post(
+            reverse('inventory:product-adjust-stock', args=[self.npk.pk]),
+            {'movement_type': 'out', 'quantity': '4'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stock(self.npk), Decimal('3'))
+        self.assertFalse(StockMovement.objects.exists())
+
+
+class StockTakeTests(StockTestCase):
+    def setUp(self):
+        super().setUp()
+        self.npk = self.product('NPK', 10, barcode='3001')
+        self.uree = self.product('UREE', 4)
+        Product.objects.create(
+            name='KCL', sku='KCL', category=self.category, unit=self.unit, current_stock=7,
+            is_active=False, cost_price=1000, selling_price_member=1100, selling_price_non_member=1200
+        )
+        self.inventory = Inventory.objects.create(name='Inventaire annuel', date_start=timezone.now())
+    
+    def start(self):
+        return self.client.post(reverse('inventory:inventory-start-inventory', args=[self.inventory.pk]))
+    
+    def test_start_creates_one_line_per_active_product(self):
+        response = self.start()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['product_count'], 2)
+        self.assertEqual(
+            dict(self.inventory.lines.values_list('product__sku', 'theoretical_quantity')),
+            {'NPK': Decimal('10'), 'UREE': Decimal('4')}
+        )
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.status, 'in_progress')
+        
+        self.assertEqual(self.start().status_code, 400)
+        self.assertEqual(self.inventory.lines.count(), 2)
+    
+    def post_counts(self, counts, compress=False):
+        body = json.dumps({'inventory': self.inventory.pk, 'counts': counts}).encode()
+        headers = {}
+        if compress:
+            body = gzip.compress(body)
+            headers['HTTP_CONTENT_ENCODING'] = 'gzip'
+        return self.client.generic(
+            'POST', reverse('inventory:inventoryline-batch-count'), body,
+            content_type='application/json', **headers
+        )
+    
+    def test_batch_count_accepts_gzip_body(self):
+        self.start()
+        # Produit créé après le démarrage : pas de ligne dans l'inventaire
+        self.product('MIL', 0)
+        
+        response = self.post_counts(
+            [['3001', '12'], {'code': 'UREE', 'physical_quantity': 3}, ['INCONNU', 1], ['MIL', 5]],
+            compress=True
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated_lines'], 2)
+        self.assertEqual(response.data['unknown_codes'], ['INCONNU'])
+        self.assertEqual(response.data['not_in_inventory'], ['MIL'])
+        self.assertEqual(
+            dict(self.inventory.lines.values_list('product__sku', 'difference')),
+            {'NPK': Decimal('2'), 'UREE': Decimal('-1')}
+        )
+        self.assertTrue(all(line.counted_by == self.user for line in self.inventory.lines.all()))
+        
+        # Corps non compressé : même traitement
+        self.assertEqual(self.post_counts([['NPK', '10']]).data['updated_lines'], 1)
+    
+    def test_batch_count_rejects_invalid_bodies(self):
+        self.assertEqual(self.post_counts([['NPK', 1]]).status_code, 400)
+        self.start()
+        self.assertEqual(self.post_counts([['NPK', -1]]).status_code, 400)
+        
+        response = self.client.generic(
+            'POST', reverse('inventory:inventoryline-batch-count'), b'pas du gzip',
+            content_type='application/json', HTTP_CONTENT_ENCODING='gzip'
+        )
+        self.assertEqual(response.status_code, 400)
+        
+        with mock.patch('core.parsers.MAX_DECOMPRESSED_SIZE', 16):
+            self.assertEqual(self.post_counts([['NPK', 1]], compress=True).status_code, 400)
+
+
+@mock.patch('inventory.services.INVENTORY_BATCH_SIZE', 2)
+class InventoryCompletionTests(StockTestCase):
+    def setUp(self):
+        super().setUp()
+        # SKU -> (stock théorique, quantité comptée)
+        self.counts = {
+            'A': (10, 12), 'B': (5, 5), 'C': (8, 3), 'D': (4, None), 'E': (1, 0), 'F': (6, 9),
+        }
+        self.products = {sku: self.product(sku, stock) for sku, (stock, _) in self.counts.items()}
+        self.inventory = Inventory.objects.create(name='Inventaire annuel', date_start=timezone.now())
+        start_inventory(self.inventory)
+        for sku, (_, counted) in self.counts.items():
+            if counted is not None:
+                InventoryLine.objects.filter(inventory=self.inventory, product__sku=sku).update(
+                    physical_quantity=counted, difference=counted - self.counts[sku][0]
+                )
+    
+    def test_counted_quantities_are_posted_across_batches(self):
+        # Vente entre le comptage et la clôture : l'écart ferait passer C sous zéro
+        record_movement(self.products['C'], 'out', 6, 'sale')
+        
+        self.assertEqual(complete_inventory(self.inventory, user=self.user), 4)
+        
+        stocks = {sku: self.stock(product) for sku, product in self.products.items()}
+        self.assertEqual(stocks, {
+            'A': Decimal('12'), 'B': Decimal('5'), 'C': Decimal('0'),
+            'D': Decimal('4'), 'E': Decimal('0'), 'F': Decimal('9'),
+        })
+        movements = StockMovement.objects.filter(reference_type='inventory')
+        self.assertEqual(
+            {(movement.product.sku, movement.movement_type, movement.quantity) for movement in movements},
+            {('A', 'adjustment', Decimal('2')), ('C', 'out', Decimal('2')),
+             ('E', 'out', Decimal('1')), ('F', 'adjustment', Decimal('3'))}
+        )
+        self.assertTrue(all(
+            movement.reference_number == f'INV-{self.inventory.pk}' and movement.user == self.user
+            for movement in movements
+        ))
+        
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.status, 'completed')
+        self.assertIsNotNone(self.inventory.date_end)
+        with self.assertRaises(StockError):
+            complete_inventory(self.inventory)
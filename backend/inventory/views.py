@@ -1,20 +1,34 @@
+from decimal import Decimal, InvalidOperation
+
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Sum, Count, Q, F
-from django.db import models
+from core.aggregates import aggregate_metrics, count_if, sum_if
+from core.cache import cached_action
+from core.mixins import ConditionalGetMixin, SoftDeleteMixin
+from core.pagination import EstimatedCountPagination
+from core.parsers import GzipJSONParser
+from core.search import TrigramSearchFilter
 from .models import (
     Category, Unit, Product, StockMovement, Inventory, InventoryLine
 )
 from .serializers import (
     CategorySerializer, UnitSerializer, ProductListSerializer, ProductDetailSerializer,
-    ProductCreateSerializer, StockMovementSerializer, InventorySerializer, InventoryLineSerializer
+    ProductCreateSerializer, StockMovementSerializer, InventorySerializer, InventoryLineSerializer,
+    BulkStockAdjustmentSerializer, InventoryCountBatchSerializer
+)
+from .lookup import lookup_product
+from .signals import STOCK_TAG
+from .services import (
+    InsufficientStock, StockError, bulk_adjust_stock, complete_inventory, record_movement,
+    record_counts, start_inventory
 )
 
 
 class CategoryViewSet(viewsets.ModelViewSet):
-    queryset = Category.objects.filter(is_active=True)
+    queryset = Category.objects.filter(is_active=True).select_related('parent')
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -22,6 +36,25 @@ class CategoryViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'description', 'code']
     ordering = ['name']
 
+    @action(detail=True, methods=['get'])
+    def stock_value(self, request, pk=None):
+        """Valeur du stock de la catégorie et de toutes ses sous-catégories"""
+        category = self.get_object()
+        totals = Product.objects.filter(
+            is_active=True, category__path__startswith=category.path
+        ).aggregate(
+            product_count=Count('id'),
+            total_stock=Sum('current_stock'),
+            total_stock_value=Sum(F('current_stock') * F('cost_price'))
+        )
+        return Response({
+            'category': category.id,
+            'path': category.path,
+            'product_count': totals['product_count'],
+            'total_stock': totals['total_stock'] or 0,
+            'total_stock_value': totals['total_stock_value'] or 0
+        })
+
 
 class UnitViewSet(viewsets.ModelViewSet):
     queryset = Unit.objects.all()
@@ -33,14 +66,15 @@ class UnitViewSet(viewsets.ModelViewSet):
     ordering = ['name']
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(SoftDeleteMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Product.objects.filter(is_active=True).select_related('category', 'unit')
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, TrigramSearchFilter]
     filterset_fields = ['category', 'status']
     search_fields = ['name', 'sku', 'barcode']
     ordering_fields = ['name', 'sku', 'current_stock', 'created_at']
     ordering = ['name']
+    conditional_fields = ('updated_at', 'category__updated_at', 'unit__updated_at')
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -60,71 +94,101 @@ class ProductViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    def lookup(self, request):
+        """Produit correspondant à un SKU ou un code-barres (scan en caisse)"""
+        code = request.query_params.get('code', '').strip()
+        if not code:
+            return Response({'error': 'Paramètre code requis'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        product = lookup_product(code)
+        if product is None:
+            return Response({'error': 'Produit introuvable'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(product)
+
+    @action(detail=False, methods=['get'])
+    @cached_action(depends_on=[Product, Category, STOCK_TAG])
     def statistics(self, request):
         """Statistiques des stocks"""
-        stats = {
-            'total_products': self.queryset.count(),
-            'active_products': self.queryset.filter(status='active').count(),
-            'low_stock_products': self.queryset.filter(current_stock__lte=F('minimum_stock')).count(),
-            'out_of_stock_products': self.queryset.filter(current_stock=0).count(),
-            'total_stock_value': self.queryset.aggregate(
-                total=Sum(models.F('current_stock') * models.F('cost_price'))
-            )['total'] or 0,
+        stats = aggregate_metrics(
+            self.queryset,
+            total_products=count_if(),
+            active_products=count_if(Q(status='active')),
+            low_stock_products=count_if(Q(current_stock__lte=F('minimum_stock'))),
+            out_of_stock_products=count_if(Q(current_stock=0)),
+            total_stock_value=sum_if(F('current_stock') * F('cost_price'))
+        )
+        stats.update({
             'products_by_category': list(
                 self.queryset.values('category__name')
                 .annotate(count=Count('id'))
                 .order_by('category__name')
             )
-        }
+        })
         return Response(stats)
 
     @action(detail=True, methods=['post'])
     def adjust_stock(self, request, pk=None):
         """Ajuster le stock d'un produit"""
         product = self.get_object()
-        quantity = request.data.get('quantity', 0)
         movement_type = request.data.get('movement_type', 'adjustment')
-        notes = request.data.get('notes', '')
         
         try:
-            quantity = float(quantity)
-        except (ValueError, TypeError):
+            quantity = Decimal(str(request.data.get('quantity', 0)))
+        except InvalidOperation:
             return Response({'error': 'Quantité invalide'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Créer le mouvement de stock
-        movement_data = {
+        # Valider le mouvement avant de toucher au stock
+        movement_serializer = StockMovementSerializer(data={
             'product': product.id,
             'movement_type': movement_type,
             'quantity': abs(quantity),
-            'reference_type': 'adjustment',
-            'notes': notes,
-            'user': request.user.id
-        }
+            'reference_type': request.data.get('reference_type', 'inventory'),
+            'reference_number': request.data.get('reference_number', ''),
+            'notes': request.data.get('notes', '')
+        })
+        movement_serializer.is_valid(raise_exception=True)
+        data = movement_serializer.validated_data
+        
+        try:
+            movement = record_movement(
+                product, data['movement_type'], data['quantity'], data['reference_type'],
+                reference_number=data.get('reference_number', ''),
+                notes=data.get('notes', ''),
+                user=request.user
+            )
+        except InsufficientStock:
+            return Response({'error': 'Stock insuffisant'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'message': 'Stock ajusté avec succès',
+            'new_stock': movement.stock_after,
+            'movement': StockMovementSerializer(movement).data
+        })
+
+    @action(detail=False, methods=['post'])
+    def bulk_adjust(self, request):
+        """Ajuster le stock de plusieurs produits en une transaction (réception fournisseur)"""
+        data = request.data
+        if isinstance(data, list):
+            data = {'lines': data}
+        serializer = BulkStockAdjustmentSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
         
-        movement_serializer = StockMovementSerializer(data=movement_data)
-        if movement_serializer.is_valid():
-            # Calculer le nouveau stock
-            if movement_type in ['in', 'adjustment']:
-                new_stock = product.current_stock + abs(quantity)
-            else:
-                new_stock = product.current_stock - abs(quantity)
-                if new_stock < 0:
-                    return Response({'error': 'Stock insuffisant'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Mettre à jour le stock du produit
-            product.current_stock = new_stock
-            product.save()
-            
-            # Sauvegarder le mouvement avec le nouveau stock
-            movement = movement_serializer.save(stock_after=new_stock)
-            
-            return Response({
-                'message': 'Stock ajusté avec succès',
-                'new_stock': new_stock,
-                'movement': StockMovementSerializer(movement).data
-            })
+        try:
+            movements = bulk_adjust_stock(
+                serializer.validated_data['lines'],
+                user=request.user,
+                reference_type=serializer.validated_data['reference_type'],
+                reference_number=serializer.validated_data['reference_number']
+            )
+        except StockError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response(movement_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'message': 'Stock ajusté avec succès',
+            'movements_created': len(movements),
+            'stock': {movement.product_id: movement.stock_after for movement in movements}
+        })
 
 
 class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
@@ -135,6 +199,7 @@ class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['product', 'movement_type', 'reference_type']
     ordering = ['-created_at']
+    pagination_class = EstimatedCountPagination
 
     @action(detail=False, methods=['get'])
     def recent_movements(self, request):
@@ -152,6 +217,13 @@ class InventoryViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status']
     ordering = ['-date_start']
 
+    def get_queryset(self):
+        """Lignes préchargées pour l'affichage seulement, pas pour les actions par lots."""
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related('lines__product', 'lines__counted_by')
+        return queryset
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
@@ -159,38 +231,23 @@ class InventoryViewSet(viewsets.ModelViewSet):
     def start_inventory(self, request, pk=None):
         """Démarrer un inventaire"""
         inventory = self.get_object()
-        if inventory.status != 'planned':
-            return Response({'error': 'Inventaire déjà démarré'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Créer les lignes d'inventaire pour tous les produits actifs
-        products = Product.objects.filter(is_active=True)
-        for product in products:
-            InventoryLine.objects.get_or_create(
-                inventory=inventory,
-                product=product,
-                defaults={
-                    'theoretical_quantity': product.current_stock
-                }
-            )
-        
-        inventory.status = 'in_progress'
-        inventory.save()
+        try:
+            product_count = start_inventory(inventory)
+        except StockError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response({'message': 'Inventaire démarré avec succès'})
+        return Response({'message': 'Inventaire démarré avec succès', 'product_count': product_count})
 
     @action(detail=True, methods=['post'])
     def complete_inventory(self, request, pk=None):
         """Terminer un inventaire"""
         inventory = self.get_object()
-        if inventory.status != 'in_progress':
-            return Response({'error': 'Inventaire non en cours'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        from django.utils import timezone
-        inventory.status = 'completed'
-        inventory.date_end = timezone.now()
-        inventory.save()
+        try:
+            corrected = complete_inventory(inventory, user=request.user)
+        except StockError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response({'message': 'Inventaire terminé avec succès'})
+        return Response({'message': 'Inventaire terminé avec succès', 'corrected_products': corrected})
 
 
 class InventoryLineViewSet(viewsets.ModelViewSet):
@@ -204,5 +261,23 @@ class InventoryLineViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         serializer.save(counted_by=self.request.user)
 
+    @action(detail=False, methods=['post'], parser_classes=[GzipJSONParser])
+    def batch_count(self, request):
+        """Enregistrer un lot de comptages (terminaux mobiles, corps gzip accepté)"""
+        serializer = InventoryCountBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        updated, unknown, missing = record_counts(
+            serializer.validated_data['inventory'],
+            serializer.validated_data['counts'],
+            user=request.user
+        )
+        return Response({
+            'message': 'Comptages enregistrés',
+            'updated_lines': updated,
+            'unknown_codes': unknown,
+            'not_in_inventory': missing
+        })
+
 
 
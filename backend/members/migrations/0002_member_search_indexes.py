@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from core.search import create_trigram_indexes, drop_trigram_indexes
+
+SEARCH_INDEXES = {
+    'members_member': ['membership_number'],
+    'auth_user': ['first_name', 'last_name', 'email'],
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    for table, columns in SEARCH_INDEXES.items():
+        create_trigram_indexes(schema_editor, table, columns)
+
+
+def drop_search_indexes(apps, schema_editor):
+    for table, columns in SEARCH_INDEXES.items():
+        drop_trigram_indexes(schema_editor, table, columns)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_search_extensions'),
+        ('members', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
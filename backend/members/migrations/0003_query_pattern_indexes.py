@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_keyset_index'),
+        ('members', '0002_member_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['status'], name='members_active_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='members_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membershipfee',
+            index=models.Index(fields=['member', 'period_year', 'period_month'], name='members_fee_member_period_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:43
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0004_sync_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='membershipfee',
+            name='members_fee_member_period_idx',
+        ),
+    ]
@@ -67,6 +67,15 @@ class Member(SoftDeleteModel):
         verbose_name = "Membre"
         verbose_name_plural = "Membres"
         ordering = ['membership_number']
+        indexes = [
+            # Les listes et statistiques ne portent que sur les membres actifs
+            models.Index(fields=['status'], condition=models.Q(is_active=True),
+                         name='members_active_status_idx'),
+            models.Index(fields=['-created_at'], condition=models.Q(is_active=True),
+                         name='members_active_created_idx'),
+            # Synchronisation incrémentale (api.sync)
+            models.Index(fields=['updated_at', 'id'], name='members_member_sync_idx'),
+        ]
     
     def __str__(self):
         return f"{self.membership_number} - {self.user.get_full_name()}"
@@ -0,0 +1,26 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.cache import track_models
+
+from .models import FamilyMember, Member, MembershipFee, MembershipType
+
+track_models(MembershipType, Member, MembershipFee, FamilyMember)
+
+# Champs de l'utilisateur affichés avec le membre (nom, e-mail)
+MEMBER_USER_FIELDS = {'first_name', 'last_name', 'email'}
+
+
+@receiver(post_save, sender=User, dispatch_uid='members_touch_on_user_save')
+def touch_member_on_user_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Dater la fiche du membre à la modification de son utilisateur.
+
+    ``User`` n'a pas de date de modification : sans cela, l'ETag de la liste
+    des membres et la synchronisation ignoreraient un changement de nom.
+    """
+    if raw or (update_fields is not None and not MEMBER_USER_FIELDS & set(update_fields)):
+        return
+    Member.objects.filter(user=instance).update(updated_at=timezone.now())
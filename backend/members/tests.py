@@ -1,3 +1,110 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import Address, Contact
+from core.testing import QueryPlanAssertionsMixin, requires_postgresql
+from .models import FamilyMember, Member, MembershipFee, MembershipType
+
+
+@requires_postgresql
+class MemberIndexTests(QueryPlanAssertionsMixin, TestCase):
+    def test_active_members_by_status(self):
+        self.assertUsesIndex(
+            Member.objects.filter(is_active=True, status='active'),
+            'members_active_status_idx'
+        )
+    
+    def test_active_member_list(self):
+        self.assertUsesIndex(
+            Member.objects.filter(is_active=True).order_by('-created_at')[:20],
+            'members_active_created_idx'
+        )
+    
+    def test_member_fee_history(self):
+        # L'index de unique_together (member, period_month, period_year) suffit
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, MembershipFee._meta.db_table)
+        unique_index = next(
+            name for name, constraint in constraints.items()
+            if constraint['unique'] and constraint['columns'] == ['member_id', 'period_month', 'period_year']
+        )
+        self.assertUsesIndex(
+            MembershipFee.objects.filter(member_id=1).order_by('-period_year', '-period_month'),
+            unique_index
+        )
+
 
-# Create your tests here.
+class MemberConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('secretaire'))
+        self.user = User.objects.create_user('awa', first_name='Awa', last_name='Diop')
+        self.member = Member.objects.create(
+            user=self.user, membership_number='M-1', birth_date=date(1990, 1, 1), gender='F',
+            membership_type=MembershipType.objects.create(name='Standard', description='', monthly_fee=1000),
+            id_number='CNI-1', profession='Maraîchère', join_date=date(2020, 1, 1),
+            address=Address.objects.create(street='Rue 1', city='Thiès', region='Thiès'),
+            contact=Contact.objects.create(phone_primary='0700000000'),
+            emergency_contact_name='Moussa Diop', emergency_contact_phone='0700000001',
+            emergency_contact_relation='Frère'
+        )
+        self.url = reverse('members:member-list')
+    
+    def test_user_rename_changes_member_list_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        
+        # Connexion : rien d'affiché ne change
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        self.user.last_name = 'Ndiaye'
+        self.user.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['user_name'], 'Awa Ndiaye')
+    
+    def test_nested_changes_refresh_member_detail(self):
+        url = reverse('members:member-detail', args=[self.member.pk])
+        response = self.client.get(url)
+        # Cotisations et famille imbriquées : suppressions invisibles pour Last-Modified
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        def changes(etag):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            return response['ETag']
+        
+        fee = MembershipFee.objects.create(
+            member=self.member, amount=1000, period_month=1, period_year=2026,
+            payment_date=date(2026, 1, 5), payment_method='cash', receipt_number='R-1'
+        )
+        etag = changes(etag)
+        relative = FamilyMember.objects.create(member=self.member, name='Fatou Diop', relationship='child')
+        etag = changes(etag)
+        
+        self.member.address.city = 'Dakar'
+        self.member.address.save()
+        etag = changes(etag)
+        self.member.contact.email = 'awa@example.com'
+        self.member.contact.save()
+        etag = changes(etag)
+        
+        # Suppressions d'objets imbriqués, y compris le plus ancien
+        fee.delete()
+        etag = changes(etag)
+        relative.delete()
+        changes(etag)
+    
+    def test_list_has_no_last_modified(self):
+        response = self.client.get(self.url)
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
@@ -2,7 +2,12 @@ from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Count
+from core.aggregates import aggregate_metrics, count_if
+from core.cache import cached_action
+from core.mixins import ConditionalGetMixin, SoftDeleteMixin
+from core.search import TrigramSearchFilter
+from django.db.models import Sum, Count, Q
+from django.utils import timezone
 from .models import MembershipType, Member, MembershipFee, FamilyMember
 from .serializers import (
     MembershipTypeSerializer, MemberListSerializer, MemberDetailSerializer, 
@@ -19,14 +24,20 @@ class MembershipTypeViewSet(viewsets.ModelViewSet):
     ordering = ['name']
 
 
-class MemberViewSet(viewsets.ModelViewSet):
+class MemberViewSet(SoftDeleteMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Member.objects.filter(is_active=True).select_related('user', 'membership_type', 'address', 'contact')
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, TrigramSearchFilter]
     filterset_fields = ['membership_type', 'status', 'gender']
     search_fields = ['membership_number', 'user__first_name', 'user__last_name', 'user__email']
     ordering_fields = ['membership_number', 'join_date', 'created_at']
     ordering = ['-created_at']
+    # Une modification de l'utilisateur lié date la fiche (members.signals)
+    conditional_fields = ('updated_at', 'membership_type__updated_at')
+    # Relations imbriquées par MemberDetailSerializer
+    detail_conditional_fields = (
+        'fees__updated_at', 'family_members__updated_at', 'address__updated_at', 'contact__updated_at'
+    )
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -37,20 +48,21 @@ class MemberViewSet(viewsets.ModelViewSet):
             return MemberDetailSerializer
     
     @action(detail=False, methods=['get'])
+    @cached_action(depends_on=[Member, MembershipType])
     def statistics(self, request):
         """Statistiques des membres"""
-        stats = {
-            'total_members': self.queryset.count(),
-            'active_members': self.queryset.filter(status='active').count(),
-            'new_members_this_month': self.queryset.filter(
-                join_date__year=2025, join_date__month=9
-            ).count(),
-            'members_by_type': list(
-                self.queryset.values('membership_type__name')
-                .annotate(count=Count('id'))
-                .order_by('membership_type__name')
-            )
-        }
+        month_start = timezone.localdate().replace(day=1)
+        stats = aggregate_metrics(
+            self.queryset,
+            total_members=count_if(),
+            active_members=count_if(Q(status='active')),
+            new_members_this_month=count_if(Q(join_date__gte=month_start))
+        )
+        stats['members_by_type'] = list(
+            self.queryset.values('membership_type__name')
+            .annotate(count=Count('id'))
+            .order_by('membership_type__name')
+        )
         return Response(stats)
     
     @action(detail=True, methods=['get'])
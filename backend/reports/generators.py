@@ -0,0 +1,284 @@
+"""
+Générateurs de données des rapports.
+
+Chaque générateur reçoit les paramètres du rapport (``Report.parameters``) et
+retourne un dictionnaire sérialisable. Ils sont exécutés par la tâche
+``reports.tasks.generate_report`` et non dans la requête HTTP.
+
+Pour les exports tabulaires (CSV, Excel), chaque type de rapport expose aussi
+une table de détail (``ReportTable``) dont le queryset est parcouru par lots :
+la mémoire utilisée ne dépend pas du nombre de lignes exportées.
+"""
+from decimal import Decimal
+
+from django.db.models import Avg, Count, F, Q, Sum
+
+from members.models import Member
+from inventory.models import Product, StockMovement
+from sales.models import Sale, SaleItem
+from finance.models import Account, FinancialTransaction, Loan
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class ReportTable:
+    """Table de détail d'un rapport : colonnes (champ, libellé) et queryset."""
+    
+    def __init__(self, columns, queryset):
+        self.columns = columns
+        self.queryset = queryset
+    
+    @property
+    def fields(self):
+        return [field for field, _ in self.columns]
+    
+    @property
+    def labels(self):
+        return [label for _, label in self.columns]
+    
+    def rows(self, chunk_size=EXPORT_CHUNK_SIZE):
+        """Itérer sur les lignes (tuples) sans charger tout le queryset."""
+        return self.queryset.values_list(*self.fields).iterator(chunk_size=chunk_size)
+    
+    def as_dicts(self):
+        return list(self.queryset.values(*self.fields))
+
+
+MEMBER_COLUMNS = [
+    ('id', 'ID'),
+    ('membership_number', "Numéro d'adhésion"),
+    ('user__first_name', 'Prénom'),
+    ('user__last_name', 'Nom'),
+    ('membership_type__name', "Type d'adhésion"),
+    ('join_date', "Date d'adhésion"),
+    ('is_active', 'Actif'),
+]
+
+
+def _members_queryset(parameters):
+    queryset = Member.objects.order_by('membership_number')
+    
+    # Filtres selon les paramètres
+    if parameters.get('membership_type'):
+        queryset = queryset.filter(membership_type=parameters['membership_type'])
+    
+    if parameters.get('date_from'):
+        queryset = queryset.filter(join_date__gte=parameters['date_from'])
+    
+    if parameters.get('date_to'):
+        queryset = queryset.filter(join_date__lte=parameters['date_to'])
+    
+    return queryset
+
+
+def members_table(parameters):
+    return ReportTable(MEMBER_COLUMNS, _members_queryset(parameters))
+
+
+def generate_members_report(parameters):
+    """Générer un rapport des membres."""
+    queryset = _members_queryset(parameters)
+    
+    # Statistiques
+    total_members = queryset.count()
+    active_members = queryset.filter(is_active=True).count()
+    
+    # Répartition par type d'adhésion
+    by_type = queryset.values('membership_type__name').annotate(
+        count=Count('id')
+    ).order_by('membership_type__name')
+    
+    return {
+        'total_members': total_members,
+        'active_members': active_members,
+        'inactive_members': total_members - active_members,
+        'by_membership_type': list(by_type),
+        'members': members_table(parameters).as_dicts()
+    }
+
+
+SALE_COLUMNS = [
+    ('id', 'ID'),
+    ('sale_number', 'Numéro de vente'),
+    ('customer__name', 'Client'),
+    ('sale_date', 'Date de vente'),
+    ('subtotal', 'Sous-total'),
+    ('discount_amount', 'Remise'),
+    ('tax_amount', 'Taxes'),
+    ('total_amount', 'Total'),
+    ('status', 'Statut'),
+    ('payment_status', 'Statut de paiement'),
+]
+
+
+def _sales_queryset(parameters):
+    queryset = Sale.objects.order_by('sale_date', 'id')
+    
+    # Filtres selon les paramètres
+    if parameters.get('date_from'):
+        queryset = queryset.filter(sale_date__date__gte=parameters['date_from'])
+    
+    if parameters.get('date_to'):
+        queryset = queryset.filter(sale_date__date__lte=parameters['date_to'])
+    
+    if parameters.get('status'):
+        queryset = queryset.filter(status=parameters['status'])
+    
+    return queryset
+
+
+def sales_table(parameters):
+    return ReportTable(SALE_COLUMNS, _sales_queryset(parameters))
+
+
+def generate_sales_report(parameters):
+    """Générer un rapport des ventes."""
+    queryset = _sales_queryset(parameters)
+    
+    # Statistiques
+    stats = queryset.order_by().aggregate(
+        total_sales=Sum('total_amount'),
+        total_orders=Count('id'),
+        average_order=Avg('total_amount')
+    )
+    
+    # Top produits vendus
+    top_products = SaleItem.objects.filter(
+        sale__in=queryset.order_by().values('pk')
+    ).values('product__name').annotate(
+        quantity_sold=Sum('quantity'),
+        revenue=Sum(F('quantity') * F('unit_price'))
+    ).order_by('-quantity_sold')[:10]
+    
+    return {
+        'statistics': stats,
+        'top_products': list(top_products),
+        'sales': sales_table(parameters).as_dicts()
+    }
+
+
+PRODUCT_COLUMNS = [
+    ('id', 'ID'),
+    ('sku', 'SKU'),
+    ('name', 'Produit'),
+    ('category__name', 'Catégorie'),
+    ('current_stock', 'Stock actuel'),
+    ('minimum_stock', 'Stock minimum'),
+    ('cost_price', 'Prix de revient'),
+    ('selling_price_member', 'Prix membre'),
+    ('selling_price_non_member', 'Prix non-membre'),
+]
+
+
+def _products_queryset(parameters):
+    queryset = Product.objects.order_by('sku')
+    
+    # Filtres selon les paramètres
+    if parameters.get('category'):
+        queryset = queryset.filter(category=parameters['category'])
+    
+    if parameters.get('low_stock_only'):
+        queryset = queryset.filter(current_stock__lte=F('minimum_stock'))
+    
+    return queryset
+
+
+def inventory_table(parameters):
+    return ReportTable(PRODUCT_COLUMNS, _products_queryset(parameters))
+
+
+def generate_inventory_report(parameters):
+    """Générer un rapport d'inventaire."""
+    queryset = _products_queryset(parameters)
+    
+    # Statistiques
+    total_products = queryset.count()
+    low_stock_products = queryset.filter(current_stock__lte=F('minimum_stock')).count()
+    total_value = queryset.aggregate(
+        value=Sum(F('current_stock') * F('cost_price'))
+    )['value'] or Decimal('0')
+    
+    # Mouvements récents
+    recent_movements = StockMovement.objects.order_by('-created_at')[:50]
+    
+    return {
+        'statistics': {
+            'total_products': total_products,
+            'low_stock_products': low_stock_products,
+            'total_inventory_value': total_value
+        },
+        'products': inventory_table(parameters).as_dicts(),
+        'recent_movements': list(recent_movements.values(
+            'product__name', 'movement_type', 'quantity', 'created_at'
+        ))
+    }
+
+
+TRANSACTION_COLUMNS = [
+    ('transaction_number', 'Numéro'),
+    ('date', 'Date'),
+    ('transaction_type', 'Type'),
+    ('description', 'Description'),
+    ('debit_account__code', 'Compte débit'),
+    ('credit_account__code', 'Compte crédit'),
+    ('amount', 'Montant'),
+]
+
+
+def finance_table(parameters):
+    queryset = FinancialTransaction.objects.order_by('date', 'id')
+    
+    if parameters.get('date_from'):
+        queryset = queryset.filter(date__gte=parameters['date_from'])
+    
+    if parameters.get('date_to'):
+        queryset = queryset.filter(date__lte=parameters['date_to'])
+    
+    return ReportTable(TRANSACTION_COLUMNS, queryset)
+
+
+def generate_finance_report(parameters):
+    """Générer un rapport financier."""
+    # Soldes des comptes
+    accounts_balance = Account.objects.aggregate(
+        total_assets=Sum('balance', filter=Q(account_type='asset')),
+        total_liabilities=Sum('balance', filter=Q(account_type='liability')),
+        total_equity=Sum('balance', filter=Q(account_type='equity')),
+        total_revenue=Sum('balance', filter=Q(account_type='revenue')),
+        total_expenses=Sum('balance', filter=Q(account_type='expense'))
+    )
+    
+    # Transactions récentes
+    transactions = FinancialTransaction.objects.order_by('-date')[:100]
+    
+    # Prêts en cours
+    active_loans = Loan.objects.filter(status='disbursed').aggregate(
+        total_outstanding=Sum('balance_remaining'),
+        count=Count('id')
+    )
+    
+    return {
+        'accounts_balance': accounts_balance,
+        'active_loans': active_loans,
+        'recent_transactions': list(transactions.values(
+            'transaction_number', 'date', 'debit_account__name',
+            'credit_account__name', 'amount', 'description'
+        ))
+    }
+
+
+# Type de rapport -> générateur
+REPORT_GENERATORS = {
+    'members_report': generate_members_report,
+    'sales_report': generate_sales_report,
+    'inventory_report': generate_inventory_report,
+    'financial_report': generate_finance_report,
+}
+
+# Type de rapport -> table de détail pour les exports tabulaires
+REPORT_TABLES = {
+    'members_report': members_table,
+    'sales_report': sales_table,
+    'inventory_report': inventory_table,
+    'financial_report': finance_table,
+}
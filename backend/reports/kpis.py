@@ -0,0 +1,140 @@
+"""
+Indicateurs pré-agrégés du tableau de bord.
+
+Le tableau de bord lit une seule ligne (``DashboardKPISnapshot``) au lieu de
+parcourir les tables Member, Sale, Product et Loan. Les signaux de
+``reports.signals`` appliquent des deltas à chaque écriture ; une
+reconstruction complète périodique corrige les dérives (mises à jour en masse
+qui ne déclenchent pas de signaux, par exemple).
+"""
+from decimal import Decimal
+
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from members.models import Member
+from inventory.models import Product
+from sales.models import Sale
+from sales.rollups import REVENUE_STATUSES
+from finance.models import Loan
+
+from .models import DashboardKPISnapshot
+
+SNAPSHOT_PK = 1
+
+def _as_decimal(value):
+    return Decimal(str(value or 0))
+
+
+def _local_date(value):
+    if value is None:
+        return None
+    if hasattr(value, 'tzinfo') and timezone.is_aware(value):
+        return timezone.localdate(value)
+    return value.date() if hasattr(value, 'date') else value
+
+
+def _member_contribution(state):
+    return {
+        'total_members': 1,
+        'active_members': 1 if state['is_active'] else 0,
+    }
+
+
+def _product_contribution(state):
+    is_low = _as_decimal(state['current_stock']) <= _as_decimal(state['minimum_stock'])
+    return {'low_stock_products': 1 if is_low else 0}
+
+
+def _loan_contribution(state):
+    return {'active_loans': 1 if state['status'] == 'disbursed' else 0}
+
+
+def _sale_contribution(state):
+    if state['status'] not in REVENUE_STATUSES:
+        return {}
+    if _local_date(state['sale_date']) != timezone.localdate():
+        return {}
+    return {'total_sales_today': _as_decimal(state['total_amount'])}
+
+
+# Modèle source -> (champs suivis, contribution d'une ligne aux indicateurs)
+KPI_SOURCES = {
+    Member: (('is_active',), _member_contribution),
+    Product: (('current_stock', 'minimum_stock'), _product_contribution),
+    Loan: (('status',), _loan_contribution),
+    Sale: (('sale_date', 'status', 'total_amount'), _sale_contribution),
+}
+
+
+def _compute_sales_today(today):
+    return Sale.objects.filter(
+        sale_date__date=today,
+        status__in=REVENUE_STATUSES
+    ).aggregate(total=Sum('total_amount'))['total'] or Decimal('0')
+
+
+def rebuild_snapshot():
+    """Recalculer entièrement l'instantané à partir des tables sources."""
+    today = timezone.localdate()
+    snapshot, _ = DashboardKPISnapshot.objects.update_or_create(
+        pk=SNAPSHOT_PK,
+        defaults={
+            'total_members': Member.objects.count(),
+            'active_members': Member.objects.filter(is_active=True).count(),
+            'sales_date': today,
+            'total_sales_today': _compute_sales_today(today),
+            'low_stock_products': Product.objects.filter(
+                current_stock__lte=F('minimum_stock')
+            ).count(),
+            'active_loans': Loan.objects.filter(status='disbursed').count(),
+            'rebuilt_at': timezone.now(),
+        }
+    )
+    return snapshot
+
+
+def get_snapshot():
+    """Retourner l'instantané courant, en le créant au premier appel."""
+    snapshot = DashboardKPISnapshot.objects.filter(pk=SNAPSHOT_PK).first()
+    if snapshot is None:
+        return rebuild_snapshot()
+    
+    # Changement de jour : seul le chiffre d'affaires du jour est à recalculer
+    today = timezone.localdate()
+    if snapshot.sales_date != today:
+        snapshot.sales_date = today
+        snapshot.total_sales_today = _compute_sales_today(today)
+        DashboardKPISnapshot.objects.filter(pk=SNAPSHOT_PK).update(
+            sales_date=snapshot.sales_date,
+            total_sales_today=snapshot.total_sales_today
+        )
+    return snapshot
+
+
+def apply_deltas(deltas):
+    """Appliquer atomiquement des deltas (``F() + delta``) à l'instantané."""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    
+    queryset = DashboardKPISnapshot.objects.filter(pk=SNAPSHOT_PK)
+    if 'total_sales_today' in deltas:
+        # Les ventes d'un instantané d'une autre journée seront recalculées à la lecture
+        sales_delta = deltas.pop('total_sales_today')
+        queryset.filter(sales_date=timezone.localdate()).update(
+            total_sales_today=F('total_sales_today') + sales_delta
+        )
+    if deltas:
+        queryset.update(**{field: F(field) + value for field, value in deltas.items()})
+
+
+def diff_contributions(model, previous_state, new_state):
+    """Calculer les deltas entre deux états d'une ligne (``None`` = absente)."""
+    contribution = KPI_SOURCES[model][1]
+    before = contribution(previous_state) if previous_state is not None else {}
+    after = contribution(new_state) if new_state is not None else {}
+    return {
+        field: after.get(field, 0) - before.get(field, 0)
+        for field in set(before) | set(after)
+    }
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from reports.kpis import rebuild_snapshot
+
+
+class Command(BaseCommand):
+    help = "Recalculer l'instantané des indicateurs du tableau de bord"
+
+    def handle(self, *args, **options):
+        snapshot = rebuild_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indicateurs reconstruits ({snapshot.total_members} membres, "
+            f"{snapshot.low_stock_products} produits en stock faible, "
+            f"{snapshot.active_loans} prêts en cours)"
+        ))
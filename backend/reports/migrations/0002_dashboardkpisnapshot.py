@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardKPISnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+                ('total_members', models.IntegerField(default=0, verbose_name='Nombre de membres')),
+                ('active_members', models.IntegerField(default=0, verbose_name='Membres actifs')),
+                ('sales_date', models.DateField(blank=True, null=True, verbose_name='Date des ventes du jour')),
+                ('total_sales_today', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Ventes du jour')),
+                ('low_stock_products', models.IntegerField(default=0, verbose_name='Produits en stock faible')),
+                ('active_loans', models.IntegerField(default=0, verbose_name='Prêts en cours')),
+                ('rebuilt_at', models.DateTimeField(blank=True, null=True, verbose_name='Dernière reconstruction')),
+            ],
+            options={
+                'verbose_name': 'Instantané des indicateurs',
+                'verbose_name_plural': 'Instantanés des indicateurs',
+            },
+        ),
+    ]
@@ -120,3 +120,20 @@ class ReportTemplate(TimestampedModel):
     
     def __str__(self):
         return self.name
+
+class DashboardKPISnapshot(TimestampedModel):
+    """Instantané pré-agrégé des indicateurs du tableau de bord (ligne unique)"""
+    total_members = models.IntegerField(default=0, verbose_name="Nombre de membres")
+    active_members = models.IntegerField(default=0, verbose_name="Membres actifs")
+    sales_date = models.DateField(null=True, blank=True, verbose_name="Date des ventes du jour")
+    total_sales_today = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Ventes du jour")
+    low_stock_products = models.IntegerField(default=0, verbose_name="Produits en stock faible")
+    active_loans = models.IntegerField(default=0, verbose_name="Prêts en cours")
+    rebuilt_at = models.DateTimeField(null=True, blank=True, verbose_name="Dernière reconstruction")
+    
+    class Meta:
+        verbose_name = "Instantané des indicateurs"
+        verbose_name_plural = "Instantanés des indicateurs"
+    
+    def __str__(self):
+        return f"Indicateurs au {self.updated_at}"
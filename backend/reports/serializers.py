@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
+from .generators import REPORT_GENERATORS
 from .models import Report, Dashboard, ReportTemplate
 
 User = get_user_model()
@@ -8,16 +9,20 @@ User = get_user_model()
 
 class ReportSerializer(serializers.ModelSerializer):
     """Serializer pour les rapports."""
-    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
+    generated_by_name = serializers.CharField(source='generated_by.get_full_name', read_only=True)
     
     class Meta:
         model = Report
         fields = [
             'id', 'name', 'description', 'report_type', 'parameters',
-            'status', 'created_by', 'created_by_name', 'created_at',
-            'generated_at', 'file_url'
+            'period_start', 'period_end', 'file_format', 'status',
+            'generated_by', 'generated_by_name', 'generation_time',
+            'file_path', 'file_size', 'created_at'
+        ]
+        read_only_fields = [
+            'id', 'status', 'generated_by', 'generation_time',
+            'file_path', 'file_size', 'created_at'
         ]
-        read_only_fields = ['id', 'created_by', 'created_at', 'generated_at']
     
     def validate_parameters(self, value):
         """Valider les paramètres du rapport."""
@@ -27,7 +32,7 @@ class ReportSerializer(serializers.ModelSerializer):
     
     def validate_report_type(self, value):
         """Valider le type de rapport."""
-        allowed_types = ['members', 'sales', 'inventory', 'finance']
+        allowed_types = list(REPORT_GENERATORS)
         if value not in allowed_types:
             raise serializers.ValidationError(
                 f"Type de rapport non valide. Types autorisés: {', '.join(allowed_types)}"
@@ -43,31 +48,26 @@ class DashboardSerializer(serializers.ModelSerializer):
     class Meta:
         model = Dashboard
         fields = [
-            'id', 'name', 'description', 'layout', 'is_public',
+            'id', 'name', 'description', 'widgets_config', 'is_public',
             'created_by', 'created_by_name', 'created_at', 'updated_at',
             'widget_count'
         ]
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
     
     def get_widget_count(self, obj):
-        """Retourner le nombre de widgets (simulé car pas de modèle DashboardWidget)."""
-        # Si le layout est défini, compter les widgets
-        if obj.layout and isinstance(obj.layout, dict):
-            return len(obj.layout.get('widgets', []))
+        """Retourner le nombre de widgets configurés."""
+        if isinstance(obj.widgets_config, list):
+            return len(obj.widgets_config)
         return 0
     
-    def validate_layout(self, value):
-        """Valider la structure du layout."""
-        if value and not isinstance(value, dict):
-            raise serializers.ValidationError("Le layout doit être un objet JSON valide.")
+    def validate_widgets_config(self, value):
+        """Valider la configuration des widgets."""
+        if value and not isinstance(value, list):
+            raise serializers.ValidationError("Les widgets doivent être une liste.")
         
         # Validation basique de la structure
-        if value and 'widgets' in value:
-            widgets = value['widgets']
-            if not isinstance(widgets, list):
-                raise serializers.ValidationError("Les widgets doivent être une liste.")
-            
-            for widget in widgets:
+        if value:
+            for widget in value:
                 if not isinstance(widget, dict):
                     raise serializers.ValidationError("Chaque widget doit être un objet.")
                 
@@ -87,13 +87,14 @@ class ReportTemplateSerializer(serializers.ModelSerializer):
     class Meta:
         model = ReportTemplate
         fields = [
-            'id', 'name', 'description', 'report_type', 'template_content',
-            'default_parameters', 'is_active', 'created_at', 'updated_at'
+            'id', 'name', 'description', 'report_type', 'template_config',
+            'default_parameters', 'html_template', 'css_styles', 'is_active',
+            'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
-    def validate_template_content(self, value):
-        """Valider le contenu du modèle."""
+    def validate_template_config(self, value):
+        """Valider la configuration du modèle."""
         if value and not isinstance(value, dict):
             raise serializers.ValidationError("Le contenu du modèle doit être un objet JSON valide.")
         
@@ -0,0 +1,52 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from inventory.models import Product
+from inventory.signals import stock_changed
+
+from .kpis import KPI_SOURCES, apply_deltas, diff_contributions
+
+
+def _tracked_state(sender, instance):
+    fields = KPI_SOURCES[sender][0]
+    return {field: getattr(instance, field) for field in fields}
+
+
+def remember_previous_state(sender, instance, **kwargs):
+    """Mémoriser l'état en base avant sauvegarde pour calculer le delta."""
+    previous = None
+    if instance.pk:
+        fields = KPI_SOURCES[sender][0]
+        previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._kpi_previous_state = previous
+
+
+def update_kpis_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_kpi_previous_state', None)
+    apply_deltas(diff_contributions(sender, previous, _tracked_state(sender, instance)))
+
+
+def update_kpis_on_delete(sender, instance, **kwargs):
+    apply_deltas(diff_contributions(sender, _tracked_state(sender, instance), None))
+
+
+for model in KPI_SOURCES:
+    uid = f'reports_kpis_{model._meta.label_lower}'
+    pre_save.connect(remember_previous_state, sender=model, dispatch_uid=f'{uid}_pre_save')
+    post_save.connect(update_kpis_on_save, sender=model, dispatch_uid=f'{uid}_post_save')
+    post_delete.connect(update_kpis_on_delete, sender=model, dispatch_uid=f'{uid}_post_delete')
+
+
+def update_kpis_on_stock_change(sender, changes, **kwargs):
+    """Deltas des mises à jour de stock en masse (sans ``post_save``)."""
+    deltas = {}
+    for change in changes:
+        previous = {'current_stock': change['previous_stock'], 'minimum_stock': change['minimum_stock']}
+        current = {'current_stock': change['current_stock'], 'minimum_stock': change['minimum_stock']}
+        for field, value in diff_contributions(Product, previous, current).items():
+            deltas[field] = deltas.get(field, 0) + value
+    apply_deltas(deltas)
+
+
+stock_changed.connect(update_kpis_on_stock_change, dispatch_uid='reports_kpis_stock_changed')
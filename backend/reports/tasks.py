@@ -0,0 +1,53 @@
+import logging
+
+from celery import shared_task
+from django.utils import timezone
+
+from .generators import REPORT_TABLES
+from .kpis import rebuild_snapshot
+from .models import Report
+from .writers import write_csv, write_excel
+
+logger = logging.getLogger(__name__)
+
+# Format de fichier -> écriture de la table de détail
+TABLE_WRITERS = {
+    'csv': write_csv,
+    'excel': write_excel,
+}
+
+
+@shared_task
+def rebuild_dashboard_kpis():
+    """Reconstruction périodique de l'instantané des indicateurs."""
+    snapshot = rebuild_snapshot()
+    return snapshot.rebuilt_at.isoformat()
+
+
+@shared_task
+def generate_report(report_id):
+    """Générer un rapport et écrire le résultat dans ``Report.file_path``."""
+    report = Report.objects.get(pk=report_id)
+    Report.objects.filter(pk=report_id).update(status='generating')
+    
+    writer = TABLE_WRITERS.get(report.file_format)
+    if writer is None:
+        logger.error("Format de rapport non supporté : %s (rapport %s)", report.file_format, report_id)
+        Report.objects.filter(pk=report_id).update(status='failed')
+        return 'failed'
+    
+    try:
+        table = REPORT_TABLES[report.report_type](report.parameters or {})
+        file_path, file_size = writer(report, table)
+    except Exception:
+        logger.exception("Échec de la génération du rapport %s", report_id)
+        Report.objects.filter(pk=report_id).update(status='failed')
+        return 'failed'
+    
+    Report.objects.filter(pk=report_id).update(
+        status='completed',
+        file_path=file_path,
+        file_size=file_size,
+        generation_time=timezone.now()
+    )
+    return 'completed'
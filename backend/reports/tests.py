@@ -1,3 +1,243 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from core.testing import seed_dataset
+from finance.models import Loan
+from inventory.models import Product
+from inventory.services import bulk_adjust_stock, record_movement
+from members.models import Member
+from sales.models import Customer, Sale
+
+from .generators import SALE_COLUMNS, sales_table
+from .kpis import get_snapshot, rebuild_snapshot
+from .models import DashboardKPISnapshot, Report
+from .tasks import generate_report
+from .writers import CSV_BOM, iter_csv
+
+
+class MediaRootTestCase(TestCase):
+    """Fichiers de rapports écrits dans un MEDIA_ROOT temporaire."""
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class ExcelReportTests(MediaRootTestCase):
+    
+    def test_sheet_title_drops_forbidden_characters(self):
+        report = Report.objects.create(
+            name='Ventes 01/2026 [brouillon]: membres*?', report_type='members_report',
+            file_format='excel', period_start=date(2026, 1, 1), period_end=date(2026, 1, 31),
+            generated_by=User.objects.create_user('comptable'), generation_time=timezone.now()
+        )
+        
+        self.assertEqual(generate_report(report.pk), 'completed')
+        report.refresh_from_db()
+        workbook = load_workbook(os.path.join(self.media_root, report.file_path), read_only=True)
+        self.assertEqual(workbook.sheetnames, ['Ventes 01-2026 -brouillon-- mem'])
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
+class ReportGenerationApiTests(MediaRootTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create_user('comptable')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        seed_dataset(2)
+        self.report = Report.objects.create(
+            name='Membres', report_type='members_report', file_format='csv',
+            period_start=date(2026, 1, 1), period_end=date(2026, 1, 31),
+            generated_by=user, generation_time=timezone.now()
+        )
+    
+    def generate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('reports:report-generate', args=[self.report.pk]))
+        self.report.refresh_from_db()
+        return response
+    
+    def download(self):
+        return self.client.get(reverse('reports:report-download', args=[self.report.pk]))
+    
+    def test_generate_then_download(self):
+        self.assertEqual(self.download().status_code, 409)
+        
+        response = self.generate()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'generating')
+        self.assertEqual(self.report.status, 'completed')
+        self.assertEqual(self.report.file_path, os.path.join('reports', f'report_{self.report.pk}.csv'))
+        
+        response = self.download()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'report_{self.report.pk}.csv', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(len(rows), 3)
+    
+    def test_failed_generation_is_not_downloadable(self):
+        def broken_table(parameters):
+            raise RuntimeError('base indisponible')
+        
+        with mock.patch.dict('reports.tasks.REPORT_TABLES', {'members_report': broken_table}), \
+                self.assertLogs('reports.tasks', 'ERROR'):
+            self.assertEqual(self.generate().status_code, 202)
+        
+        self.assertEqual(self.report.status, 'failed')
+        self.assertEqual(self.download().status_code, 409)
+    
+    def test_unsupported_format_is_rejected(self):
+        Report.objects.filter(pk=self.report.pk).update(file_format='pdf', status='failed')
+        
+        response = self.generate()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['file_format'], 'pdf')
+        self.assertEqual(self.report.status, 'failed')
+        self.assertEqual(self.report.file_path, '')
+
+
+class ReportCsvExportTests(TestCase):
+    
+    def setUp(self):
+        user = User.objects.create_user('comptable')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        customer = Customer.objects.create(name='Marché central', customer_type='corporate')
+        for n, amount in enumerate(['1234.50', '0.05', '99999.00'], start=1):
+            Sale.objects.create(
+                sale_number=f'V-{n}', customer=customer, sale_date=timezone.now(),
+                status='confirmed', total_amount=Decimal(amount)
+            )
+        self.report = Report.objects.create(
+            name='Ventes', report_type='sales_report', file_format='csv',
+            period_start=date(2026, 1, 1), period_end=date(2026, 1, 31),
+            generated_by=user, generation_time=timezone.now()
+        )
+    
+    def test_iter_csv_yields_one_chunk_per_row(self):
+        chunks = list(iter_csv(sales_table({})))
+        self.assertEqual(chunks[0], CSV_BOM)
+        # BOM, en-tête puis une ligne par vente : rien n'est accumulé
+        self.assertEqual(len(chunks), 2 + 3)
+        self.assertTrue(all(chunk.endswith('\r\n') for chunk in chunks[1:]))
+    
+    def test_export_streams_csv(self):
+        response = self.client.get(reverse('reports:report-export', args=[self.report.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn(f'report_{self.report.pk}.csv', response['Content-Disposition'])
+        
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith(CSV_BOM))
+        header, *rows = csv.reader(io.StringIO(content[len(CSV_BOM):]))
+        self.assertEqual(header, [label for _, label in SALE_COLUMNS])
+        
+        total = header.index('Total')
+        self.assertEqual(
+            sorted((row[1], row[total]) for row in rows),
+            [('V-1', '1234.50'), ('V-2', '0.05'), ('V-3', '99999.00')]
+        )
+
+
+class DashboardKPISnapshotTests(TestCase):
+    
+    KPI_FIELDS = ('total_members', 'active_members', 'total_sales_today', 'low_stock_products', 'active_loans')
+    
+    def setUp(self):
+        rebuild_snapshot()
+        seed_dataset(2)
+    
+    def kpis(self, snapshot):
+        return {field: getattr(snapshot, field) for field in self.KPI_FIELDS}
+    
+    def assertMatchesRebuild(self):
+        incremental = self.kpis(get_snapshot())
+        self.assertEqual(incremental, self.kpis(rebuild_snapshot()))
+        return incremental
+    
+    def test_deltas_match_rebuild_after_each_change(self):
+        kpis = self.assertMatchesRebuild()
+        self.assertEqual(kpis['total_members'], 2)
+        self.assertEqual(kpis['active_loans'], 2)
+        self.assertEqual(kpis['total_sales_today'], Decimal('300'))
+        
+        member = Member.objects.first()
+        member.soft_delete()
+        self.assertEqual(self.assertMatchesRebuild()['active_members'], 1)
+        # Suppression en cascade des prêts du membre
+        member.delete()
+        self.assertEqual(self.assertMatchesRebuild()['active_loans'], 1)
+        
+        loan = Loan.objects.get()
+        loan.status = 'completed'
+        loan.save()
+        self.assertEqual(self.assertMatchesRebuild()['active_loans'], 0)
+        
+        product = Product.objects.first()
+        product.minimum_stock = product.current_stock
+        product.save()
+        self.assertEqual(self.assertMatchesRebuild()['low_stock_products'], 1)
+        # Mouvements sans post_save (signal stock_changed)
+        record_movement(product, 'in', 5, 'purchase')
+        self.assertEqual(self.assertMatchesRebuild()['low_stock_products'], 0)
+        other = Product.objects.exclude(pk=product.pk).get()
+        bulk_adjust_stock([{'product': other.pk, 'quantity': other.current_stock, 'movement_type': 'out'}])
+        self.assertEqual(self.assertMatchesRebuild()['low_stock_products'], 1)
+        
+        sale = Sale.objects.first()
+        sale.status = 'cancelled'
+        sale.save()
+        self.assertEqual(self.assertMatchesRebuild()['total_sales_today'], Decimal('150'))
+        sale = Sale.objects.get(status='confirmed')
+        sale.sale_date -= timedelta(days=1)
+        sale.save()
+        self.assertEqual(self.assertMatchesRebuild()['total_sales_today'], Decimal('0'))
+        sale.delete()
+        self.assertMatchesRebuild()
+    
+    def test_sales_are_recomputed_on_day_rollover(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        DashboardKPISnapshot.objects.update(sales_date=yesterday, total_sales_today=Decimal('999'))
+        
+        # Vente du jour sur un instantané de la veille : pas de delta, recalcul à la lecture
+        Sale.objects.create(
+            sale_number='V-JOUR', customer=Customer.objects.first(), sale_date=timezone.now(),
+            status='confirmed', total_amount=Decimal('50')
+        )
+        self.assertEqual(DashboardKPISnapshot.objects.get().total_sales_today, Decimal('999'))
+        
+        snapshot = get_snapshot()
+        self.assertEqual(snapshot.sales_date, timezone.localdate())
+        self.assertEqual(snapshot.total_sales_today, Decimal('350'))
+        self.assertMatchesRebuild()
+    
+    def test_rebuild_command_repairs_bulk_updates(self):
+        # Mise à jour en masse : aucun signal
+        Product.objects.update(current_stock=0)
+        self.assertEqual(get_snapshot().low_stock_products, 0)
+        
+        output = StringIO()
+        call_command('rebuild_dashboard_kpis', stdout=output)
+        self.assertIn('2 produits en stock faible', output.getvalue())
+        self.assertEqual(DashboardKPISnapshot.objects.get().low_stock_products, 2)
@@ -1,28 +1,34 @@
+import os
+
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Count, Q, F, Avg
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum, Q
+from django.http import FileResponse, StreamingHttpResponse
 from django.utils import timezone
-from datetime import datetime, timedelta
-from decimal import Decimal
+from datetime import timedelta
 
 from .models import Report, Dashboard, ReportTemplate
+from .generators import REPORT_GENERATORS, REPORT_TABLES
+from .kpis import get_snapshot
+from .tasks import TABLE_WRITERS, generate_report
+from .writers import iter_csv
 from .serializers import (
     ReportSerializer, DashboardSerializer, ReportTemplateSerializer
 )
 
-# Import des modèles pour les statistiques
-from members.models import Member, MembershipFee
-from inventory.models import Product, StockMovement
-from sales.models import Sale, SaleItem
-from finance.models import Account, FinancialTransaction, Loan
+# Import des agrégats pour les statistiques
+from sales.models import SalesMonthlyRollup
+from sales.rollups import REVENUE_STATUSES, month_start
 
 
 class ReportViewSet(viewsets.ModelViewSet):
     """ViewSet pour la gestion des rapports."""
-    queryset = Report.objects.select_related('created_by')
+    queryset = Report.objects.select_related('generated_by')
     serializer_class = ReportSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -33,191 +39,79 @@ class ReportViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         """Créer un rapport avec l'utilisateur actuel."""
-        serializer.save(created_by=self.request.user)
+        serializer.save(generated_by=self.request.user, generation_time=timezone.now())
     
     @action(detail=True, methods=['post'])
     def generate(self, request, pk=None):
-        """Générer un rapport."""
+        """Mettre en file la génération d'un rapport (tâche Celery)."""
         report = self.get_object()
         
-        try:
-            # Logique de génération selon le type de rapport
-            if report.report_type == 'members':
-                data = self._generate_members_report(report.parameters)
-            elif report.report_type == 'sales':
-                data = self._generate_sales_report(report.parameters)
-            elif report.report_type == 'inventory':
-                data = self._generate_inventory_report(report.parameters)
-            elif report.report_type == 'finance':
-                data = self._generate_finance_report(report.parameters)
-            else:
-                return Response(
-                    {'error': 'Type de rapport non supporté'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Marquer le rapport comme généré
-            report.status = 'completed'
-            report.generated_at = timezone.now()
-            report.save()
-            
-            return Response({
-                'message': 'Rapport généré avec succès',
-                'data': data
-            })
-            
-        except Exception as e:
-            report.status = 'error'
-            report.save()
+        if report.report_type not in REPORT_GENERATORS:
             return Response(
-                {'error': f'Erreur lors de la génération: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': 'Type de rapport non supporté'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if report.file_format not in TABLE_WRITERS:
+            return Response(
+                {'error': 'Format de fichier non supporté', 'file_format': report.file_format},
+                status=status.HTTP_400_BAD_REQUEST
             )
-    
-    def _generate_members_report(self, parameters):
-        """Générer un rapport des membres."""
-        queryset = Member.objects.select_related('user')
-        
-        # Filtres selon les paramètres
-        if parameters and parameters.get('membership_type'):
-            queryset = queryset.filter(membership_type=parameters['membership_type'])
-        
-        if parameters and parameters.get('date_from'):
-            queryset = queryset.filter(date_joined__gte=parameters['date_from'])
-        
-        if parameters and parameters.get('date_to'):
-            queryset = queryset.filter(date_joined__lte=parameters['date_to'])
-        
-        # Statistiques
-        total_members = queryset.count()
-        active_members = queryset.filter(is_active=True).count()
         
-        # Répartition par type d'adhésion
-        by_type = queryset.values('membership_type').annotate(
-            count=Count('id')
-        ).order_by('membership_type')
+        report.status = 'generating'
+        report.save(update_fields=['status', 'updated_at'])
+        transaction.on_commit(lambda: generate_report.delay(report.pk))
         
-        return {
-            'total_members': total_members,
-            'active_members': active_members,
-            'inactive_members': total_members - active_members,
-            'by_membership_type': list(by_type),
-            'members': list(queryset.values(
-                'id', 'membership_number', 'user__first_name', 
-                'user__last_name', 'membership_type', 'date_joined', 'is_active'
-            ))
-        }
+        return Response({
+            'message': 'Génération du rapport lancée',
+            'report_id': report.pk,
+            'status': report.status
+        }, status=status.HTTP_202_ACCEPTED)
     
-    def _generate_sales_report(self, parameters):
-        """Générer un rapport des ventes."""
-        queryset = Sale.objects.select_related('customer')
-        
-        # Filtres selon les paramètres
-        if parameters and parameters.get('date_from'):
-            queryset = queryset.filter(sale_date__date__gte=parameters['date_from'])
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Télécharger le fichier d'un rapport généré."""
+        report = self.get_object()
         
-        if parameters and parameters.get('date_to'):
-            queryset = queryset.filter(sale_date__date__lte=parameters['date_to'])
+        if report.status != 'completed' or not report.file_path:
+            return Response(
+                {'error': 'Le rapport n\'est pas encore disponible', 'status': report.status},
+                status=status.HTTP_409_CONFLICT
+            )
         
-        if parameters and parameters.get('status'):
-            queryset = queryset.filter(status=parameters['status'])
+        absolute_path = os.path.join(settings.MEDIA_ROOT, report.file_path)
+        if not os.path.exists(absolute_path):
+            return Response(
+                {'error': 'Fichier du rapport introuvable'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         
-        # Statistiques
-        stats = queryset.aggregate(
-            total_sales=Sum('final_amount') or Decimal('0'),
-            total_orders=Count('id'),
-            average_order=Avg('final_amount') or Decimal('0')
+        return FileResponse(
+            open(absolute_path, 'rb'),
+            as_attachment=True,
+            filename=os.path.basename(report.file_path)
         )
-        
-        # Top produits vendus
-        top_products = SaleItem.objects.filter(
-            sale__in=queryset
-        ).values('product__name').annotate(
-            quantity_sold=Sum('quantity'),
-            revenue=Sum(F('quantity') * F('unit_price'))
-        ).order_by('-quantity_sold')[:10]
-        
-        return {
-            'statistics': stats,
-            'top_products': list(top_products),
-            'sales': list(queryset.values(
-                'id', 'sale_number', 'customer__name', 'sale_date',
-                'total_amount', 'final_amount', 'status'
-            ))
-        }
-    
-    def _generate_inventory_report(self, parameters):
-        """Générer un rapport d'inventaire."""
-        queryset = Product.objects.select_related('category')
-        
-        # Filtres selon les paramètres
-        if parameters and parameters.get('category'):
-            queryset = queryset.filter(category=parameters['category'])
-        
-        if parameters and parameters.get('low_stock_only'):
-            queryset = queryset.filter(current_stock__lte=F('minimum_stock'))
-        
-        # Statistiques
-        total_products = queryset.count()
-        low_stock_products = queryset.filter(current_stock__lte=F('minimum_stock')).count()
-        total_value = queryset.aggregate(
-            value=Sum(F('current_stock') * F('cost_price'))
-        )['value'] or Decimal('0')
-        
-        # Mouvements récents
-        recent_movements = StockMovement.objects.select_related(
-            'product'
-        ).order_by('-date')[:50]
-        
-        return {
-            'statistics': {
-                'total_products': total_products,
-                'low_stock_products': low_stock_products,
-                'total_inventory_value': total_value
-            },
-            'products': list(queryset.values(
-                'id', 'name', 'category__name', 'current_stock',
-                'minimum_stock', 'cost_price', 'selling_price'
-            )),
-            'recent_movements': list(recent_movements.values(
-                'product__name', 'movement_type', 'quantity', 'date'
-            ))
-        }
     
-    def _generate_finance_report(self, parameters):
-        """Générer un rapport financier."""
-        # Soldes des comptes
-        accounts_balance = Account.objects.aggregate(
-            total_cash=Sum('balance', filter=Q(account_type='cash')),
-            total_bank=Sum('balance', filter=Q(account_type='bank')),
-            total_assets=Sum('balance', filter=Q(account_type='asset')),
-            total_liabilities=Sum('balance', filter=Q(account_type='liability'))
-        )
-        
-        # Transactions récentes
-        transactions = FinancialTransaction.objects.select_related(
-            'debit_account', 'credit_account'
-        ).order_by('-date')[:100]
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """Exporter la table de détail du rapport en CSV (flux continu)."""
+        report = self.get_object()
         
-        # Prêts en cours
-        active_loans = Loan.objects.filter(status='disbursed').aggregate(
-            total_outstanding=Sum('outstanding_balance'),
-            count=Count('id')
-        )
+        table_builder = REPORT_TABLES.get(report.report_type)
+        if table_builder is None:
+            return Response(
+                {'error': 'Type de rapport non supporté'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        return {
-            'accounts_balance': accounts_balance,
-            'active_loans': active_loans,
-            'recent_transactions': list(transactions.values(
-                'reference', 'date', 'debit_account__name',
-                'credit_account__name', 'amount', 'description'
-            ))
-        }
+        table = table_builder(report.parameters or {})
+        response = StreamingHttpResponse(iter_csv(table), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="report_{report.pk}.csv"'
+        return response
 
 
 class DashboardViewSet(viewsets.ModelViewSet):
     """ViewSet pour la gestion des tableaux de bord."""
-    queryset = Dashboard.objects.all()
+    queryset = Dashboard.objects.select_related('created_by')
     serializer_class = DashboardSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -256,32 +150,26 @@ class DashboardViewSet(viewsets.ModelViewSet):
         })
     
     def _get_kpi_data(self):
-        """Récupérer les données KPI."""
+        """Récupérer les données KPI depuis l'instantané pré-agrégé."""
+        snapshot = get_snapshot()
         return {
-            'total_members': Member.objects.count(),
-            'active_members': Member.objects.filter(is_active=True).count(),
-            'total_sales_today': Sale.objects.filter(
-                sale_date__date=timezone.now().date(),
-                status='completed'
-            ).aggregate(total=Sum('final_amount'))['total'] or Decimal('0'),
-            'low_stock_products': Product.objects.filter(
-                current_stock__lte=F('minimum_stock')
-            ).count(),
-            'active_loans': Loan.objects.filter(status='disbursed').count()
+            'total_members': snapshot.total_members,
+            'active_members': snapshot.active_members,
+            'total_sales_today': snapshot.total_sales_today,
+            'low_stock_products': snapshot.low_stock_products,
+            'active_loans': snapshot.active_loans
         }
     
     def _get_chart_data(self):
-        """Récupérer les données pour graphiques."""
-        from django.db.models import TruncMonth
+        """Récupérer les données pour graphiques (agrégats mensuels des ventes)."""
+        first_month = month_start(timezone.localdate() - timedelta(days=365))
         
         # Ventes par mois
-        sales_by_month = Sale.objects.filter(
-            status='completed',
-            sale_date__gte=timezone.now() - timedelta(days=365)
-        ).annotate(
-            month=TruncMonth('sale_date')
+        sales_by_month = SalesMonthlyRollup.objects.filter(
+            status__in=REVENUE_STATUSES,
+            month__gte=first_month
         ).values('month').annotate(
-            total=Sum('final_amount')
+            total=Sum('total_amount')
         ).order_by('month')
         
         return {
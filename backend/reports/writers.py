@@ -0,0 +1,109 @@
+"""
+Écriture des rapports générés (CSV, Excel).
+
+Les écritures tabulaires parcourent la table de détail du rapport ligne par
+ligne (``ReportTable.rows``) : rien n'est matérialisé en mémoire. Le classeur
+Excel est produit en mode ``write_only`` d'openpyxl, qui vide chaque ligne sur
+disque au fil de l'eau.
+"""
+import csv
+import os
+import re
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+# Marque d'ordre des octets pour qu'Excel ouvre le CSV en UTF-8
+CSV_BOM = '\ufeff'
+
+# Caractères interdits dans un nom de feuille Excel (31 caractères au plus)
+SHEET_TITLE_FORBIDDEN = re.compile(r'[\\*?:/\[\]]')
+SHEET_TITLE_MAX_LENGTH = 31
+
+
+def report_relative_path(report, extension):
+    return os.path.join(settings.REPORTS_OUTPUT_DIR, f'report_{report.pk}.{extension}')
+
+
+def _absolute_path(relative_path):
+    absolute_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+    return absolute_path
+
+
+def write_csv(report, table):
+    """Écrire la table de détail du rapport en CSV, lot par lot."""
+    relative_path = report_relative_path(report, 'csv')
+    absolute_path = _absolute_path(relative_path)
+    with open(absolute_path, 'w', encoding='utf-8', newline='') as output:
+        output.write(CSV_BOM)
+        writer = csv.writer(output)
+        writer.writerow(table.labels)
+        writer.writerows(table.rows())
+    return relative_path, os.path.getsize(absolute_path)
+
+
+def _excel_cell(sheet, value):
+    """Convertir une valeur en cellule typée (nombres, dates) pour Excel."""
+    if isinstance(value, Decimal):
+        cell = WriteOnlyCell(sheet, value=value)
+        exponent = value.as_tuple().exponent
+        decimals = -exponent if isinstance(exponent, int) and exponent < 0 else 0
+        cell.number_format = '#,##0.' + '0' * decimals if decimals else '#,##0'
+        return cell
+    if isinstance(value, datetime):
+        # Excel ne gère pas les fuseaux horaires
+        if timezone.is_aware(value):
+            value = timezone.localtime(value).replace(tzinfo=None)
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.number_format = 'yyyy-mm-dd hh:mm'
+        return cell
+    return value
+
+
+def sheet_title(name):
+    """Nom de feuille valide tiré du nom du rapport (« Ventes 01/2026 » -> « Ventes 01-2026 »)."""
+    return SHEET_TITLE_FORBIDDEN.sub('-', name or 'Rapport')[:SHEET_TITLE_MAX_LENGTH]
+
+
+def write_excel(report, table):
+    """Écrire la table de détail du rapport dans un classeur xlsx, lot par lot."""
+    relative_path = report_relative_path(report, 'xlsx')
+    absolute_path = _absolute_path(relative_path)
+    
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title(report.name))
+    
+    header = []
+    for label in table.labels:
+        cell = WriteOnlyCell(sheet, value=label)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+    
+    for row in table.rows():
+        sheet.append([_excel_cell(sheet, value) for value in row])
+    
+    workbook.save(absolute_path)
+    return relative_path, os.path.getsize(absolute_path)
+
+
+class Echo:
+    """Pseudo-fichier dont ``write`` retourne la valeur au lieu de la stocker."""
+    
+    def write(self, value):
+        return value
+
+
+def iter_csv(table):
+    """Générer le CSV d'une table ligne par ligne (pour ``StreamingHttpResponse``)."""
+    writer = csv.writer(Echo())
+    yield CSV_BOM
+    yield writer.writerow(table.labels)
+    for row in table.rows():
+        yield writer.writerow(row)
@@ -0,0 +1,32 @@
+from argparse import ArgumentTypeError
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.rollups import rebuild_rollups
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ArgumentTypeError(f"Date invalide (format attendu AAAA-MM-JJ): {value}")
+
+
+class Command(BaseCommand):
+    help = "Recalculer les agrégats journaliers et mensuels des ventes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', type=_parse_date,
+                            help="Premier jour à recalculer (AAAA-MM-JJ)")
+        parser.add_argument('--to', dest='date_to', type=_parse_date,
+                            help="Dernier jour à recalculer (AAAA-MM-JJ)")
+
+    def handle(self, *args, **options):
+        date_from = options['date_from']
+        date_to = options['date_to']
+        if date_from and date_to and date_from > date_to:
+            raise CommandError("--from doit précéder --to")
+        
+        count = rebuild_rollups(date_from, date_to)
+        self.stdout.write(self.style.SUCCESS(f"{count} agrégats journaliers recalculés"))
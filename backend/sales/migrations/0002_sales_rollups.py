@@ -0,0 +1,78 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:50
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Sale = apps.get_model('sales', 'Sale')
+    SalesDailyRollup = apps.get_model('sales', 'SalesDailyRollup')
+    SalesMonthlyRollup = apps.get_model('sales', 'SalesMonthlyRollup')
+
+    for model, field, trunc in (
+        (SalesDailyRollup, 'day', TruncDate),
+        (SalesMonthlyRollup, 'month', TruncMonth),
+    ):
+        rows = Sale.objects.annotate(bucket=trunc('sale_date')).order_by().values(
+            'bucket', 'status', 'customer__customer_type'
+        ).annotate(count=Count('id'), amount=Sum('total_amount'))
+        model.objects.bulk_create([
+            model(**{
+                field: row['bucket'].date() if hasattr(row['bucket'], 'date') else row['bucket'],
+                'status': row['status'],
+                'customer_type': row['customer__customer_type'],
+                'sale_count': row['count'],
+                'total_amount': row['amount'] or 0,
+            })
+            for row in rows.iterator()
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+                ('day', models.DateField(verbose_name='Jour')),
+                ('status', models.CharField(max_length=20, verbose_name='Statut')),
+                ('customer_type', models.CharField(max_length=20, verbose_name='Type de client')),
+                ('sale_count', models.IntegerField(default=0, verbose_name='Nombre de ventes')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Montant total')),
+            ],
+            options={
+                'verbose_name': 'Agrégat journalier des ventes',
+                'verbose_name_plural': 'Agrégats journaliers des ventes',
+                'ordering': ['-day'],
+                'unique_together': {('day', 'status', 'customer_type')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SalesMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+                ('month', models.DateField(verbose_name='Mois (premier jour)')),
+                ('status', models.CharField(max_length=20, verbose_name='Statut')),
+                ('customer_type', models.CharField(max_length=20, verbose_name='Type de client')),
+                ('sale_count', models.IntegerField(default=0, verbose_name='Nombre de ventes')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Montant total')),
+            ],
+            options={
+                'verbose_name': 'Agrégat mensuel des ventes',
+                'verbose_name_plural': 'Agrégats mensuels des ventes',
+                'ordering': ['-month'],
+                'unique_together': {('month', 'status', 'customer_type')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+from core.search import create_trigram_indexes, drop_trigram_indexes
+
+SEARCH_INDEXES = {
+    'sales_customer': ['name', 'phone', 'email'],
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    for table, columns in SEARCH_INDEXES.items():
+        create_trigram_indexes(schema_editor, table, columns)
+
+
+def drop_search_indexes(apps, schema_editor):
+    for table, columns in SEARCH_INDEXES.items():
+        drop_trigram_indexes(schema_editor, table, columns)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_search_extensions'),
+        ('sales', '0002_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_keyset_index'),
+        ('sales', '0004_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['status', 'sale_date'], name='sales_sale_status_date_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_keyset_index'),
+        ('members', '0004_sync_indexes'),
+        ('sales', '0005_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['updated_at', 'id'], name='sales_customer_sync_idx'),
+        ),
+    ]
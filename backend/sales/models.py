@@ -34,6 +34,9 @@ class Customer(SoftDeleteModel):
     class Meta:
         verbose_name = "Client"
         verbose_name_plural = "Clients"
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='sales_customer_sync_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.get_customer_type_display()})"
@@ -93,6 +96,10 @@ class Sale(TimestampedModel):
         verbose_name = "Vente"
         verbose_name_plural = "Ventes"
         ordering = ['-sale_date']
+        indexes = [
+            models.Index(fields=['sale_date', 'id'], name='sales_sale_keyset_idx'),
+            models.Index(fields=['status', 'sale_date'], name='sales_sale_status_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.sale_number} - {self.customer.name}"
@@ -234,3 +241,37 @@ class Order(TimestampedModel):
     
     def __str__(self):
         return f"{self.order_number} - {self.customer.name}"
+
+class SalesDailyRollup(TimestampedModel):
+    """Agrégats journaliers des ventes (par statut et type de client)"""
+    day = models.DateField(verbose_name="Jour")
+    status = models.CharField(max_length=20, verbose_name="Statut")
+    customer_type = models.CharField(max_length=20, verbose_name="Type de client")
+    sale_count = models.IntegerField(default=0, verbose_name="Nombre de ventes")
+    total_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Montant total")
+    
+    class Meta:
+        verbose_name = "Agrégat journalier des ventes"
+        verbose_name_plural = "Agrégats journaliers des ventes"
+        unique_together = ['day', 'status', 'customer_type']
+        ordering = ['-day']
+    
+    def __str__(self):
+        return f"{self.day} - {self.status} - {self.customer_type}"
+
+class SalesMonthlyRollup(TimestampedModel):
+    """Agrégats mensuels des ventes (par statut et type de client)"""
+    month = models.DateField(verbose_name="Mois (premier jour)")
+    status = models.CharField(max_length=20, verbose_name="Statut")
+    customer_type = models.CharField(max_length=20, verbose_name="Type de client")
+    sale_count = models.IntegerField(default=0, verbose_name="Nombre de ventes")
+    total_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Montant total")
+    
+    class Meta:
+        verbose_name = "Agrégat mensuel des ventes"
+        verbose_name_plural = "Agrégats mensuels des ventes"
+        unique_together = ['month', 'status', 'customer_type']
+        ordering = ['-month']
+    
+    def __str__(self):
+        return f"{self.month:%Y-%m} - {self.status} - {self.customer_type}"
@@ -0,0 +1,156 @@
+"""
+Agrégats des ventes par jour et par mois.
+
+Les tables ``SalesDailyRollup`` et ``SalesMonthlyRollup`` sont tenues à jour
+par les signaux de ``sales.signals`` à chaque création, modification ou
+suppression d'une vente. La commande ``rebuild_sales_rollups`` les recalcule
+sur une période (reprise d'historique, ou après des mises à jour en masse et
+des changements de type de client qui ne passent pas par les signaux).
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import Sale, SalesDailyRollup, SalesMonthlyRollup
+
+# Statuts de vente comptabilisés dans le chiffre d'affaires
+REVENUE_STATUSES = ('confirmed', 'delivered')
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def _local_date(value):
+    if timezone.is_aware(value):
+        return timezone.localdate(value)
+    return value.date()
+
+
+def sale_state(sale):
+    """Clé d'agrégation et montant d'une vente en mémoire."""
+    return {
+        'day': _local_date(sale.sale_date),
+        'status': sale.status,
+        'customer_type': sale.customer.customer_type,
+        'total_amount': Decimal(str(sale.total_amount or 0)),
+    }
+
+
+def stored_sale_state(pk):
+    """Clé d'agrégation et montant d'une vente tels qu'enregistrés en base."""
+    row = Sale.objects.filter(pk=pk).values(
+        'sale_date', 'status', 'customer__customer_type', 'total_amount'
+    ).first()
+    if row is None:
+        return None
+    return {
+        'day': _local_date(row['sale_date']),
+        'status': row['status'],
+        'customer_type': row['customer__customer_type'],
+        'total_amount': row['total_amount'],
+    }
+
+
+def _add_to_bucket(model, key, count, amount):
+    values = {
+        'sale_count': F('sale_count') + count,
+        'total_amount': F('total_amount') + amount,
+    }
+    if model.objects.filter(**key).update(**values):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(sale_count=count, total_amount=amount, **key)
+    except IntegrityError:
+        # Créé entre-temps par une autre transaction
+        model.objects.filter(**key).update(**values)
+
+
+def _record(state, sign):
+    bucket = {'status': state['status'], 'customer_type': state['customer_type']}
+    amount = state['total_amount'] * sign
+    _add_to_bucket(SalesDailyRollup, {'day': state['day'], **bucket}, sign, amount)
+    _add_to_bucket(SalesMonthlyRollup, {'month': month_start(state['day']), **bucket}, sign, amount)
+
+
+def apply_sale_change(previous, current):
+    """Retirer l'ancien état d'une vente des agrégats et y ajouter le nouveau."""
+    if previous == current:
+        return
+    if previous is not None:
+        _record(previous, -1)
+    if current is not None:
+        _record(current, 1)
+
+
+def rebuild_rollups(date_from=None, date_to=None):
+    """
+    Recalculer les agrégats journaliers sur [date_from, date_to] puis les
+    agrégats mensuels des mois concernés. Retourne le nombre de lignes
+    journalières écrites.
+    """
+    sales = Sale.objects.annotate(day=TruncDate('sale_date'))
+    daily = SalesDailyRollup.objects.all()
+    if date_from:
+        sales = sales.filter(day__gte=date_from)
+        daily = daily.filter(day__gte=date_from)
+    if date_to:
+        sales = sales.filter(day__lte=date_to)
+        daily = daily.filter(day__lte=date_to)
+    
+    rows = sales.order_by().values('day', 'status', 'customer__customer_type').annotate(
+        sale_count=Count('id'),
+        amount=Sum('total_amount')
+    )
+    
+    with transaction.atomic():
+        daily.delete()
+        created = SalesDailyRollup.objects.bulk_create([
+            SalesDailyRollup(
+                day=row['day'],
+                status=row['status'],
+                customer_type=row['customer__customer_type'],
+                sale_count=row['sale_count'],
+                total_amount=row['amount'] or Decimal('0')
+            )
+            for row in rows.iterator()
+        ], batch_size=1000)
+        _rebuild_monthly(date_from, date_to)
+    
+    return len(created)
+
+
+def _rebuild_monthly(date_from, date_to):
+    daily = SalesDailyRollup.objects.all()
+    monthly = SalesMonthlyRollup.objects.all()
+    if date_from:
+        daily = daily.filter(day__gte=month_start(date_from))
+        monthly = monthly.filter(month__gte=month_start(date_from))
+    if date_to:
+        monthly = monthly.filter(month__lte=month_start(date_to))
+        next_month = date(date_to.year + date_to.month // 12, date_to.month % 12 + 1, 1)
+        daily = daily.filter(day__lt=next_month)
+    
+    rows = daily.annotate(month=TruncMonth('day')).order_by().values(
+        'month', 'status', 'customer_type'
+    ).annotate(
+        count=Sum('sale_count'),
+        amount=Sum('total_amount')
+    )
+    
+    monthly.delete()
+    SalesMonthlyRollup.objects.bulk_create([
+        SalesMonthlyRollup(
+            month=row['month'],
+            status=row['status'],
+            customer_type=row['customer_type'],
+            sale_count=row['count'],
+            total_amount=row['amount']
+        )
+        for row in rows.iterator()
+    ], batch_size=1000)
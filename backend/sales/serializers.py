@@ -48,8 +48,8 @@ class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payment
         fields = [
-            'id', 'sale', 'sale_number', 'payment_method', 'amount',
-            'payment_date', 'reference', 'notes', 'created_at'
+            'id', 'sale', 'sale_number', 'payment_number', 'payment_method', 'amount',
+            'payment_date', 'reference_number', 'notes', 'received_by', 'created_at'
         ]
         read_only_fields = ('id', 'created_at')
 
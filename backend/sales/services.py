@@ -0,0 +1,58 @@
+"""
+Transitions de statut des ventes et mouvements de stock associés.
+
+Le stock passe par ``inventory.services.record_movement`` : chaque ligne
+décrémente le stock par un ``UPDATE`` conditionnel, sans lecture préalable,
+et la vente entière est annulée si un produit vient à manquer.
+"""
+from django.db import transaction
+
+from inventory.services import record_movement
+
+from .models import Sale
+
+# Statuts pour lesquels la marchandise a quitté le stock
+STOCK_RELEASED_STATUSES = ('confirmed', 'delivered')
+
+
+class SaleStatusError(Exception):
+    """Transition de statut impossible pour la vente."""
+
+
+def _lock(sale):
+    return Sale.objects.select_for_update().get(pk=sale.pk)
+
+
+def _move_lines(sale, movement_type, user):
+    for line in sale.lines.select_related('product').order_by('product_id'):
+        record_movement(
+            line.product, movement_type, line.quantity, 'sale',
+            reference_number=sale.sale_number, unit_cost=line.product.cost_price, user=user
+        )
+
+
+def confirm_sale(sale, user=None):
+    """Confirmer une vente brouillon et sortir ses articles du stock."""
+    with transaction.atomic():
+        locked = _lock(sale)
+        if locked.status != 'draft':
+            raise SaleStatusError('Seules les ventes en brouillon peuvent être confirmées')
+        _move_lines(locked, 'out', user)
+        locked.status = 'confirmed'
+        locked.save(update_fields=['status', 'updated_at'])
+    sale.status = locked.status
+    return sale
+
+
+def cancel_sale(sale, user=None):
+    """Annuler une vente et remettre en stock les articles déjà sortis."""
+    with transaction.atomic():
+        locked = _lock(sale)
+        if locked.status == 'cancelled':
+            raise SaleStatusError('Cette vente est déjà annulée')
+        if locked.status in STOCK_RELEASED_STATUSES:
+            _move_lines(locked, 'in', user)
+        locked.status = 'cancelled'
+        locked.save(update_fields=['status', 'updated_at'])
+    sale.status = locked.status
+    return sale
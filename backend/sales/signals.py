@@ -0,0 +1,27 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from core.cache import track_models
+
+from .models import Customer, Payment, Promotion, Sale, SaleItem
+from .rollups import apply_sale_change, sale_state, stored_sale_state
+
+track_models(Customer, Sale, SaleItem, Payment, Promotion)
+
+
+@receiver(pre_save, sender=Sale, dispatch_uid='sales_rollups_pre_save')
+def remember_rollup_state(sender, instance, **kwargs):
+    instance._rollup_previous_state = stored_sale_state(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Sale, dispatch_uid='sales_rollups_post_save')
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_rollup_previous_state', None)
+    apply_sale_change(previous, sale_state(instance))
+
+
+@receiver(post_delete, sender=Sale, dispatch_uid='sales_rollups_post_delete')
+def update_rollups_on_delete(sender, instance, **kwargs):
+    apply_sale_change(sale_state(instance), None)
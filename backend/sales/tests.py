@@ -1,3 +1,237 @@
+import itertools
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.testing import QueryPlanAssertionsMixin, requires_postgresql
+from inventory.models import Category, Product, StockMovement, Unit
+from inventory.services import InsufficientStock
+from .models import Customer, Sale, SaleItem, SalesDailyRollup, SalesMonthlyRollup
+from .services import cancel_sale, confirm_sale
+
+
+@requires_postgresql
+class SaleIndexTests(QueryPlanAssertionsMixin, TestCase):
+    def test_revenue_by_status_and_period(self):
+        since = timezone.now() - timedelta(days=30)
+        self.assertUsesIndex(
+            Sale.objects.filter(status__in=['confirmed', 'delivered'], sale_date__gte=since),
+            'sales_sale_status_date_idx'
+        )
+
+
+class CustomerConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('caissier'))
+        self.customer = Customer.objects.create(name='Boutique Awa', customer_type='non_member', phone='0700000000')
+        self.url = reverse('sales:customer-list')
+    
+    def test_unchanged_list_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        
+        # Une seule requête (validateurs), ni pagination ni sérialisation
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        # Autre page ou autre filtre : autre représentation
+        self.assertEqual(self.client.get(f'{self.url}?page=1', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        
+        self.customer.name = 'Boutique Awa & fils'
+        self.customer.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_detail_is_not_modified(self):
+        url = reverse('sales:customer-detail', args=[self.customer.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        Customer.objects.create(name='Coopérative voisine', customer_type='non_member', phone='0700000001')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+    
+    def test_product_rename_refreshes_sale_list(self):
+        unit = Unit.objects.create(name='Sac', abbreviation='sac', unit_type='unit')
+        category = Category.objects.create(name='Engrais', code='ENG')
+        product = Product.objects.create(
+            name='NPK', sku='NPK', category=category, unit=unit, cost_price=1000,
+            selling_price_member=1100, selling_price_non_member=1200
+        )
+        sale = Sale.objects.create(sale_number='V-1', customer=self.customer, sale_date=timezone.now())
+        line = SaleItem.objects.create(sale=sale, product=product, quantity=1, unit_price=1200)
+        url = reverse('sales:sale-list')
+        etag = self.client.get(url)['ETag']
+        
+        product.name = 'NPK 15-15-15'
+        product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['lines'][0]['product_name'], 'NPK 15-15-15')
+        
+        line.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Boutique Awa', customer_type='non_member', phone='0700000000')
+        self.numbers = itertools.count(1)
+    
+    def sell(self, amount, day, status='confirmed'):
+        return Sale.objects.create(
+            sale_number=f'V-{next(self.numbers)}', customer=self.customer, status=status,
+            sale_date=timezone.make_aware(datetime.combine(day, time(10))), total_amount=Decimal(amount)
+        )
+    
+    def daily(self):
+        return {
+            (row.day, row.status): (row.sale_count, row.total_amount)
+            for row in SalesDailyRollup.objects.filter(sale_count__gt=0)
+        }
+    
+    def monthly(self):
+        return {
+            (row.month, row.status): (row.sale_count, row.total_amount)
+            for row in SalesMonthlyRollup.objects.filter(sale_count__gt=0)
+        }
+    
+    def test_signals_keep_rollups_in_step(self):
+        first = self.sell('100', date(2026, 1, 10))
+        self.sell('50', date(2026, 1, 10))
+        draft = self.sell('30', date(2026, 1, 20), status='draft')
+        self.assertEqual(self.daily(), {
+            (date(2026, 1, 10), 'confirmed'): (2, Decimal('150')),
+            (date(2026, 1, 20), 'draft'): (1, Decimal('30')),
+        })
+        
+        draft.status = 'confirmed'
+        draft.save()
+        first.delete()
+        self.assertEqual(self.daily(), {
+            (date(2026, 1, 10), 'confirmed'): (1, Decimal('50')),
+            (date(2026, 1, 20), 'confirmed'): (1, Decimal('30')),
+        })
+        self.assertEqual(self.monthly(), {
+            (date(2026, 1, 1), 'confirmed'): (2, Decimal('80')),
+        })
+    
+    def test_rebuild_command_repairs_bulk_updates(self):
+        self.sell('100', date(2026, 1, 10))
+        self.sell('40', date(2026, 2, 3))
+        # Mise à jour en masse : aucun signal, agrégats périmés
+        Sale.objects.update(status='delivered')
+        
+        output = StringIO()
+        call_command('rebuild_sales_rollups', '--from', '2026-02-01', stdout=output)
+        self.assertIn('1 agrégats journaliers recalculés', output.getvalue())
+        self.assertEqual(self.monthly(), {
+            (date(2026, 1, 1), 'confirmed'): (1, Decimal('100')),
+            (date(2026, 2, 1), 'delivered'): (1, Decimal('40')),
+        })
+        
+        call_command('rebuild_sales_rollups', stdout=StringIO())
+        self.assertEqual(self.monthly(), {
+            (date(2026, 1, 1), 'delivered'): (1, Decimal('100')),
+            (date(2026, 2, 1), 'delivered'): (1, Decimal('40')),
+        })
+        
+        with self.assertRaises(CommandError):
+            call_command('rebuild_sales_rollups', '--from', '2026-03-01', '--to', '2026-02-01')
+
+
+class SaleConfirmationTests(TestCase):
+    def setUp(self):
+        unit = Unit.objects.create(name='Sac', abbreviation='sac', unit_type='unit')
+        category = Category.objects.create(name='Engrais', code='ENG')
+        self.products = [
+            Product.objects.create(
+                name=sku, sku=sku, category=category, unit=unit, current_stock=stock,
+                cost_price=1000, selling_price_member=1100, selling_price_non_member=1200
+            )
+            for sku, stock in (('NPK', 10), ('UREE', 1))
+        ]
+        customer = Customer.objects.create(name='Boutique Awa', customer_type='non_member', phone='0700000000')
+        self.sale = Sale.objects.create(sale_number='V-1', customer=customer, sale_date=timezone.now())
+    
+    def add_lines(self, *quantities):
+        for product, quantity in zip(self.products, quantities):
+            SaleItem.objects.create(sale=self.sale, product=product, quantity=quantity, unit_price=1200)
+    
+    def stocks(self):
+        return [Product.objects.get(pk=product.pk).current_stock for product in self.products]
+    
+    def test_confirm_and_cancel_move_stock(self):
+        self.add_lines(4, 1)
+        confirm_sale(self.sale)
+        self.assertEqual(self.stocks(), [Decimal('6'), Decimal('0')])
+        
+        cancel_sale(self.sale)
+        self.assertEqual(self.stocks(), [Decimal('10'), Decimal('1')])
+        self.assertEqual(StockMovement.objects.filter(reference_number='V-1').count(), 4)
+    
+    def test_missing_stock_rolls_back_the_whole_sale(self):
+        self.add_lines(4, 2)
+        with self.assertRaises(InsufficientStock):
+            confirm_sale(self.sale)
+        
+        self.sale.refresh_from_db()
+        self.assertEqual(self.sale.status, 'draft')
+        self.assertEqual(self.stocks(), [Decimal('10'), Decimal('1')])
+        self.assertFalse(StockMovement.objects.exists())
+
 
-# Create your tests here.
+class SaleKeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('caissier'))
+        customer = Customer.objects.create(name='Boutique Awa', customer_type='non_member', phone='0700000000')
+        now = timezone.now()
+        # Dates en double : l'identifiant départage les ventes
+        for index, days in enumerate((0, 0, 0, 1, 2)):
+            Sale.objects.create(
+                sale_number=f'V-{index}', customer=customer, sale_date=now - timedelta(days=days)
+            )
+        self.url = reverse('sales:sale-list')
+    
+    def test_cursor_walks_every_sale_once(self):
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertIn('count', response.data)
+        
+        seen = []
+        params = {'cursor': '', 'page_size': 2}
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen += [sale['sale_number'] for sale in response.data['results']]
+            if response.data['next_cursor'] is None:
+                break
+            params['cursor'] = response.data['next_cursor']
+        
+        expected = list(Sale.objects.order_by('-sale_date', '-id').values_list('sale_number', flat=True))
+        self.assertEqual(seen, expected)
+    
+    def test_cursor_pages_skip_conditional_validators(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'cursor': '', 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertFalse([query['sql'] for query in queries if 'COUNT(' in query['sql'].upper()])
+    
+    def test_invalid_cursor_is_not_found(self):
+        for cursor in ('pas-un-curseur', 'WyJ4Il0'):
+            self.assertEqual(self.client.get(self.url, {'cursor': cursor}).status_code, 404)
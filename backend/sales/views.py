@@ -8,21 +8,31 @@ from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
 
+from core.aggregates import aggregate_metrics, sum_if
+from core.cache import cached_action
+from core.mixins import ConditionalGetMixin, SoftDeleteMixin
+from core.pagination import KeysetPagination
+from core.search import TrigramSearchFilter
+from inventory.services import StockError
+
 from .models import (
-    Customer, Sale, SaleItem, Payment, Promotion
+    Customer, Sale, SaleItem, Payment, Promotion,
+    SalesDailyRollup, SalesMonthlyRollup
 )
+from .rollups import REVENUE_STATUSES
 from .serializers import (
     CustomerSerializer, SaleSerializer, SaleItemSerializer,
     PaymentSerializer, PromotionSerializer
 )
+from . import services
 
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(SoftDeleteMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet pour la gestion des clients."""
-    queryset = Customer.objects.all()
+    queryset = Customer.objects.filter(is_active=True)
     serializer_class = CustomerSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, TrigramSearchFilter]
     filterset_fields = ['customer_type']
     search_fields = ['name', 'phone', 'email']
     ordering_fields = ['name', 'created_at']
@@ -32,7 +42,9 @@ class CustomerViewSet(viewsets.ModelViewSet):
     def purchase_history(self, request, pk=None):
         """Historique des achats du client."""
         customer = self.get_object()
-        sales = Sale.objects.filter(customer=customer).order_by('-sale_date')
+        sales = Sale.objects.filter(customer=customer).select_related(
+            'customer'
+        ).prefetch_related('lines__product').order_by('-sale_date')
         
         # Statistiques
         total_purchases = sales.aggregate(
@@ -50,7 +62,7 @@ class CustomerViewSet(viewsets.ModelViewSet):
         })
 
 
-class SaleViewSet(viewsets.ModelViewSet):
+class SaleViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet pour la gestion des ventes."""
     queryset = Sale.objects.select_related('customer').prefetch_related('lines__product')
     serializer_class = SaleSerializer
@@ -60,52 +72,77 @@ class SaleViewSet(viewsets.ModelViewSet):
     search_fields = ['sale_number', 'customer__name']
     ordering_fields = ['sale_date', 'total_amount']
     ordering = ['-sale_date']
+    pagination_class = KeysetPagination
+    keyset_fields = ('-sale_date', '-id')
+    conditional_fields = (
+        'updated_at', 'customer__updated_at', 'lines__updated_at', 'lines__product__updated_at'
+    )
     
     def perform_create(self, serializer):
         """Créer une vente avec l'utilisateur actuel."""
         serializer.save(salesperson=self.request.user)
     
     @action(detail=False, methods=['get'])
+    @cached_action(depends_on=[Sale])
     def statistics(self, request):
         """Statistiques des ventes."""
-        today = timezone.now().date()
-        this_month = today.replace(day=1)
-        
-        stats = {
-            'today': self._get_period_stats(today, today),
-            'this_week': self._get_period_stats(today - timedelta(days=7), today),
-            'this_month': self._get_period_stats(this_month, today),
-            'total': self._get_total_stats()
+        today = timezone.localdate()
+        periods = {
+            'today': today,
+            'this_week': today - timedelta(days=7),
+            'this_month': today.replace(day=1),
         }
         
+        stats = self._get_period_stats(periods, today)
+        stats['total'] = self._get_total_stats()
+        
         return Response(stats)
     
-    def _get_period_stats(self, start_date, end_date):
-        """Statistiques pour une période donnée."""
-        sales = self.queryset.filter(
-            sale_date__date__gte=start_date,
-            sale_date__date__lte=end_date,
-            status__in=['confirmed', 'delivered']
-        )
+    def _get_period_stats(self, periods, end_date):
+        """Statistiques de chaque période (agrégats journaliers, une seule requête)."""
+        metrics = {}
+        for name, start_date in periods.items():
+            in_period = Q(day__gte=start_date)
+            metrics[f'{name}_sales'] = sum_if('total_amount', in_period)
+            metrics[f'{name}_orders'] = sum_if('sale_count', in_period, default=0)
         
-        return sales.aggregate(
-            total_sales=Sum('total_amount') or Decimal('0'),
-            total_orders=Count('id'),
-            average_order=Sum('total_amount') / Count('id') if Count('id') > 0 else Decimal('0')
+        totals = aggregate_metrics(
+            SalesDailyRollup.objects.filter(
+                day__gte=min(periods.values()),
+                day__lte=end_date,
+                status__in=REVENUE_STATUSES
+            ),
+            **metrics
         )
+        return {
+            name: self._with_average({
+                'total_sales': totals[f'{name}_sales'],
+                'total_orders': totals[f'{name}_orders']
+            })
+            for name in periods
+        }
     
     def _get_total_stats(self):
-        """Statistiques totales."""
-        return self.queryset.filter(status__in=['confirmed', 'delivered']).aggregate(
-            total_sales=Sum('total_amount') or Decimal('0'),
-            total_orders=Count('id')
+        """Statistiques totales (agrégats mensuels)."""
+        stats = SalesMonthlyRollup.objects.filter(status__in=REVENUE_STATUSES).aggregate(
+            total_sales=Sum('total_amount'),
+            total_orders=Sum('sale_count')
         )
+        return self._with_average(stats)
+    
+    def _with_average(self, stats):
+        total_sales = stats['total_sales'] or Decimal('0')
+        total_orders = stats['total_orders'] or 0
+        return {
+            'total_sales': total_sales,
+            'total_orders': total_orders,
+            'average_order': total_sales / total_orders if total_orders else Decimal('0')
+        }
     
     @action(detail=False, methods=['get'])
     def top_products(self, request):
         """Produits les plus vendus."""
         from django.db.models import Sum
-        from inventory.serializers import ProductSerializer
         
         top_items = SaleItem.objects.select_related('product').values(
             'product__id', 'product__name'
@@ -121,22 +158,10 @@ class SaleViewSet(viewsets.ModelViewSet):
         """Confirmer une vente."""
         sale = self.get_object()
         
-        if sale.status != 'pending':
-            return Response(
-                {'error': 'Seules les ventes en attente peuvent être confirmées'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Vérifier le stock
-        for item in sale.items.all():
-            if item.quantity > item.product.current_stock:
-                return Response(
-                    {'error': f'Stock insuffisant pour {item.product.name}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        # Confirmer la vente
-        sale.confirm_sale()
+        try:
+            services.confirm_sale(sale, user=request.user)
+        except (services.SaleStatusError, StockError) as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({'message': 'Vente confirmée avec succès'})
     
@@ -145,13 +170,11 @@ class SaleViewSet(viewsets.ModelViewSet):
         """Annuler une vente."""
         sale = self.get_object()
         
-        if sale.status == 'cancelled':
-            return Response(
-                {'error': 'Cette vente est déjà annulée'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        try:
+            services.cancel_sale(sale, user=request.user)
+        except services.SaleStatusError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
-        sale.cancel_sale()
         return Response({'message': 'Vente annulée avec succès'})
 
 
@@ -168,7 +191,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
 class PromotionViewSet(viewsets.ModelViewSet):
     """ViewSet pour la gestion des promotions."""
-    queryset = Promotion.objects.all()
+    queryset = Promotion.objects.prefetch_related('products')
     serializer_class = PromotionSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]